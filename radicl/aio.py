@@ -0,0 +1,443 @@
+# coding: utf-8
+
+import asyncio
+
+from .api import RESPONSE_TIMEOUT
+from .com import RAD_Serial
+from .commands import AttributeCMD, MeasCMD, SettingsCMD
+from .decode import decode_buffer, get_sample_times
+from .info import ProbeState, SensorReadInfo
+from .protocol import (SYNC_BYTE, HEADER_SIZE, LONG_PAYLOAD_SIZE, API_PORT_ENABLE, frame_length, evaluate_response,
+                       request_frame, set_frame, FrameEncoder, MessageType)
+from .ui_tools import get_logger
+from .watcher import state_reached
+
+# Seconds without new bytes after which nothing more is waiting to be read
+STALE_TIMEOUT = 0.001
+
+
+class AsyncRAD_API:
+    """
+    asyncio counterpart of :class:`radicl.api.RAD_API`. Messages are exchanged
+    over asyncio streams so a single event loop can talk to many probes.
+    Every method returns the same ApiResult as its RAD_API equivalent.
+    """
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter, debug=False):
+        """
+        Args:
+            reader: Stream of bytes received from the probe
+            writer: Stream of bytes sent to the probe
+        """
+        self.reader = reader
+        self.writer = writer
+        self.log = get_logger(__name__, debug=debug)
+        self._lock = None
+        self._read_transport = None
+        self.__encoder = FrameEncoder()
+
+    @classmethod
+    async def from_port(cls, port: RAD_Serial, debug=False):
+        """
+        Wrap the file descriptor of an opened RAD_Serial in asyncio streams.
+        Only available on posix systems. The port should not be read or
+        written directly afterwards.
+
+        Args:
+            port: Opened RAD_Serial object
+        """
+        loop = asyncio.get_running_loop()
+        reader = asyncio.StreamReader()
+        read_transport, _ = await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader),
+                                                         port.serial_port)
+        transport, protocol = await loop.connect_write_pipe(asyncio.streams.FlowControlMixin,
+                                                            port.serial_port)
+        writer = asyncio.StreamWriter(transport, protocol, reader, loop)
+
+        api = cls(reader, writer, debug=debug)
+        api._read_transport = read_transport
+        return api
+
+    def close(self):
+        self.writer.close()
+        if self._read_transport is not None:
+            self._read_transport.close()
+
+    @property
+    def lock(self):
+        """Only one request per probe can be waiting on a response"""
+        # Created on first use so it belongs to the running loop
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        return self._lock
+
+    def __encode(self, cmd, fmt, *values):
+        """
+        Request with a payload. Copied out of the encoder buffer since other
+        tasks may build a message before this one is sent
+        """
+        return bytes(self.__encoder.encode(cmd, fmt, *values, msg_type=MessageType.REQUEST))
+
+    async def __clearResponses(self):
+        """
+        Drops anything received so far so the next message read is the
+        response to the next request. A late answer to a request that timed
+        out, or the rest of a message cut short by the timeout, would
+        otherwise be read as the response to the next one.
+        """
+        dropped = 0
+        while True:
+            try:
+                stale = await asyncio.wait_for(self.reader.read(4096), STALE_TIMEOUT)
+            except asyncio.TimeoutError:
+                break
+            # Closed stream
+            if not stale:
+                break
+            dropped += len(stale)
+
+        if dropped:
+            self.log.debug("Dropping %d stale bytes", dropped)
+
+    async def __readFrame(self, cmd):
+        """
+        Read one complete message for a command, dropping anything else
+        """
+        while True:
+            # Anything preceding the sync byte is discarded
+            await self.reader.readuntil(bytes([SYNC_BYTE]))
+            header = bytes([SYNC_BYTE]) + await self.reader.readexactly(HEADER_SIZE - 1)
+            frame = header + await self.reader.readexactly(frame_length(header) - HEADER_SIZE)
+
+            if frame[1] == cmd:
+                return frame
+            self.log.debug("Dropping message for command %#04x while waiting on %#04x", frame[1], cmd)
+
+    async def __send_receive(self, data, timeout=RESPONSE_TIMEOUT):
+        """
+        Generic send/receive function
+        Returns the response message if successful, None otherwise
+        """
+        async with self.lock:
+            await self.__clearResponses()
+            self.writer.write(bytes(data))
+            await self.writer.drain()
+
+            try:
+                return await asyncio.wait_for(self.__readFrame(data[1]), timeout)
+
+            except (asyncio.TimeoutError, asyncio.IncompleteReadError) as e:
+                self.log.debug(f"No response for command {data[1]:#04x}: {e!r}")
+                # Bytes of a message cut short are no use to the next request
+                await self.__clearResponses()
+                return None
+
+    async def sendApiPortEnable(self):
+        """
+        Sends a '*' to enable the API port which tells the probe to interact
+        via the radicl API
+        """
+        self.writer.write(API_PORT_ENABLE)
+        await self.writer.drain()
+
+    async def getSerialNumber(self):
+        """
+        Queries the board's serial number
+        """
+        code = AttributeCMD.SERIAL.cmd
+        response = await self.__send_receive(request_frame(code))
+        return evaluate_response(response, code, 8)
+
+    async def getMeasState(self):
+        """
+        Queries the state of the measurement state machine
+        """
+        code = MeasCMD.STATE.cmd
+        response = await self.__send_receive(request_frame(code))
+        return evaluate_response(response, code, 1)
+
+    async def MeasReset(self):
+        """
+        Resets the measurement state machine
+        """
+        code = MeasCMD.RESET.cmd
+        response = await self.__send_receive(set_frame(code))
+        return evaluate_response(response, code, 0)
+
+    async def MeasStart(self):
+        """
+        Starts a measurement
+        """
+        code = MeasCMD.START.cmd
+        response = await self.__send_receive(set_frame(code))
+        return evaluate_response(response, code, 0)
+
+    async def MeasStop(self):
+        """
+        Stops a measurement
+        """
+        code = MeasCMD.STOP.cmd
+        response = await self.__send_receive(set_frame(code))
+        return evaluate_response(response, code, 0)
+
+    async def MeasGetNumSegments(self, buffer_id):
+        """
+        Queries the number of data segments for a particular data buffer
+        """
+        code = MeasCMD.NUM_SEGMENTS.cmd
+        message = self.__encode(code, 'B', buffer_id)
+        response = await self.__send_receive(message)
+        return evaluate_response(response, code, 4)
+
+    async def MeasReadDataSegment(self, buffer_id, numPacket, timeout=RESPONSE_TIMEOUT):
+        """
+        Reads a specific data segment of a specific data buffer
+        """
+        code = MeasCMD.DATA_SEGMENT.cmd
+        message = self.__encode(code, 'BI', buffer_id, numPacket)
+        response = await self.__send_receive(message, timeout=timeout)
+
+        # Check if only the command matches. The length may be variable
+        return evaluate_response(response, code, 0)
+
+    async def MeasGetSamplingRate(self):
+        """
+        Reads/Returns the IR sampling rate
+        """
+        code = SettingsCMD.SAMPLING_RATE.cmd
+        response = await self.__send_receive(request_frame(code))
+        return evaluate_response(response, code, 4)
+
+    async def MeasGetAccRange(self):
+        """
+        gets the accelerometer range
+        """
+        code = SettingsCMD.ACCRANGE.cmd
+        response = await self.__send_receive(request_frame(code))
+        return evaluate_response(response, code, 1)
+
+
+class AsyncRAD_Probe:
+    """
+    asyncio counterpart of :class:`radicl.probe.RAD_Probe` for waiting on
+    states and downloading data from many probes on one event loop.
+    """
+
+    def __init__(self, api: AsyncRAD_API, debug=False):
+        """
+        Args:
+            api: AsyncRAD_API object connected to the probe
+        """
+        self.api = api
+        self.debug = debug
+        self._state = ProbeState.NOT_SET
+        self._last_state = ProbeState.NOT_SET
+        self._sampling_rate = None
+        self._accelerometer_range = None
+        self.log = get_logger(__name__, debug=debug)
+
+    @classmethod
+    async def connect(cls, com_port=None, debug=False):
+        """
+        Open a serial port to a probe and switch it to API mode
+
+        Args:
+            com_port: Device name of the port, None uses the first probe found
+        """
+        port = RAD_Serial(debug=debug)
+        port.openPort(com_port=com_port)
+        port.flushPort()
+        api = await AsyncRAD_API.from_port(port, debug=debug)
+        await api.sendApiPortEnable()
+        return cls(api, debug=debug)
+
+    def disconnect(self):
+        self.api.close()
+
+    @property
+    def state(self):
+        return self._state
+
+    @property
+    def last_state(self):
+        return self._last_state
+
+    @staticmethod
+    def _to_int(ret):
+        """Integer from the data returned or None if the request failed"""
+        if ret['status'] == 1 and ret['data'] is not None:
+            return int.from_bytes(ret['data'], byteorder='little')
+        return None
+
+    async def get_sampling_rate(self):
+        if self._sampling_rate is None:
+            self._sampling_rate = self._to_int(await self.api.MeasGetSamplingRate())
+        return self._sampling_rate
+
+    async def get_accelerometer_range(self):
+        if self._accelerometer_range is None:
+            sensing_range = self._to_int(await self.api.MeasGetAccRange())
+            # Add in a default
+            if sensing_range is None:
+                sensing_range = 16
+            self._accelerometer_range = sensing_range
+        return self._accelerometer_range
+
+    async def getProbeSerial(self):
+        """
+        Returns the probe's serial number as an upper case hex string or None
+        """
+        ret = await self.api.getSerialNumber()
+        if ret['status'] == 1 and ret['data'] is not None:
+            # Flip the byte array since it comes in backwards
+            return ret['data'][::-1].hex().upper()
+        return None
+
+    async def getProbeMeasState(self):
+        """
+        Retrieves the probe measurement state and converts it to an integer
+
+        Returns:
+            integer-measurement state of the probe, or none if error arises.
+        """
+        data = None
+        attempts = 0
+
+        while data is None and attempts < 10:
+            data = self._to_int(await self.api.getMeasState())
+            attempts += 1
+
+        self._last_state = self._state
+        self._state = ProbeState.from_state(data)
+        return data
+
+    async def wait_for_state(self, state: ProbeState, retry=500, delay=0.2):
+        """
+        Waits for the specified state to occur without blocking the loop.
+
+        Args:
+            state: ProbeState to wait for
+            retry: Number of attempts to try while Waiting for the states
+            delay: time in seconds to wait between each attempt
+        """
+        attempts = 0
+
+        while True:
+            result = state_reached(self.state, state)
+            if result:
+                break
+
+            if attempts > retry:
+                self.log.error("Retry Exceeded waiting for state(s) {0}".format(state))
+                break
+
+            attempts += 1
+            await asyncio.sleep(delay)
+            await self.getProbeMeasState()
+
+        return result
+
+    async def __commandAndWait(self, request, state, **kwargs):
+        ret = await request()
+        if ret['status'] == 1:
+            await self.wait_for_state(state, **kwargs)
+            return 1
+
+        self.log.error("{} error:{}".format(request.__name__, ret['errorCode'] or 'COM'))
+        return 0
+
+    async def startMeasurement(self):
+        """
+        Starts a new measurement. Returns 1 if successful, 0 otherwise
+        """
+        return await self.__commandAndWait(self.api.MeasStart, ProbeState.MEASURING)
+
+    async def stopMeasurement(self):
+        """
+        Stops an ongoing measurement. Returns 1 if successful, 0 otherwise
+        """
+        return await self.__commandAndWait(self.api.MeasStop, ProbeState.PROCESSING)
+
+    async def resetMeasurement(self):
+        """
+        Resets the measurement FSM. Returns 1 if successful, 0 otherwise
+        """
+        return await self.__commandAndWait(self.api.MeasReset, ProbeState.IDLE, delay=0.1)
+
+    async def read_buffer(self, sensor: SensorReadInfo, max_retry=10):
+        """
+        Downloads and checks the raw bytes of a sensor buffer
+
+        Args:
+            sensor: Sensor storage info
+            max_retry: Number of attempts per segment
+
+        Returns:
+            data: memoryview of the bytes or None if the download failed
+        """
+        num_segments = self._to_int(await self.api.MeasGetNumSegments(sensor.buffer_id))
+        if not num_segments:
+            self.log.error(f"No {sensor.readable_name} data available!")
+            return None
+
+        data = bytearray(num_segments * LONG_PAYLOAD_SIZE)
+        byte_counter = 0
+
+        for segment in range(num_segments):
+            for attempt in range(max_retry):
+                ret = await self.api.MeasReadDataSegment(sensor.buffer_id, segment)
+                if ret.status == 1 and ret.data is not None:
+                    break
+            else:
+                self.log.error(f"Missed {sensor.readable_name} data segment {segment} after {max_retry} attempts.")
+                return None
+
+            end = byte_counter + len(ret.data)
+            data[byte_counter:end] = ret.data
+            byte_counter = end
+
+        # Data from SPI flash always fills the segments
+        if sensor.uses_spi:
+            complete = byte_counter == num_segments * LONG_PAYLOAD_SIZE
+        else:
+            complete = byte_counter % sensor.bytes_per_sample == 0
+
+        if not complete:
+            self.log.error(f"Data Integrity Error: Unable to retrieve all data for {sensor.readable_name}.")
+            return None
+
+        return memoryview(data)[:byte_counter]
+
+    async def read_sensor(self, sensor: SensorReadInfo):
+        """
+        Downloads a sensor buffer and decodes it into a dataframe indexed
+        by time like RAD_Probe does
+
+        Returns:
+            df: pandas Dataframe or None if the download failed
+        """
+        data = await self.read_buffer(sensor)
+        if data is None:
+            return None
+
+        accelerometer_range = None
+        if sensor == SensorReadInfo.ACCELEROMETER:
+            accelerometer_range = await self.get_accelerometer_range()
+
+        import pandas as pd
+
+        df = pd.DataFrame(decode_buffer(data, sensor, accelerometer_range=accelerometer_range))
+        df['time'] = get_sample_times(df.index.size, sensor, await self.get_sampling_rate())
+        return df.set_index('time')
+
+    async def readRawSensorData(self):
+        return await self.read_sensor(SensorReadInfo.RAWSENSOR)
+
+    async def readRawAccelerationData(self):
+        return await self.read_sensor(SensorReadInfo.ACCELEROMETER)
+
+    async def readRawPressureData(self):
+        return await self.read_sensor(SensorReadInfo.RAW_BAROMETER_PRESSURE)
+
+    async def readFilteredDepthData(self):
+        return await self.read_sensor(SensorReadInfo.FILTERED_BAROMETER_DEPTH)
@@ -1,19 +1,39 @@
 # coding: utf-8
 
 import time
+from collections import deque
 
 from .ui_tools import get_logger
 from .commands import MeasCMD, SystemCMD, SettingsCMD, FWUpdateCMD, AttributeCMD
 from .info import Firmware, PCA_Name
 from .com import RAD_Serial
+from .protocol import (split_frames, bytes_needed, evaluate_response, request_frame, set_frame,
+                       build_frame, FrameEncoder, MessageType, ApiResult, API_PORT_ENABLE)
+from .transfer import RetryController
+
+# Seconds to wait for a response by default. The read loop of earlier
+# releases slept 1 ms more on every empty read until its read_delay of 0.05
+# was reached, so it gave up on a response after about 1.2 s.
+RESPONSE_TIMEOUT = 1.0
+
+# Seconds a request is retried for at most, whatever the number of attempts
+RETRY_TIME_LIMIT = 3.0
+
 
 class RAD_API:
     """
     Class for directly interacting with the probe in a non-human friendly way
     """
 
-    def __init__(self, port:RAD_Serial, debug=False):
+    def __init__(self, port:RAD_Serial, debug=False, timeout=RESPONSE_TIMEOUT):
+        """
+        Args:
+            port: Opened RAD_Serial object
+            timeout: Seconds to wait for a response when a request is not
+                     given its own timeout
+        """
         self.port = port
+        self.timeout = timeout
         self.log = get_logger(__name__, debug=debug)
         self._serial = None
         self._hw_id = None
@@ -22,6 +42,14 @@ class RAD_API:
         self._fw_rev = None
         self._full_fw_rev = None
 
+        # Received bytes not yet forming a full message and full messages
+        # not yet read
+        self._rx = bytearray()
+        self._frames = deque()
+
+        # Reusable buffers for building messages with a payload
+        self.__encoder = FrameEncoder()
+
     def __sendCommand(self, data):
         """
         Generic send function
@@ -42,273 +70,115 @@ class RAD_API:
         finally:
             return success
 
-    def __getResponse(self):
+    def __clearResponses(self):
         """
-        Generic read function
-        Returns 1 if successful, 0 otherwise
+        Drops queued messages and any bytes waiting on the port so the next
+        message read is the response to the next request
         """
+        self._frames.clear()
+        del self._rx[:]
 
-        success = 0
-        response = ""
+        if self.reader_active:
+            self.port.clearResponses()
+            return
 
         try:
             num_bytes_in_buffer = self.port.numBytesInBuffer()
             if num_bytes_in_buffer > 0:
-                response = self.port.readPort(num_bytes_in_buffer)
+                self.port.readPort(num_bytes_in_buffer)
 
         except Exception as e:
             self.log.error(e)
 
-        else:
-            success = 1
-
-        finally:
-            if success:
-                return response
-            else:
-                return None
+    @property
+    def reader_active(self):
+        """True when the port is read by a background thread"""
+        return getattr(self.port, 'reader_active', False)
 
-    def __send_receive(self, data, read_delay=0.05):
+    def __readFrame(self, timeout, cmd=None, push=False):
         """
-        Generic send/receive function
-        Returns the response if successful, empty result otherwise
-        """
-        # Dynamic delay variable, increases with each failed loop
-        delay_counter = 0.001
-
-        # Make sure that the read delay is at least 1ms (i.e. it cannot be 0)
-        if read_delay < 0.001:
-            read_delay = 0.001
-
-        ret = self.__sendCommand(data)
-
-        if ret:
-            # The command was successfuly sent. Now read the response
-            time.sleep(0.001)
-            ret = self.__getResponse()
-            # Read the response as long as we don't get anything back AND
-            # we haven't exceeded the max. read delay
-            while (((ret is None) or (ret == ""))
-                   and (delay_counter < read_delay)):
-                time.sleep(delay_counter)
-                delay_counter += 0.001
-                ret = self.__getResponse()
-            # If we get here either we have exceeded the max. read delay, or
-            #  we have received a response.
-            return ret
-
-        else:
-            # There was an issue with sending the command
-            return None
+        Reads exactly one complete message. The header is parsed as soon as
+        it arrives so each read blocks on the port for the rest of the
+        message instead of sleeping and polling. When the port has a
+        background reader this blocks on its message queues instead.
 
-    def __isACK(self, message, cmd=None):
-        """
-        Returns 1 if the message contains an ACK
-        """
-        if len(message) >= 5:
-            # If a command was specified, check that it matches the message
-            if cmd is not None:
-                if message[1] != cmd:
-                    return 0
-            # If we get here then we have passed the additional specified
-            # checks.
-            if message[2] == 0x04:
-                # ACK detected
-                return 1
-            else:
-                # No ACK found
-                return 0
-        else:
-            # Message is not long enough. Indicate an error
-            return 0
+        Args:
+            timeout: Seconds to wait for a complete message
+            cmd: Only return a message for this command, others are dropped
+            push: Wait on push messages when the port has a background reader
 
-    def __isNACK(self, message, cmd=None):
-        """
-        Returns 1 if the message contains a NACK
+        Returns:
+            frame: bytes of the message or None when the timeout is reached
         """
+        deadline = time.perf_counter() + timeout
 
-        if len(message) >= 5:
-
-            # If a command was specified, check that it matches the message
-            if cmd is not None:
-                if message[1] != cmd:
-                    return 0
-
-            # If we get here then we have passed the additional user specified
-            # checks.
-            if message[2] == 0x05:
-                # NACK detectec
-                return 1
-            else:
-                # No NACK found
-                return 0
-        else:
-            # Message is not long enough. Indicate an error
-            return 0
-
-    def __getNACKValue(self, message):
-        """
-        Returns the NACK message value
-        If an error is detected, this will simply return 0
-        """
+        while True:
+            while self._frames:
+                frame = self._frames.popleft()
+                if cmd is None or frame[1] == cmd:
+                    return frame
+                self.log.debug("Dropping message for command %#04x while waiting on %#04x", frame[1], cmd)
 
-        if len(message) >= 7:
-            nack_val = message[5:7]
-            return int.from_bytes(nack_val, byteorder='little')
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                return None
 
-        else:
-            return 0
-
-    def __isResponse(self, message, cmd=None, data_len=None):
-        """
-        Returns 1 if the message is a valid response
-        0 for data_len means that the payload length could be variable
-        """
-        valid = 0
-        length = len(message)
-        if length >= 5:
-            # Cope with temperature measurement request
-            if message[2] == 0x02 or cmd ==79:
-                calc_len = message[4] + 5
-                # If a command was specified we need to check if it matches.
-                # If it is incorrect, the response is invalid
-                if message[1] == cmd:
-                    valid = 1
-                # If a data length was specified we need to check if it
-                # matches the message's data payload length. If it is incorrect
-                # we will return immediately
-                if (data_len is not None) and (data_len != 0):
-                    if message[4] == data_len:
-                        valid = valid * 1
-
-                # If we get here then we have passed the additional
-                # specified checks. Finally, check if the overall length
-                # matches (integrity check)
-                if length == calc_len:
-                    # The length is correct
-                    valid = valid * 1
+            if self.reader_active:
+                if push:
+                    frame = self.port.readPushMessage(timeout=remaining)
                 else:
-                    # Not a response or incorrect length
-                    valid = 0
+                    frame = self.port.readFrame(timeout=remaining)
+                if frame is not None:
+                    self._frames.append(frame)
+                continue
 
-            elif (message[2] == 0x06) and (length == 261):
-                valid = 1
+            try:
+                # Block for at least the rest of the message
+                num_bytes = max(bytes_needed(self._rx), self.port.numBytesInBuffer())
+                response = self.port.readPort(num_bytes)
 
-        return valid
+            except Exception as e:
+                self.log.error(e)
+                return None
 
-    def __getNumPayloadBytes(self, message):
+            if response:
+                self._rx.extend(response)
+                self._frames.extend(split_frames(self._rx))
+
+    def __send_receive(self, data, timeout=None):
         """
-        Returns the number of bytes present in the payload. This takes long #
-        responses into account
+        Generic send/receive function, waiting timeout seconds or self.timeout
+        Returns the response message if successful, None otherwise
         """
+        self.__clearResponses()
+
+        if self.__sendCommand(data):
+            # The command was successfully sent. Now read the response
+            return self.__readFrame(self.timeout if timeout is None else timeout, cmd=data[1])
 
-        if message[2] == 0x02 or message[2] == 0x03:
-            return message[4]
-        elif message[2] == 0x06:
-            return 256
-        else:
-            return 0
-
-    def __isPushMessage(self, message, cmd=None, data_len=None):
-        """
-        Returns 1 if the message is a valid push message/response
-        """
-        length = len(message)
-        if length >= 5:
-            calc_len = message[4] + 5
-            # If a command was specified we need to check if it matches.
-            # If it is incorrect we will return immediately
-            if cmd is not None:
-                if message[1] != cmd:
-                    return 0
-            # If a data length was specified we need to check if it matches the
-            #  message's data payload length. If it is incorrect we will
-            # return immediately
-            if data_len is not None:
-                if message[4] != data_len:
-                    return 0
-            # If we get here then we have passed the additional user specified
-            # checks. Finally, check if the message is a response and if the
-            # overall length matches (integrity check)
-            if (message[2] == 0x03) and (length == calc_len):
-                # This is a response and the length is correct
-                return 1
-            else:
-                # Not a response or incorrect length
-                return 0
         else:
-            # Message is not long enough. Indicate an error
-            return 0
+            # There was an issue with sending the command
+            return None
 
-    def __waitForMessage(self, timeout, expected_bytes=5):
+    def __waitForMessage(self, timeout, cmd=None, push=False):
         """
         This function simply waits for a message. It is like a read, but waits
-        up to the specified timeout for new data to arrive
+        up to the specified timeout for a complete message to arrive
         Args:
                 timeout: specified in seconds. The smallest delay period is 0.01s
+                cmd: Only return a message for this command
+                push: Wait on push messages when a background reader is used
         """
-
-        delay_time = 0.01
         # Force the timeout to be at least 10ms
-        if timeout < delay_time:
-            timeout = delay_time
-        num_iter = timeout / delay_time
-        response = []
-        num_bytes_in_buffer = 0
-        while num_iter:
-            try:
-                num_bytes_in_buffer += self.port.numBytesInBuffer()
-
-                if num_bytes_in_buffer > 0:
-                    response.extend(self.port.readPort(num_bytes_in_buffer))
-            except Exception as e:
-                self.log.error(e)
-            else:
-                if num_bytes_in_buffer >= expected_bytes:
-                    return response
-                else:
-                    num_iter = num_iter - 1
-                    time.sleep(delay_time)
-        return None
+        return self.__readFrame(max(timeout, 0.01), cmd=cmd, push=push)
 
     def __EvaluateAndReturn(self, response, expected_command,
                             num_expected_payload_bytes):
         """
-        This function evaluates the response and prepares the API return value
-        If 'num_expected_payload_bytes' is 0, then the response guides how
-        many bytes will be returned
-
-        Args:
-                response: data in bytes from the probe received from __send_receive
-                expected_command:
-                num_expected_payload_bytes: Integer number of bytes expecting to receive
+        Evaluates the response and prepares the API return value. See
+        :func:`radicl.protocol.evaluate_response`
         """
-
-        if response is None:
-            result = {'status': 0, 'errorCode': None, 'data': None}
-
-        elif (self.__isResponse(response, expected_command,
-                                num_expected_payload_bytes)):
-            result = {'status': 1, 'errorCode': None,
-                      'data': response[-(
-                          self.__getNumPayloadBytes(response)):]}
-
-        elif (self.__isPushMessage(response, expected_command,
-                                   num_expected_payload_bytes)):
-            result = {'status': 1, 'errorCode': None,
-                      'data': response[-(
-                          self.__getNumPayloadBytes(response)):]}
-
-        elif self.__isACK(response):
-            result = {'status': 1, 'errorCode': None, 'data': None}
-
-        elif self.__isNACK(response):
-            nack_value = self.__getNACKValue(response)
-            result = {'status': 0, 'errorCode': nack_value, 'data': None}
-
-        else:
-            result = {'status': 0, 'errorCode': None, 'data': None}
-        return result
+        return evaluate_response(response, expected_command, num_expected_payload_bytes)
 
     # ********************
     # * PUBLIC FUNCTIONS *
@@ -319,7 +189,62 @@ class RAD_API:
         Sends a '*' to enable the API port which tells the probe to interact
         via the radicl API
         """
-        self.port.writePort([0x21])
+        self.port.writePort(API_PORT_ENABLE)
+
+    def waitForPushMessage(self, cmd, timeout):
+        """
+        Waits for the probe to push a message for a command. Requires the
+        port to have a background reader running, otherwise it simply waits
+        out the timeout.
+
+        Args:
+            cmd: Command code of the push message
+            timeout: Seconds to wait
+
+        Returns:
+            ApiResult: status, errorCode and data of the push message
+        """
+        if self.reader_active:
+            response = self.__readFrame(timeout, cmd=cmd, push=True)
+        else:
+            time.sleep(timeout)
+            response = None
+        return self.__EvaluateAndReturn(response, cmd, None)
+
+    def batchRequest(self, requests, timeout=None):
+        """
+        Sends requests without a payload in a single write and collects the
+        responses as they arrive, so reading many values costs one round trip
+        instead of one for each value.
+
+        Args:
+            requests: Dictionary of command code to the number of payload bytes expected
+            timeout: Seconds to wait for all the responses, defaults to self.timeout
+
+        Returns:
+            results: Dictionary of command code to ApiResult, failed for unanswered requests
+        """
+        results = {}
+        self.__clearResponses()
+
+        if self.__sendCommand(b''.join(request_frame(code) for code in requests)):
+            deadline = time.perf_counter() + (self.timeout if timeout is None else timeout)
+
+            while len(results) < len(requests):
+                frame = self.__readFrame(deadline - time.perf_counter())
+                if frame is None:
+                    break
+
+                code = frame[1]
+                if code in requests and code not in results:
+                    results[code] = self.__EvaluateAndReturn(frame, code, requests[code])
+
+        for code in requests:
+            if code not in results:
+                self.log.debug(f"No response to batched request for command {code:#04x}")
+                results[code] = ApiResult(cmd=code)
+
+        return results
 
     @property
     def hw_id(self):
@@ -379,6 +304,34 @@ class RAD_API:
             self._serial = self.getSerialNumber()
         return self._serial
 
+    def getIdentity(self):
+        """
+        The attributes identifying the connected device
+
+        Returns:
+            dict: hw_id, hw_rev, fw_rev and full_fw_rev, firmware as strings
+        """
+        def version(firmware):
+            return '.'.join(str(getattr(firmware, v)) for v in firmware.sub_versions)
+
+        return {'hw_id': self.hw_id,
+                'hw_rev': self.hw_rev,
+                'fw_rev': version(self.fw_rev),
+                'full_fw_rev': version(self.full_fw_rev)}
+
+    def restoreIdentity(self, identity):
+        """
+        Fill in the attributes of the connected device from a previous
+        session instead of requesting them
+
+        Args:
+            identity: Dictionary from getIdentity
+        """
+        self._hw_id = identity['hw_id']
+        self._hw_rev = identity['hw_rev']
+        self._fw_rev = Firmware(identity['fw_rev'])
+        self._full_fw_rev = Firmware(identity['full_fw_rev'])
+
     def Identify(self):
         """
         Identifies the connected device
@@ -408,7 +361,7 @@ class RAD_API:
         Queries the board's serial number
         """
         code = AttributeCMD.SERIAL.cmd
-        response = self.__send_receive([0x9F, code, 0x00, 0x00, 0x00])
+        response = self.__send_receive(request_frame(code))
         return self.__EvaluateAndReturn(response, code, 8)
 
     def getHWID(self):
@@ -416,7 +369,7 @@ class RAD_API:
         Queries the board's HW ID
         """
         code = AttributeCMD.HW_ID.cmd
-        response = self.__send_receive([0x9F, code, 0x00, 0x00, 0x00])
+        response = self.__send_receive(request_frame(code))
         ret_val = self.__EvaluateAndReturn(response, code, 1)
 
         if ret_val['status'] == 1:
@@ -430,7 +383,7 @@ class RAD_API:
         Queries the board's HW revision
         """
         code = AttributeCMD.HW_REV.cmd
-        response = self.__send_receive([0x9F, code, 0x00, 0x00, 0x00])
+        response = self.__send_receive(request_frame(code))
         ret_val = self.__EvaluateAndReturn(response, code, 1)
         if ret_val['status'] == 1:
             byte_arr = ret_val['data']
@@ -444,7 +397,7 @@ class RAD_API:
         Queries the board's FW revision in MAJOR.MINOR format
         """
         code = AttributeCMD.FW_REV.cmd
-        response = self.__send_receive([0x9F, code, 0x00, 0x00, 0x00])
+        response = self.__send_receive(request_frame(code))
         ret_val = self.__EvaluateAndReturn(response, code, 2)
         if ret_val['status'] == 1:
             major = ret_val['data'][0]  # value[-2]
@@ -458,21 +411,25 @@ class RAD_API:
         Queries the board's FW revision in the full A.B.C.D format
         """
         code = AttributeCMD.FULL_FW_REV.cmd
-        response = self.__send_receive([0x9F, code, 0x00, 0x00, 0x00])
+        response = self.__send_receive(request_frame(code))
         ret_val = self.__EvaluateAndReturn(response, code, 4)
         if ret_val['status'] == 1:
-            value = ret_val['data']
-            rev_string = str(value[0]) + "." + str(value[1]) + \
-                         "." + str(value[2]) + "." + str(value[3])
-            ret_val['data'] = rev_string
+            ret_val['data'] = self.parseFullFWREV(ret_val['data'])
         return ret_val
 
+    @staticmethod
+    def parseFullFWREV(data):
+        """
+        Full A.B.C.D firmware revision string from the payload of its response
+        """
+        return '.'.join(str(value) for value in data[:4])
+
     def startBootloader(self):
         """
         Starts the bootloader
         """
         code = SystemCMD.START_BOOTLOADER.cmd
-        response = self.__send_receive([0x9F, code, 0x01, 0x00, 0x00])
+        response = self.__send_receive(set_frame(code))
         return self.__EvaluateAndReturn(response, code, 0)
 
     def getSystemStatus(self):
@@ -480,12 +437,12 @@ class RAD_API:
         Queries the system status
         """
         code = SettingsCMD.STATUS.cmd
-        response = self.__send_receive([0x9F, code, 0x00, 0x00, 0x00])
+        response = self.__send_receive(request_frame(code))
         return self.__EvaluateAndReturn(response, code, 4)
 
     def getRunState(self):
         code = SystemCMD.STATE.cmd
-        response = self.__send_receive([0x9F, code, 0x00, 0x00, 0x00])
+        response = self.__send_receive(request_frame(code))
         return self.__EvaluateAndReturn(response, code, 1)
 
     # ***************************************
@@ -497,7 +454,7 @@ class RAD_API:
         Queries the state of the measurement state machine
         """
         code = MeasCMD.STATE.cmd
-        response = self.__send_receive([0x9F, code, 0x00, 0x00, 0x00])
+        response = self.__send_receive(request_frame(code))
         return self.__EvaluateAndReturn(response, code, 1)
 
     def MeasReset(self):
@@ -506,7 +463,7 @@ class RAD_API:
         Returns 1 if successful
         """
         code = MeasCMD.RESET.cmd
-        response = self.__send_receive([0x9F, code, 0x01, 0x00, 0x00])
+        response = self.__send_receive(set_frame(code))
         return self.__EvaluateAndReturn(response, code, 0)
 
     def MeasStart(self):
@@ -515,7 +472,7 @@ class RAD_API:
         Returns 1 if successful
         """
         code = MeasCMD.START.cmd
-        response = self.__send_receive([0x9F, code, 0x01, 0x00, 0x00])
+        response = self.__send_receive(set_frame(code))
         return self.__EvaluateAndReturn(response, code, 0)
 
     def MeasStop(self):
@@ -524,7 +481,7 @@ class RAD_API:
         Returns 1 if successful
         """
         code = MeasCMD.STOP.cmd
-        response = self.__send_receive([0x9F, code, 0x01, 0x00, 0x00])
+        response = self.__send_receive(set_frame(code))
         return self.__EvaluateAndReturn(response, code, 0)
 
     def MeasGetNumSegments(self, buffer_id):
@@ -532,30 +489,119 @@ class RAD_API:
         Queries the number of data segments for a particular data buffer
         """
         code = MeasCMD.NUM_SEGMENTS.cmd
-        message = [0x9F, code, 0x00, 0x00, 0x01]
-        message.extend(buffer_id.to_bytes(1, byteorder='little'))
+        message = self.__encoder.encode(code, 'B', buffer_id, msg_type=MessageType.REQUEST)
         response = self.__send_receive(message)
         return self.__EvaluateAndReturn(response, code, 4)
 
-    def MeasReadDataSegment(self, buffer_id, numPacket):
+    def MeasReadDataSegment(self, buffer_id, numPacket, timeout=None):
         """
-        Reads a specific data segment of a specific data buffer
+        Reads a specific data segment of a specific data buffer, waiting
+        timeout seconds or self.timeout for the response
         """
         code = MeasCMD.DATA_SEGMENT.cmd
-        message = [0x9F, code, 0x00, 0x00, 0x05]
-        message.extend(buffer_id.to_bytes(1, byteorder='little'))
-        message.extend(numPacket.to_bytes(4, byteorder='little'))
-        response = self.__send_receive(message)
+        message = self.__encoder.encode(code, 'BI', buffer_id, numPacket, msg_type=MessageType.REQUEST)
+        response = self.__send_receive(message, timeout=timeout)
 
         # Check if only the command matches. The length may be variable
         return self.__EvaluateAndReturn(response, code, 0)
 
+    def MeasReadDataSegments(self, buffer_id, segments, window=8, max_retry=10,
+                             timeout=None, controller: RetryController = None):
+        """
+        Reads many data segments of a specific data buffer while keeping a
+        window of requests in flight. Responses do not carry the segment
+        index, so requests are sent in rounds of up to window segments and
+        the responses of a round are only matched to its segments in order
+        once every request has been answered. When a response goes missing
+        the payloads received may belong to other segments, so the whole
+        round is discarded and its segments are requested again one at a
+        time. Segments that are rejected are requested again on their own.
+
+        Args:
+            buffer_id: Integer specifying location in the probe buffer
+            segments: Iterable of segment indices to read
+            window: Number of requests allowed in flight at once
+            max_retry: Number of attempts per segment before giving up on
+                       it, also given up RETRY_TIME_LIMIT seconds after its
+                       first request
+            timeout: Seconds to wait for each response before requesting the
+                     round again, defaults to self.timeout
+            controller: RetryController pacing the requests, its timeout
+                        is used instead when provided
+
+        Yields:
+            tuple: segment index and payload bytes in the order they arrive
+        """
+        code = MeasCMD.DATA_SEGMENT.cmd
+        to_request = deque(segments)
+        timeout = self.timeout if timeout is None else timeout
+        attempts = {}
+        first_sent = {}
+        # Number of segments to request one at a time after a missing response
+        resync = 0
+        self.__clearResponses()
+
+        while to_request:
+
+            # Send a round of requests, remembering when each was sent
+            requested = []
+            sent = []
+            while to_request and len(requested) < (1 if resync else window):
+                segment = to_request.popleft()
+                message = self.__encoder.encode(code, 'BI', buffer_id, segment, msg_type=MessageType.REQUEST)
+                attempts[segment] = attempts.get(segment, 0) + 1
+                first_sent.setdefault(segment, time.perf_counter())
+                requested.append(segment)
+                resync = max(resync - 1, 0)
+
+                if controller is not None:
+                    controller.wait()
+
+                if not self.__sendCommand(message):
+                    break
+                sent.append(time.perf_counter())
+
+            # Wait for a response to every request, dropping anything unrelated
+            received = []
+            for t0 in sent:
+                frame = self.__readFrame(timeout if controller is None else controller.timeout, cmd=code)
+                if frame is None:
+                    break
+                received.append((self.__EvaluateAndReturn(frame, code, 0), time.perf_counter() - t0))
+
+            if len(received) == len(requested):
+                failed = []
+                for segment, (ret, seconds) in zip(requested, received):
+                    if ret.status == 1 and ret.data is not None:
+                        if controller is not None:
+                            controller.success(seconds, len(ret.data))
+                        yield segment, ret.data
+                    else:
+                        failed.append(segment)
+            else:
+                self.log.debug("Missing responses for %d segments, requesting them again",
+                               len(requested) - len(received))
+                # Discard partial and late responses so they are not mismatched
+                self.__clearResponses()
+                failed = requested
+                resync = len(requested)
+
+            if failed and controller is not None:
+                controller.failure()
+
+            # Retries go first so segments arrive close to in order
+            for segment in reversed(failed):
+                if attempts[segment] < max_retry and time.perf_counter() - first_sent[segment] < RETRY_TIME_LIMIT:
+                    to_request.appendleft(segment)
+                else:
+                    self.log.warning(f"Missed data segment {segment}, after {attempts[segment]} attempts.")
+
     def MeasGetSamplingRate(self):
         """
         Reads/Returns the IR sampling rate
         """
         code = SettingsCMD.SAMPLING_RATE.cmd
-        response = self.__send_receive([0x9F, code, 0x00, 0x00, 0x00])
+        response = self.__send_receive(request_frame(code))
         return self.__EvaluateAndReturn(response, code, 4)
 
     def MeasSetSamplingRate(self, sampling_rate):
@@ -565,8 +611,7 @@ class RAD_API:
         helpme - Sets the sensor sampling rate
         """
         code = SettingsCMD.SAMPLING_RATE.cmd
-        message = [0x9F, code, 0x01, 0x00, 0x04]
-        message.extend(sampling_rate.to_bytes(4, byteorder='little'))
+        message = self.__encoder.encode(code, 'I', sampling_rate)
         response = self.__send_receive(message)
         return self.__EvaluateAndReturn(response, code, 0)
 
@@ -575,7 +620,7 @@ class RAD_API:
         Reads/returns the Zero Phase Filter Order used on the depth data.
         """
         code = SettingsCMD.ZPFO.cmd
-        response = self.__send_receive([0x9F, code, 0x00, 0x00, 0x00])
+        response = self.__send_receive(request_frame(code))
         return self.__EvaluateAndReturn(response, code, 4)
 
     def MeasSetZPFO(self, zpfo):
@@ -585,8 +630,7 @@ class RAD_API:
         helpme - Set the Zero Phase Filter Order used on the depth data.
         """
         code = SettingsCMD.ZPFO.cmd
-        message = [0x9F, code, 0x01, 0x00, 0x04]
-        message.extend(zpfo.to_bytes(4, byteorder='little'))
+        message = self.__encoder.encode(code, 'I', zpfo)
         response = self.__send_receive(message)
         return self.__EvaluateAndReturn(response, code, 0)
 
@@ -595,7 +639,7 @@ class RAD_API:
         Reads/returns the Points per millimeter parameter
         """
         code = SettingsCMD.PPMM.cmd
-        response = self.__send_receive([0x9F, code, 0x00, 0x00, 0x00])
+        response = self.__send_receive(request_frame(code))
         return self.__EvaluateAndReturn(response, code, 1)
 
     def MeasSetPPMM(self, ppmm):
@@ -603,8 +647,7 @@ class RAD_API:
         helpme - Sets the Points per millimeter parameter
         """
         code = SettingsCMD.PPMM.cmd
-        message = [0x9F, code, 0x01, 0x00, 0x01]
-        message.extend(ppmm.to_bytes(1, byteorder='little'))
+        message = self.__encoder.encode(code, 'B', ppmm)
         response = self.__send_receive(message)
         return self.__EvaluateAndReturn(response, code, 0)
 
@@ -614,7 +657,7 @@ class RAD_API:
         parameter
         """
         code = SettingsCMD.ALG.cmd
-        response = self.__send_receive([0x9F, code, 0x00, 0x00, 0x00])
+        response = self.__send_receive(request_frame(code))
         return self.__EvaluateAndReturn(response, code, 1)
 
     def MeasSetALG(self, alg):
@@ -624,8 +667,7 @@ class RAD_API:
         helpme - Sets the algorithm (1 - depth corrected, 2 for timeseries only)
         """
         code = SettingsCMD.ALG.cmd
-        message = [0x9F, code, 0x01, 0x00, 0x01]
-        message.extend(alg.to_bytes(1, byteorder='little'))
+        message = self.__encoder.encode(code, 'B', alg)
         response = self.__send_receive(message)
         return self.__EvaluateAndReturn(response, code, 0)
 
@@ -634,7 +676,7 @@ class RAD_API:
         Reads the APPP parameter
         """
         code = SettingsCMD.APPP.cmd
-        response = self.__send_receive([0x9F, code, 0x00, 0x00, 0x00])
+        response = self.__send_receive(request_frame(code))
         return self.__EvaluateAndReturn(response, code, 1)
 
     def MeasSetAPPP(self, appp):
@@ -643,8 +685,7 @@ class RAD_API:
         helpme - Sets the APPP parameter which smooths the timeseries data
         """
         code = SettingsCMD.APPP.cmd
-        message = [0x9F, code, 0x01, 0x00, 0x01]
-        message.extend(appp.to_bytes(1, byteorder='little'))
+        message = self.__encoder.encode(code, 'B', appp)
         response = self.__send_receive(message)
         return self.__EvaluateAndReturn(response, code, 0)
 
@@ -653,7 +694,7 @@ class RAD_API:
         Reads the TCM parameter
         """
         code = SettingsCMD.TCM.cmd
-        response = self.__send_receive([0x9F, code, 0x00, 0x00, 0x00])
+        response = self.__send_receive(request_frame(code))
         return self.__EvaluateAndReturn(response, code, 1)
 
     def MeasSetTCM(self, tcm):
@@ -665,8 +706,7 @@ class RAD_API:
         """
         code = SettingsCMD.TCM.cmd
 
-        message = [0x9F, code, 0x01, 0x00, 0x01]
-        message.extend(tcm.to_bytes(1, byteorder='little'))
+        message = self.__encoder.encode(code, 'B', tcm)
         response = self.__send_receive(message)
         return self.__EvaluateAndReturn(response, code, 0)
 
@@ -675,7 +715,7 @@ class RAD_API:
         Reads the user set temperature
         """
         code = SettingsCMD.USERTEMP.cmd
-        response = self.__send_receive([0x9F, code, 0x00, 0x00, 0x00])
+        response = self.__send_receive(request_frame(code))
         return self.__EvaluateAndReturn(response, code, 4)
 
     def MeasSetUserTemp(self, user_temp):
@@ -686,8 +726,7 @@ class RAD_API:
         """
         code = SettingsCMD.USERTEMP.cmd
 
-        message = [0x9F, code, 0x01, 0x00, 0x04]
-        message.extend(user_temp.to_bytes(4, byteorder='little'))
+        message = self.__encoder.encode(code, 'I', user_temp)
         response = self.__send_receive(message)
         return self.__EvaluateAndReturn(response, code, 0)
 
@@ -697,7 +736,7 @@ class RAD_API:
 
         """
         code = SettingsCMD.IR.cmd
-        response = self.__send_receive([0x9F, code, 0x00, 0x00, 0x00])
+        response = self.__send_receive(request_frame(code))
         return self.__EvaluateAndReturn(response, code, 1)
 
     def MeasSetIR(self, ir):
@@ -707,8 +746,7 @@ class RAD_API:
         helpme - Turns on the IR emitter
         """
         code = SettingsCMD.IR.cmd
-        message = [0x9F, code, 0x01, 0x00, 0x01]
-        message.extend(ir.to_bytes(1, byteorder='little'))
+        message = self.__encoder.encode(code, 'B', ir)
         response = self.__send_receive(message)
         return self.__EvaluateAndReturn(response, code, 0)
 
@@ -717,8 +755,7 @@ class RAD_API:
         Reads a sensor's calibration value
         """
         code = SettingsCMD.CALIBDATA.cmd
-        message = [0x9F, code, 0x00, 0x00, 0x01]
-        message.extend(num_sensor.to_bytes(1, byteorder='little'))
+        message = self.__encoder.encode(code, 'B', num_sensor, msg_type=MessageType.REQUEST)
 
         response = self.__send_receive(message)
 
@@ -747,12 +784,9 @@ class RAD_API:
         helpme - Sets the calibration data for the specified sensor
         """
         code = SettingsCMD.CALIBDATA.cmd
-        message = [0x9F, code, 0x01, 0x00, 0x05]
 
-        # Convert values each into a 1 and 2 bytes
-        message.extend(num_sensor.to_bytes(1, byteorder='little'))
-        message.extend(calibration_value_low.to_bytes(2, byteorder='little'))
-        message.extend(calibration_value_high.to_bytes(2, byteorder='little'))
+        # Sensor number in 1 byte and the values each in 2 bytes
+        message = self.__encoder.encode(code, 'BHH', num_sensor, calibration_value_low, calibration_value_high)
         response = self.__send_receive(message)
         return self.__EvaluateAndReturn(response, code, 0)
 
@@ -762,7 +796,7 @@ class RAD_API:
         Returns status=1 if successful, status=0 otherwise
         """
         code = MeasCMD.TEMP.cmd
-        response = self.__send_receive([0x9F, code, 0x00, 0x00, 0x00])
+        response = self.__send_receive(request_frame(code))
         return self.__EvaluateAndReturn(response, code, 4)
 
     def MeasGetAccThreshold(self):
@@ -771,7 +805,7 @@ class RAD_API:
         Returns status=1 if successful, status=0 otherwise
         """
         code = SettingsCMD.ACCTHRESH.cmd
-        response = self.__send_receive([0x9F, code, 0x00, 0x00, 0x00])
+        response = self.__send_receive(request_frame(code))
         return self.__EvaluateAndReturn(response, code, 4)
 
     def MeasSetAccThreshold(self, threshold):
@@ -782,8 +816,7 @@ class RAD_API:
         Returns status=1 if successful, status=0 otherwise
         """
         code = SettingsCMD.ACCTHRESH.cmd
-        message = [0x9F, code, 0x01, 0x00, 0x04]
-        message.extend(threshold.to_bytes(4, byteorder='little'))
+        message = self.__encoder.encode(code, 'I', threshold)
         response = self.__send_receive(message)
         return self.__EvaluateAndReturn(response, code, 0)
 
@@ -794,7 +827,7 @@ class RAD_API:
         status=0 otherwise
         """
         code = SettingsCMD.ACCZPFO.cmd
-        response = self.__send_receive([0x9F, code, 0x00, 0x00, 0x00])
+        response = self.__send_receive(request_frame(code))
         return self.__EvaluateAndReturn(response, code, 4)
 
     def MeasSetAccZPFO(self, zpfo):
@@ -806,8 +839,7 @@ class RAD_API:
         status=0 otherwise
         """
         code = SettingsCMD.ACCZPFO.cmd
-        message = [0x9F, code, 0x01, 0x00, 0x04]
-        message.extend(zpfo.to_bytes(4, byteorder='little'))
+        message = self.__encoder.encode(code, 'I', zpfo)
         response = self.__send_receive(message)
         return self.__EvaluateAndReturn(response, code, 0)
 
@@ -816,7 +848,7 @@ class RAD_API:
         gets the accelerometer range
         """
         code = SettingsCMD.ACCRANGE.cmd
-        response = self.__send_receive([0x9F, code, 0x00, 0x00, 0x00])
+        response = self.__send_receive(request_frame(code))
         return self.__EvaluateAndReturn(response, code, 1)
 
     def MeasSetAccRange(self, abs_range_gs):
@@ -829,8 +861,7 @@ class RAD_API:
         Returns:
         """
         code = SettingsCMD.ACCRANGE.cmd
-        message = [0x9F, code, 0x01, 0x00, 0x04]
-        message.extend(abs_range_gs.to_bytes(4, byteorder='little'))
+        message = self.__encoder.encode(code, 'I', abs_range_gs)
         response = self.__send_receive(message)
         return self.__EvaluateAndReturn(response, code, 0)
 
@@ -844,7 +875,7 @@ class RAD_API:
         Returns status=1 if successful, status=0 otherwise
         """
         code = FWUpdateCMD.ENTER.cmd
-        response = self.__send_receive([0x9F, code, 0x01, 0x00, 0x00])
+        response = self.__send_receive(set_frame(code))
         return self.__EvaluateAndReturn(response, code, 0)
 
     def UpdateGetState(self):
@@ -852,7 +883,7 @@ class RAD_API:
         Gets the FW update FSM state
         """
         code = FWUpdateCMD.STATE.cmd
-        response = self.__send_receive([0x9F, code, 0x00, 0x00, 0x00])
+        response = self.__send_receive(request_frame(code))
         return self.__EvaluateAndReturn(response, code, 1)
 
     def UpdateWaitForStateChange(self, wait_time):
@@ -860,7 +891,7 @@ class RAD_API:
         Waits for the state change message
         """
         code = FWUpdateCMD.STATE.cmd
-        response = self.__waitForMessage(wait_time, 6)
+        response = self.__waitForMessage(wait_time, cmd=code, push=True)
         return self.__EvaluateAndReturn(response, code, 1)
 
     def UpdateSetSize(self, num_packets, packet_size):
@@ -869,9 +900,7 @@ class RAD_API:
         Returns status=1 if successful, status=0 otherwise
         """
         code = FWUpdateCMD.SIZE.cmd
-        message = [0x9F, code, 0x01, 0x00, 0x06]
-        message.extend(num_packets.to_bytes(4, byteorder='little'))
-        message.extend(packet_size.to_bytes(2, byteorder='little'))
+        message = self.__encoder.encode(code, 'IH', num_packets, packet_size)
         response = self.__send_receive(message)
         return self.__EvaluateAndReturn(response, code, 0)
 
@@ -881,12 +910,10 @@ class RAD_API:
         Returns status=1 if successful, status=0 otherwise
         """
         code = FWUpdateCMD.DOWNLOAD.cmd
-        message = [0x9F, code, 0x01, 0x00, 0x00]
-        message[3] = crc8
-        message[4] = len(data)
-        message.extend(data)
+        message = build_frame(code, MessageType.SET, data, extra=crc8)
+        self.__clearResponses()
         self.__sendCommand(message)
-        response = self.__waitForMessage(20)
+        response = self.__waitForMessage(20, cmd=code)
         return self.__EvaluateAndReturn(response, code, 0)
 
     def UpdateDownload_Long(self, data, crc8, packet_id):
@@ -895,12 +922,11 @@ class RAD_API:
         Returns status=1 if successful, status=0 otherwise
         """
         code = FWUpdateCMD.DOWNLOAD.cmd
-        message = [0x9F, code, 0x07, 0x00, 0x00]
-        message[3] = crc8
-        message[4] = 0
-        message.extend(data)
+        # Long requests do not report their length
+        message = build_frame(code, MessageType.LONG_REQUEST, data, extra=crc8, length=0)
+        self.__clearResponses()
         self.__sendCommand(message)
-        response = self.__waitForMessage(20)
+        response = self.__waitForMessage(20, cmd=code)
         return self.__EvaluateAndReturn(response, code, 0)
 
     def UpdateSetCRC(self, crc32):
@@ -909,8 +935,7 @@ class RAD_API:
         Returns status=1 if successful, status=0 otherwise
         """
         code = FWUpdateCMD.CRC.cmd
-        message = [0x9F, code, 0x01, 0x00, 0x04]
-        message.extend(crc32.to_bytes(4, byteorder='little'))
+        message = self.__encoder.encode(code, 'I', crc32)
         response = self.__send_receive(message)
         return self.__EvaluateAndReturn(response, code, 0)
 
@@ -920,5 +945,5 @@ class RAD_API:
         Returns status=1 if successful, status=0 otherwise
         """
         code = FWUpdateCMD.CLOSE.cmd
-        response = self.__send_receive([0x9F, code, 0x01, 0x00, 0x00])
+        response = self.__send_receive(set_frame(code))
         return self.__EvaluateAndReturn(response, code, 0)
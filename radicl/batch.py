@@ -0,0 +1,273 @@
+# coding: utf-8
+
+"""
+Reprocess a season of profiles at once. Raw archives, CSV and npz profiles
+are spread over a pool of processes in chunks, each profile is rebuilt,
+summarized and plotted without a display. Outputs keep the folders of the
+profiles below the output folder. A failed profile is reported in the
+summary and never stops the rest.
+
+Usage:
+    radicl-batch ./season --output_dir ./processed --workers 8
+"""
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+from . import __version__
+from .ui_tools import get_logger
+from .writers import WRITERS
+
+
+def find_profiles(paths, exclude=None):
+    """
+    Profiles to process under a list of paths. Raw archive measurements and
+    files of any of the output formats are found by searching folders
+    recursively. When a profile is in several formats only one is kept,
+    preferring the raw archive then the order of radicl.writers.WRITERS, so
+    profiles decoded next to their measurement are not processed twice.
+
+    Args:
+        paths: List of files, measurement folders or folders holding them
+        exclude: Folder to skip, used to ignore the output of earlier runs
+
+    Returns:
+        profiles: Sorted list of Paths
+    """
+    from .cache import RawArchive
+
+    extensions = [writer.extension for writer in WRITERS.values()]
+    exclude = None if exclude is None else Path(exclude).resolve()
+    found = {}
+
+    def rank(path):
+        return -1 if path.is_dir() else extensions.index(path.suffix.lower())
+
+    def add(path):
+        path = Path(path)
+        if exclude is not None and exclude in path.resolve().parents:
+            return
+        key = path if path.is_dir() else path.with_suffix('')
+        if key not in found or rank(path) < rank(found[key]):
+            found[key] = path
+
+    for path in paths:
+        path = Path(path)
+        if path.is_dir() and not RawArchive.is_measurement(path):
+            for header in path.rglob(RawArchive.header_file):
+                add(header.parent)
+            for f in path.rglob('*'):
+                if f.suffix.lower() in extensions and f.is_file():
+                    add(f)
+        else:
+            add(path)
+
+    return sorted(found.values())
+
+
+def summarize(profile):
+    """
+    Summary statistics of a profile, the numbers of its report card
+
+    Args:
+        profile: study_lyte LyteProfileV6
+
+    Returns:
+        summary: Dictionary of statistic name to value
+    """
+    return {'recorded': profile.datetime.isoformat(),
+            'samples': len(profile.raw.index),
+            'moving_time': profile.moving_time,
+            'avg_velocity': profile.avg_velocity,
+            'resolution': profile.resolution,
+            'distance_traveled': profile.distance_traveled,
+            'snow_depth': profile.distance_through_snow,
+            'ground_strike': profile.ground.time is not None,
+            'upward_motion': profile.has_upward_motion}
+
+
+def output_folders(paths, output_dir):
+    """
+    Folders to write the outputs of each profile to. The folders holding the
+    profiles are kept below the output folder relative to the one they all
+    share, so profiles with the same name in different folders do not
+    overwrite each other.
+
+    Args:
+        paths: List of profiles, see find_profiles
+        output_dir: Folder to write the rebuilt profiles and plots to
+
+    Returns:
+        folders: List of Paths in the order of the paths
+    """
+    parents = [Path(p).resolve().parent for p in paths]
+    if not parents:
+        return []
+
+    try:
+        root = Path(os.path.commonpath(parents))
+    except ValueError:
+        # Paths on different drives only share the output folder
+        root = None
+
+    return [Path(output_dir).joinpath(p.relative_to(root or p.anchor)) for p in parents]
+
+
+def process_profile(path, output_dir, output_format='csv', image_format='png'):
+    """
+    Rebuild, summarize and plot a single profile. Raw archive measurements
+    are decoded and merged into a high resolution profile written to the
+    output folder in the output format.
+
+    Args:
+        path: Raw archive measurement folder, CSV or npz profile
+        output_dir: Folder to write the rebuilt profiles and plots to
+        output_format: Format to write rebuilt raw archive measurements in
+        image_format: Extension of the plots, None to skip plotting
+
+    Returns:
+        summary: Dictionary of the file, its statistics and any error
+    """
+    from .cache import RawArchive
+    from .high_resolution import decode_archive
+    from .plotting import render_hi_res
+    from .writers import read_lyte_profile, write_profile
+
+    path = Path(path)
+    output_dir = Path(output_dir)
+    log = get_logger(__name__)
+    summary = {'file': str(path), 'output': None, 'image': None, 'error': None}
+
+    try:
+        output_dir.mkdir(parents=True, exist_ok=True)
+        if RawArchive.is_measurement(path):
+            df, header = decode_archive(path, log)
+            filename = write_profile(df, header, output_dir.joinpath(path.name), fmt=output_format)
+            summary['output'] = filename
+        else:
+            filename = path
+
+        profile = read_lyte_profile(filename)
+        summary.update(summarize(profile))
+
+        if image_format is not None:
+            image = output_dir.joinpath(f"{Path(filename).stem}.{image_format}")
+            summary['image'] = str(render_hi_res(profile, image, log))
+
+    except Exception as e:
+        summary['error'] = f"{type(e).__name__}: {e}"
+
+    return summary
+
+
+def process_chunk(jobs, output_format='csv', image_format='png'):
+    """
+    Process a chunk of profiles in a worker, see process_profile
+
+    Args:
+        jobs: List of profile paths and the folder to write their outputs to
+
+    Returns:
+        summaries: List of summary dictionaries
+    """
+    return [process_profile(p, output_dir, output_format, image_format) for p, output_dir in jobs]
+
+
+def run_batch(paths, output_dir, workers=None, chunksize=None, output_format='csv', image_format='png', log=None):
+    """
+    Process profiles over a pool of processes. Profiles are submitted in
+    chunks so each worker is handed a batch at a time, progress is reported
+    as chunks finish.
+
+    Args:
+        paths: List of profiles, see find_profiles
+        output_dir: Folder to write the rebuilt profiles and plots to, see output_folders
+        workers: Number of processes, defaults to the number of cores
+        chunksize: Profiles per chunk, defaults to about four chunks per worker capped at 16
+        output_format: Format to write rebuilt raw archive measurements in
+        image_format: Extension of the plots, None to skip plotting
+        log: Logger to report progress to
+
+    Returns:
+        summaries: List of summary dictionaries in the order of the paths
+    """
+    log = log or get_logger(__name__)
+    paths = [str(Path(p)) for p in paths]
+    workers = workers or os.cpu_count() or 1
+    chunksize = chunksize or max(1, min(16, len(paths) // (workers * 4)))
+    Path(output_dir).mkdir(parents=True, exist_ok=True)
+
+    jobs = list(zip(paths, [str(f) for f in output_folders(paths, output_dir)]))
+    chunks = [jobs[i:i + chunksize] for i in range(0, len(jobs), chunksize)]
+    summaries = {}
+    start = time.perf_counter()
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(process_chunk, chunk, output_format, image_format): chunk
+                   for chunk in chunks}
+
+        for future in as_completed(futures):
+            chunk = futures[future]
+            try:
+                results = future.result()
+            except Exception as e:
+                # The worker running the chunk died
+                results = [{'file': p, 'output': None, 'image': None, 'error': f"{type(e).__name__}: {e}"}
+                           for p, folder in chunk]
+
+            for summary in results:
+                summaries[summary['file']] = summary
+                if summary['error'] is not None:
+                    log.error(f"Unable to process {summary['file']}: {summary['error']}")
+
+            seconds = time.perf_counter() - start
+            log.info(f"Processed {len(summaries):,}/{len(paths):,} profiles "
+                     f"({len(summaries) / seconds:0.1f} profiles/s)")
+
+    return [summaries[p] for p in paths]
+
+
+def main():
+    p = argparse.ArgumentParser(description='Rebuild, summarize and plot many Lyte probe profiles at once '
+                                            'using all the cores available')
+    p.add_argument('paths', nargs='+', help='Profiles, raw archive measurements or folders holding them')
+    p.add_argument('-o', '--output_dir', default='./processed',
+                   help='Folder to write the rebuilt profiles, plots and summary.csv to')
+    p.add_argument('-w', '--workers', type=int, default=None, help='Number of processes, defaults to the cores')
+    p.add_argument('--chunksize', type=int, default=None, help='Profiles handed to a process at once')
+    p.add_argument('--output_format', default='csv', choices=list(WRITERS),
+                   help='File format to write rebuilt raw archive measurements in')
+    p.add_argument('--image_format', default='png', help='Format of the plots, e.g. png, svg or pdf')
+    p.add_argument('--no_plots', action='store_true', help='Only rebuild and summarize the profiles')
+    p.add_argument('-d', '--debug', dest='debug', action='store_true',
+                   help="Debug flag will print out much more info")
+    p.add_argument('--version', action='version',
+                   version='%(prog)s v{version}'.format(version=__version__))
+    args = p.parse_args()
+
+    log = get_logger("RAD Batch", debug=args.debug)
+    paths = find_profiles(args.paths, exclude=args.output_dir)
+    if not paths:
+        log.error("No profiles found")
+        sys.exit(1)
+
+    log.info(f"Processing {len(paths):,} profiles")
+    summaries = run_batch(paths, args.output_dir, workers=args.workers, chunksize=args.chunksize,
+                          output_format=args.output_format, image_format=None if args.no_plots else args.image_format,
+                          log=log)
+
+    import pandas as pd
+
+    filename = Path(args.output_dir).joinpath('summary.csv')
+    pd.DataFrame(summaries).to_csv(filename, index=False)
+    failed = len([s for s in summaries if s['error'] is not None])
+    log.info(f"Processed {len(summaries) - failed:,}/{len(summaries):,} profiles, summary written to {filename}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,567 @@
+# coding: utf-8
+
+import datetime
+import hashlib
+import json
+from pathlib import Path
+
+import numpy as np
+
+from .commands import MeasCMD, SettingsCMD
+from .decode import decode_buffer, get_sample_times
+from .info import SensorReadInfo
+from .protocol import LONG_PAYLOAD_SIZE, decode_temperature
+from .ui_tools import get_logger
+
+
+class SegmentCheckpoint:
+    """
+    Tracks the segments of a buffer received so far so an interrupted
+    download only requests the missing ones. Segments are written in place by
+    index and their lengths kept in a segment map where zero marks a segment
+    not received yet. With a path the data and map are memory mapped files
+    that survive the process. The fingerprint of the first segment
+    identifies the measurement the segments belong to.
+    """
+
+    def __init__(self, num_segments, path=None, identity=None):
+        """
+        Args:
+            num_segments: Number of segments in the buffer
+            path: Path without a suffix to keep the checkpoint in, None keeps it in memory
+            identity: Fingerprint of the first segment of the buffer, see fingerprint
+        """
+        self.num_segments = num_segments
+        self.path = None if path is None else Path(path)
+        self.identity = identity
+
+        if self.path is None:
+            self.data = np.zeros(num_segments * LONG_PAYLOAD_SIZE, dtype=np.uint8)
+            self.lengths = np.zeros(num_segments, dtype=np.uint16)
+
+        else:
+            mode = 'r+' if self.path.with_suffix('.seg').exists() else 'w+'
+            self.data = np.memmap(self.path.with_suffix('.part'), dtype=np.uint8, mode=mode,
+                                  shape=(num_segments * LONG_PAYLOAD_SIZE,))
+            self.lengths = np.memmap(self.path.with_suffix('.seg'), dtype=np.uint16, mode=mode,
+                                     shape=(num_segments,))
+
+    @property
+    def received(self):
+        """Number of segments received"""
+        return int(np.count_nonzero(self.lengths))
+
+    @property
+    def complete(self):
+        return self.received == self.num_segments
+
+    @property
+    def nbytes(self):
+        return int(self.lengths.sum())
+
+    def missing(self):
+        """Indices of the segments not received yet"""
+        return np.flatnonzero(self.lengths == 0).tolist()
+
+    @staticmethod
+    def fingerprint(payload):
+        """Identity of a measurement taken from the first segment of its buffer"""
+        return hashlib.sha1(bytes(payload)).hexdigest()
+
+    def store(self, segment, payload):
+        start = segment * LONG_PAYLOAD_SIZE
+        self.data[start:start + len(payload)] = np.frombuffer(payload, dtype=np.uint8)
+        self.lengths[segment] = len(payload)
+
+    def assemble(self):
+        """
+        Received segments joined in order
+
+        Returns:
+            data: Bytes like object, a view when the segments are contiguous
+        """
+        full = self.lengths[:-1] == LONG_PAYLOAD_SIZE
+
+        if self.complete and full.all():
+            end = (self.num_segments - 1) * LONG_PAYLOAD_SIZE + int(self.lengths[-1])
+            data = memoryview(self.data)[:end]
+        else:
+            data = b''.join(bytes(self.data[i * LONG_PAYLOAD_SIZE:i * LONG_PAYLOAD_SIZE + n])
+                            for i, n in enumerate(self.lengths) if n)
+
+        # Copy out of the mapped files so they can be removed
+        if self.path is not None:
+            data = bytearray(data)
+        return data
+
+    def discard(self):
+        """Remove the files of a checkpoint kept on disk"""
+        if self.path is not None:
+            # Release the mapped files first
+            self.data = None
+            self.lengths = None
+            self.remove(self.path)
+
+    @staticmethod
+    def remove(path):
+        for suffix in ['.part', '.seg', '.json']:
+            Path(path).with_suffix(suffix).unlink(missing_ok=True)
+
+
+class CaptureCache:
+    """
+    Keeps a copy of every buffer downloaded from a probe on disk. Each buffer
+    is written as the raw bytes received in a .bin file next to a .json
+    sidecar holding what is needed to decode it later. Buffers are loaded
+    back memory mapped so reprocessing a capture never needs the probe.
+
+    Usage:
+        cache = CaptureCache()
+        path = cache.save(data, SensorReadInfo.RAWSENSOR, sampling_rate=16000)
+        df = cache.decode(path)
+    """
+    default_directory = '~/.radicl/captures'
+
+    def __init__(self, directory=None, debug=False):
+        """
+        Args:
+            directory: Folder to keep captures in, defaults to ~/.radicl/captures
+        """
+        self.directory = Path(directory or self.default_directory).expanduser()
+        self.log = get_logger(__name__, debug=debug)
+
+    def save(self, data, sensor: SensorReadInfo, sampling_rate=None, accelerometer_range=None,
+             serial=None, firmware=None, complete=True):
+        """
+        Write a downloaded buffer and its sidecar
+
+        Args:
+            data: Bytes like object of the buffer as downloaded
+            sensor: Sensor storage info
+            sampling_rate: Sampling rate setting of the probe
+            accelerometer_range: Sensing range of the accelerometer in g's
+            serial: Serial number of the probe
+            firmware: Firmware revision of the probe
+            complete: False if the download did not pass the integrity check
+
+        Returns:
+            path: Path to the .bin file written
+        """
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+        t = datetime.datetime.now()
+        stamp = t.strftime('%Y-%m-%d--%H%M%S')
+        path = self.directory.joinpath(f"{stamp}_{serial or 'unknown'}_{sensor.name.lower()}.bin")
+
+        # Avoid overwriting a capture of the same sensor in the same second
+        count = 1
+        while path.exists():
+            path = path.with_name(f"{stamp}_{serial or 'unknown'}_{sensor.name.lower()}_{count}.bin")
+            count += 1
+
+        meta = {'sensor': sensor.name,
+                'recorded': t.isoformat(timespec='seconds'),
+                'bytes': len(data),
+                'complete': complete,
+                'sampling_rate': sampling_rate,
+                'accelerometer_range': accelerometer_range,
+                'serial': serial,
+                'firmware': None if firmware is None else str(firmware)}
+
+        path.write_bytes(data)
+        path.with_suffix('.json').write_text(json.dumps(meta, indent=2))
+        self.log.debug(f"Cached {len(data):,} bytes of {sensor.readable_name} data to {path}")
+        return path
+
+    def captures(self, sensor: SensorReadInfo = None):
+        """
+        List the captures in the cache oldest first
+
+        Args:
+            sensor: Only list captures of this sensor
+
+        Returns:
+            paths: List of .bin paths
+        """
+        if not self.directory.is_dir():
+            return []
+
+        paths = sorted(self.directory.glob('*.bin'))
+        if sensor is not None:
+            paths = [p for p in paths if self.load_meta(p)['sensor'] == sensor.name]
+        return paths
+
+    @staticmethod
+    def load_meta(path):
+        return json.loads(Path(path).with_suffix('.json').read_text())
+
+    @classmethod
+    def load(cls, path):
+        """
+        Memory map a cached buffer
+
+        Args:
+            path: Path to the .bin file
+
+        Returns:
+            tuple: uint8 array of the buffer and the sidecar dictionary
+        """
+        path = Path(path)
+        meta = cls.load_meta(path)
+
+        # Empty files can not be mapped
+        if meta['bytes'] == 0:
+            return np.empty(0, dtype=np.uint8), meta
+
+        return np.memmap(path, dtype=np.uint8, mode='r'), meta
+
+    @classmethod
+    def decode(cls, path):
+        """
+        Decode a cached buffer into a dataframe indexed by time as if it were
+        downloaded from the probe
+
+        Args:
+            path: Path to the .bin file
+
+        Returns:
+            df: pandas Dataframe
+        """
+        data, meta = cls.load(path)
+        sensor = SensorReadInfo[meta['sensor']]
+
+        import pandas as pd
+
+        df = pd.DataFrame(decode_buffer(data, sensor, accelerometer_range=meta['accelerometer_range']))
+        df['time'] = get_sample_times(df.index.size, sensor, meta['sampling_rate'])
+        return df.set_index('time')
+
+    def checkpoint(self, buffer_id, serial, num_segments, identity=None):
+        """
+        Open the checkpoint of a buffer download, resuming one left by an
+        earlier session of the same probe when it is of the same measurement
+
+        Args:
+            buffer_id: Integer specifying location in the probe buffer
+            serial: Serial number of the probe
+            num_segments: Number of segments in the buffer
+            identity: Fingerprint of the first segment of the buffer on the probe,
+                      without it a checkpoint is never resumed
+
+        Returns:
+            checkpoint: SegmentCheckpoint kept in the cache directory
+        """
+        path = self.directory.joinpath('partial', f"{serial or 'unknown'}_buffer{buffer_id}")
+        path.parent.mkdir(parents=True, exist_ok=True)
+        meta_path = path.with_suffix('.json')
+
+        if meta_path.exists():
+            meta = json.loads(meta_path.read_text())
+
+            # Captures of a fixed length share a size, only the first segment tells measurements apart
+            if meta['num_segments'] == num_segments and identity is not None and meta.get('identity') == identity:
+                checkpoint = SegmentCheckpoint(num_segments, path, identity=identity)
+                self.log.info(f"Resuming download of buffer {buffer_id} with "
+                              f"{checkpoint.received:,}/{num_segments:,} segments received")
+                return checkpoint
+
+            self.log.info(f"Download checkpoint of buffer {buffer_id} is from another measurement, starting over")
+
+        SegmentCheckpoint.remove(path)
+        meta_path.write_text(json.dumps({'buffer_id': buffer_id, 'serial': serial, 'num_segments': num_segments,
+                                         'identity': identity}))
+        return SegmentCheckpoint(num_segments, path, identity=identity)
+
+    def has_checkpoints(self, serial=None):
+        """
+        Whether a download of a probe was left unfinished
+
+        Args:
+            serial: Serial number of the probe, None checks for any probe
+        """
+        directory = self.directory.joinpath('partial')
+        return directory.is_dir() and any(directory.glob(f"{serial or '*'}_buffer*.json"))
+
+    def discard_checkpoints(self, serial=None):
+        """
+        Remove the download checkpoints of a probe, used when its measurement
+        is cleared
+
+        Args:
+            serial: Serial number of the probe, None removes all of them
+        """
+        directory = self.directory.joinpath('partial')
+        pattern = f"{serial or '*'}_buffer*.json"
+
+        for meta_path in directory.glob(pattern):
+            SegmentCheckpoint.remove(meta_path.with_suffix(''))
+
+
+class RawArchive:
+    """
+    Archive of measurements kept exactly as downloaded for bulk field work.
+    Each measurement is a folder holding its buffers in the CaptureCache
+    format and a header.json of the probe header, so taking a measurement
+    only transfers and writes bytes. The header is written last, folders
+    without one are incomplete and skipped. Decoding happens later with
+    radicl-decode.
+
+    Usage:
+        archive = RawArchive('./archive')
+        path = probe.archive_sensors(archive, sensors)
+        header, buffers = archive.load(path)
+    """
+    header_file = 'header.json'
+
+    def __init__(self, directory, debug=False):
+        """
+        Args:
+            directory: Folder to keep measurements in
+        """
+        self.directory = Path(directory).expanduser()
+        self.log = get_logger(__name__, debug=debug)
+
+    def create(self, serial=None):
+        """
+        Make the folder of a new measurement
+
+        Args:
+            serial: Serial number of the probe
+
+        Returns:
+            cache: CaptureCache writing the buffers to the measurement folder
+        """
+        stamp = datetime.datetime.now().strftime('%Y-%m-%d--%H%M%S')
+        path = self.directory.joinpath(f"{stamp}_{serial or 'unknown'}")
+
+        count = 1
+        while path.exists():
+            path = self.directory.joinpath(f"{stamp}_{serial or 'unknown'}_{count}")
+            count += 1
+
+        path.mkdir(parents=True)
+        return CaptureCache(path)
+
+    def finish(self, path, header):
+        """
+        Write the header of a measurement marking it complete
+
+        Args:
+            path: Measurement folder
+            header: Dictionary of the probe header and any extra information
+        """
+        Path(path).joinpath(self.header_file).write_text(json.dumps(header, indent=2, default=str))
+        self.log.debug(f"Archived measurement to {path}")
+
+    @classmethod
+    def is_measurement(cls, path):
+        return Path(path).joinpath(cls.header_file).is_file()
+
+    def measurements(self):
+        """
+        List the complete measurements in the archive oldest first
+
+        Returns:
+            paths: List of measurement folders
+        """
+        if not self.directory.is_dir():
+            return []
+        return sorted(p for p in self.directory.iterdir() if self.is_measurement(p))
+
+    @classmethod
+    def load(cls, path):
+        """
+        Decode the buffers of a measurement
+
+        Args:
+            path: Measurement folder
+
+        Returns:
+            tuple: header dictionary and a dictionary of SensorReadInfo to pandas Dataframe
+        """
+        path = Path(path)
+        header = json.loads(path.joinpath(cls.header_file).read_text())
+        cache = CaptureCache(path)
+        buffers = {SensorReadInfo[cache.load_meta(p)['sensor']]: cache.decode(p) for p in cache.captures()}
+        return header, buffers
+
+
+def _to_int(data):
+    return int.from_bytes(data, byteorder='little')
+
+
+class ProbeSettingsCache:
+    """
+    Keeps a snapshot of the settings of each probe by serial number and
+    firmware revision. A snapshot is read with every setting requested in a
+    single batch instead of one round trip per setting. Changing a setting
+    only marks that setting stale, so it alone is read again when next
+    needed. The temperature of the last measurement is kept with the
+    settings since it only changes with a new measurement.
+
+    Usage:
+        cache = ProbeSettingsCache()
+        settings = cache.snapshot(probe)
+        cache.invalidate(probe, 'samplingrate')
+    """
+    # Setting name used by RAD_Probe.getSetting to its command, payload size and conversion
+    settings = {'samplingrate': (SettingsCMD.SAMPLING_RATE.cmd, 4, _to_int),
+                'zpfo': (SettingsCMD.ZPFO.cmd, 4, _to_int),
+                'ppmm': (SettingsCMD.PPMM.cmd, 1, _to_int),
+                'alg': (SettingsCMD.ALG.cmd, 1, _to_int),
+                'appp': (SettingsCMD.APPP.cmd, 1, _to_int),
+                'tcm': (SettingsCMD.TCM.cmd, 1, _to_int),
+                'usertemp': (SettingsCMD.USERTEMP.cmd, 4, _to_int),
+                'ir': (SettingsCMD.IR.cmd, 1, _to_int),
+                'accthreshold': (SettingsCMD.ACCTHRESH.cmd, 4, _to_int),
+                'acczpfo': (SettingsCMD.ACCZPFO.cmd, 4, _to_int),
+                'accrange': (SettingsCMD.ACCRANGE.cmd, 1, _to_int),
+                'temp': (MeasCMD.TEMP.cmd, 4, decode_temperature)}
+
+    def __init__(self, debug=False):
+        self._snapshots = {}
+        self.log = get_logger(__name__, debug=debug)
+
+    @staticmethod
+    def key(probe):
+        """Snapshots are kept by the serial number and firmware revision of a probe"""
+        return probe.serial_number, str(probe.api.full_fw_rev)
+
+    def refresh(self, probe, names=None):
+        """
+        Read settings from the probe in a single batch
+
+        Args:
+            probe: Connected RAD_Probe
+            names: List of setting names to read, defaults to all of them
+        """
+        names = list(self.settings) if names is None else names
+        requests = {self.settings[name][0]: self.settings[name][1] for name in names}
+        results = probe.api.batchRequest(requests)
+        snapshot = self._snapshots.setdefault(self.key(probe), {})
+
+        for name in names:
+            code, _, convert = self.settings[name]
+            ret = results[code]
+            if ret.status == 1 and ret.data is not None:
+                snapshot[name] = convert(ret.data)
+            else:
+                # Left out so it is requested again next time
+                self.log.warning(f"Unable to read setting {name}")
+
+    def snapshot(self, probe):
+        """
+        All the settings of a probe, reading the ones not known
+
+        Args:
+            probe: Connected RAD_Probe
+
+        Returns:
+            settings: Dictionary of setting name to value, None if it could not be read
+        """
+        snapshot = self._snapshots.get(self.key(probe), {})
+        missing = [name for name in self.settings if name not in snapshot]
+        if missing:
+            self.refresh(probe, missing)
+            snapshot = self._snapshots[self.key(probe)]
+
+        return {name: snapshot.get(name) for name in self.settings}
+
+    def get(self, probe, name):
+        """
+        A single setting of a probe, only read from the probe if not known
+
+        Args:
+            probe: Connected RAD_Probe
+            name: Setting name
+
+        Returns:
+            value: Integer value of the setting or None if it could not be read
+        """
+        snapshot = self._snapshots.get(self.key(probe), {})
+        if name not in snapshot:
+            self.refresh(probe, [name])
+            snapshot = self._snapshots[self.key(probe)]
+        return snapshot.get(name)
+
+    def invalidate(self, probe, name=None):
+        """
+        Mark settings of a probe stale
+
+        Args:
+            probe: RAD_Probe the settings belong to
+            name: Setting changed, None drops the whole snapshot
+        """
+        key = self.key(probe)
+        if name is None:
+            self._snapshots.pop(key, None)
+        elif key in self._snapshots:
+            self._snapshots[key].pop(name, None)
+
+
+class IdentityCache:
+    """
+    Remembers the identity of probes between sessions by the USB device
+    they are connected through. The serial number, hardware and firmware
+    revisions of a known probe are restored on connect once its serial
+    number and firmware revision are confirmed, so they are not requested
+    again in every new process. Settings such as the accelerometer range
+    can be changed from another host so they are always read from the
+    probe.
+
+    Usage:
+        cache = IdentityCache()
+        cache.save('205E3258', {'serial': '...', 'hw_id': 1})
+        identity = cache.get('205E3258')
+    """
+    default_path = '~/.radicl/identity.json'
+
+    def __init__(self, path=None, debug=False):
+        """
+        Args:
+            path: Path of the json file to keep identities in, defaults to ~/.radicl/identity.json
+        """
+        self.path = Path(path or self.default_path).expanduser()
+        self.log = get_logger(__name__, debug=debug)
+
+    def __read(self):
+        if not self.path.is_file():
+            return {}
+
+        try:
+            return json.loads(self.path.read_text())
+        except ValueError:
+            self.log.warning(f"Ignoring unreadable identity cache {self.path}")
+            return {}
+
+    def get(self, usb_id):
+        """
+        Args:
+            usb_id: USB serial number or VID:PID of the port
+
+        Returns:
+            identity: Dictionary of the probe attributes or None if unknown
+        """
+        if usb_id is None:
+            return None
+        return self.__read().get(usb_id)
+
+    def save(self, usb_id, identity):
+        """
+        Args:
+            usb_id: USB serial number or VID:PID of the port
+            identity: Dictionary of the probe attributes
+        """
+        if usb_id is None:
+            return
+
+        identities = self.__read()
+        identities[usb_id] = identity
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.path.write_text(json.dumps(identities, indent=2))
+
+    def forget(self, usb_id):
+        """Drop a probe that no longer matches its identity"""
+        identities = self.__read()
+        if identities.pop(usb_id, None) is not None:
+            self.path.write_text(json.dumps(identities, indent=2))
@@ -4,7 +4,6 @@ import argparse
 import os
 
 from radicl import __version__
-from radicl.interface import RADICL
 from radicl.ui_tools import Messages
 
 debug = False
@@ -44,6 +43,9 @@ def main():
             "\n\t* Modify probe settings.  (In development)" +
             "\n\t* Update the firmware (In development)\n")
 
+    # Only loaded once the arguments are parsed so --help and --version return right away
+    from radicl.interface import RADICL
+
     # try:
     cli = RADICL(debug=args.debug)
     cli.run()
@@ -1,8 +1,12 @@
 # coding: utf-8
 
+import queue
+import threading
+
 import serial
 from serial.tools import list_ports
 from .ui_tools import get_logger
+from .protocol import split_frames, MessageType
 
 
 def find_kw_port(kw):
@@ -61,6 +65,12 @@ class RAD_Serial:
         self.log = get_logger(__name__, debug=debug)
         self._available_ports = None
 
+        # Optional background reader and the messages it has received
+        self._reader = None
+        self._stop_reader = threading.Event()
+        self.response_queue = queue.Queue()
+        self.push_queue = queue.Queue()
+
     @property
     def available_ports(self):
         if self._available_ports is None:
@@ -69,6 +79,23 @@ class RAD_Serial:
 
         return self._available_ports
 
+    @property
+    def usb_id(self):
+        """
+        Identifies the USB device of the open port by its USB serial number
+        or VID:PID when it has none. None if the port is not open or not USB.
+        """
+        if self.serial_port is None:
+            return None
+
+        for p in list_ports.comports():
+            if p.device == self.serial_port.port:
+                if p.serial_number:
+                    return p.serial_number
+                elif p.vid is not None:
+                    return f"{p.vid:04X}:{p.pid:04X}"
+        return None
+
     @property
     def multiple_ports_available(self):
         return len(self.available_ports) > 1
@@ -115,6 +142,7 @@ class RAD_Serial:
             raise IOError("Could not open COM port")
 
     def closePort(self):
+        self.stopReader()
         if self.serial_port is not None:
             self.serial_port.close()
             self.serial_port = None
@@ -155,3 +183,92 @@ class RAD_Serial:
         if self.serial_port is not None:
             return self.serial_port.inWaiting()
         return 0
+
+    @property
+    def reader_active(self):
+        """True when a background thread is reading the port"""
+        return self._reader is not None and self._reader.is_alive()
+
+    def startReader(self):
+        """
+        Starts a thread that drains the port, splits the bytes into messages
+        and sends push messages (type 0x03) to the push_queue and everything
+        else to the response_queue. While it runs the port should only be read
+        through readFrame and readPushMessage.
+        """
+        if self.serial_port is None or self.reader_active:
+            return
+
+        self._stop_reader.clear()
+        self._reader = threading.Thread(target=self.__readLoop, name='RAD_Serial reader', daemon=True)
+        self._reader.start()
+        self.log.debug("Background reader started.")
+
+    def stopReader(self):
+        """
+        Stops the background reader thread if it is running
+        """
+        if self._reader is not None:
+            self._stop_reader.set()
+            self._reader.join()
+            self._reader = None
+            self.log.debug("Background reader stopped.")
+
+    def __readLoop(self):
+        rx = bytearray()
+        push = MessageType.PUSH.value
+
+        while not self._stop_reader.is_set():
+            try:
+                # Blocks on the port for up to its timeout
+                data = self.serial_port.read(max(1, self.serial_port.inWaiting()))
+
+            except Exception as e:
+                self.log.error("Background reader stopped: {}".format(e))
+                break
+
+            if data:
+                rx.extend(data)
+                for frame in split_frames(rx):
+                    if frame[2] == push:
+                        self.push_queue.put(frame)
+                    else:
+                        self.response_queue.put(frame)
+
+    @staticmethod
+    def __getFromQueue(q, timeout):
+        try:
+            return q.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def readFrame(self, timeout=None):
+        """
+        Waits for the next response message from the background reader
+
+        Args:
+            timeout: Seconds to wait, None waits forever
+
+        Returns:
+            frame: bytes of the message or None if the timeout was reached
+        """
+        return self.__getFromQueue(self.response_queue, timeout)
+
+    def readPushMessage(self, timeout=None):
+        """
+        Waits for the next push message from the background reader
+
+        Args:
+            timeout: Seconds to wait, None waits forever
+
+        Returns:
+            frame: bytes of the message or None if the timeout was reached
+        """
+        return self.__getFromQueue(self.push_queue, timeout)
+
+    def clearResponses(self):
+        """
+        Drops all response messages received by the background reader
+        """
+        while self.__getFromQueue(self.response_queue, 0) is not None:
+            pass
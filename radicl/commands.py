@@ -59,3 +59,20 @@ class FWUpdateCMD(CMDEnum):
     DOWNLOAD = 0xF3
     CRC = 0xF4
     CLOSE = 0xF5
+
+
+# Command codes are unique across the groups
+COMMANDS = {c.cmd: c for group in (AttributeCMD, MeasCMD, SettingsCMD, SystemCMD, FWUpdateCMD) for c in group}
+
+
+def find_command(code):
+    """
+    Look up the command of a code
+
+    Args:
+        code: Integer command code
+
+    Returns:
+        command: Command enum member or None if the code is unknown
+    """
+    return COMMANDS.get(code)
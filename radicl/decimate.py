@@ -0,0 +1,67 @@
+# coding: utf-8
+
+
+def minmax_indices(values, max_points=4000):
+    """
+    Indices of the samples to plot so a series keeps its shape at screen
+    resolution. The samples are split into max_points / 2 buckets and the
+    smallest and largest sample of each bucket are kept, so peaks stay
+    visible no matter how many samples fall on a pixel. The first and last
+    samples are always kept so the extent of the plot is unchanged.
+
+    Args:
+        values: Array of samples, or 2D array of a column per series sharing the indices
+        max_points: Points kept per series, about twice the pixels across the plot
+
+    Returns:
+        indices: Sorted integer array of the samples to keep
+    """
+    import numpy as np
+
+    values = np.asarray(values, dtype=float)
+    if values.ndim == 1:
+        values = values[:, np.newaxis]
+
+    n = len(values)
+    if n <= max_points:
+        return np.arange(n)
+
+    size = -(-n // max(1, max_points // 2))
+    n_buckets = -(-n // size)
+
+    # Pad the last bucket with NaNs, which are never picked over a real sample
+    buckets = np.full((n_buckets * size, values.shape[1]), np.nan)
+    buckets[:n] = values
+    buckets = buckets.reshape(n_buckets, size, values.shape[1])
+    nans = np.isnan(buckets)
+
+    lowest = np.where(nans, np.inf, buckets).argmin(axis=1)
+    highest = np.where(nans, -np.inf, buckets).argmax(axis=1)
+    offsets = np.arange(n_buckets)[:, np.newaxis] * size
+
+    indices = np.concatenate([(lowest + offsets).ravel(), (highest + offsets).ravel(), [0, n - 1]])
+    return np.unique(np.minimum(indices, n - 1))
+
+
+def decimate(data, max_points=4000, columns=None):
+    """
+    Reduce a pandas Series or DataFrame to about screen resolution before
+    plotting it, keeping the peaks of each column, see minmax_indices
+
+    Args:
+        data: pandas Series or DataFrame ordered along the plot
+        max_points: Points kept per column, about twice the pixels across the plot
+        columns: DataFrame columns to keep the peaks of, defaults to all the numeric ones
+
+    Returns:
+        data: The rows kept, of the same type
+    """
+    if len(data) <= max_points:
+        return data
+
+    if hasattr(data, 'columns'):
+        values = data[columns or data.select_dtypes('number').columns]
+    else:
+        values = data
+
+    return data.iloc[minmax_indices(values.to_numpy(dtype=float), max_points)]
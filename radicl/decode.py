@@ -0,0 +1,119 @@
+# coding: utf-8
+
+import numpy as np
+
+from .info import SensorReadInfo, AccelerometerRange
+
+
+def get_sensor_dtype(sensor: SensorReadInfo):
+    """
+    Builds a structured numpy dtype describing a single sample of a probe
+    buffer. Each field is named after the sensors data names so a downloaded
+    buffer can be viewed in place without copying it.
+
+    Args:
+        sensor: Sensor storage info
+
+    Returns:
+        dtype: numpy structured dtype with an itemsize of bytes_per_sample
+    """
+    fields = []
+
+    for name in sensor.data_names:
+        # Certain datasets are packed with a struct format
+        if sensor.unpack_type is not None:
+            fmt = np.dtype(sensor.unpack_type).newbyteorder('<')
+
+        # Two byte values are little endian unsigned integers
+        elif sensor.nbytes_per_value == 2:
+            fmt = np.dtype('<u2')
+
+        # Otherwise keep the bytes and assemble them during the decode
+        else:
+            fmt = np.dtype((np.uint8, sensor.nbytes_per_value))
+
+        fields.append((name, fmt))
+
+    return np.dtype(fields)
+
+
+def decode_buffer(data, sensor: SensorReadInfo, accelerometer_range=None):
+    """
+    Vectorized conversion of the bytes downloaded from a probe buffer into
+    arrays of values. Incomplete trailing samples are ignored.
+
+    Args:
+        data: Bytes like object (bytes, bytearray, memoryview, uint8 array)
+              or a list of integer bytes
+        sensor: Sensor storage info
+        accelerometer_range: Sensing range of the accelerometer in g's. Only
+                             used to scale the accelerometer data
+
+    Returns:
+        final: Dictionary of numpy arrays keyed by the sensor data names
+    """
+    if isinstance(data, list):
+        data = bytes(data)
+
+    dtype = get_sensor_dtype(sensor)
+    buffer = np.frombuffer(data, dtype=np.uint8)
+    samples = buffer.size // dtype.itemsize
+    raw = buffer[:samples * dtype.itemsize].view(dtype)
+
+    scaling = None
+    if sensor == SensorReadInfo.ACCELEROMETER:
+        scaling = AccelerometerRange.from_range(accelerometer_range).value_scaling
+
+    final = {}
+
+    for name in sensor.data_names:
+        values = raw[name]
+
+        # Multibyte values made from the low byte + the high byte
+        if values.ndim == 2:
+            values = values[:, 0].astype(np.int64) + \
+                     values[:, 1].astype(np.int64) * sensor.bytes_per_segment
+
+        # Promote to 64 bit to avoid overflows in later math
+        elif values.dtype.kind in 'iu':
+            values = values.astype(np.int64)
+
+        else:
+            values = values.astype(np.float64)
+
+        # Perform conversion of units
+        if sensor.conversion_factor is not None:
+            values = values * sensor.conversion_factor
+
+        if scaling is not None:
+            values = values * scaling
+
+        final[name] = values
+
+    return final
+
+
+def get_sample_times(n_samples, sensor: SensorReadInfo, sampling_rate):
+    """
+    Form the time in seconds of each sample. Peripheral sensors are scaled
+    according to the ratio of the max sample rate as is done in the FW
+
+    Args:
+        n_samples: Number of samples decoded
+        sensor: Sensor storage info
+        sampling_rate: Sampling rate setting of the probe
+
+    Returns:
+        seconds: numpy array of the time of each sample
+    """
+    sr = get_sample_rate(sensor, sampling_rate)
+    return np.linspace(0, n_samples / sr, n_samples)
+
+
+def get_sample_rate(sensor: SensorReadInfo, sampling_rate):
+    """
+    Sample rate in Hz of a sensor given the probes sampling rate setting.
+    Peripheral sensors are decimated by the ratio of their max sample rate.
+    """
+    ratio = sampling_rate / SensorReadInfo.RAWSENSOR.max_sample_rate
+    return int(sensor.max_sample_rate * ratio)
@@ -1,8 +1,16 @@
 from study_lyte.adjustments import merge_on_to_time
+from concurrent.futures import ThreadPoolExecutor
+from .cache import RawArchive
+from .info import SensorReadInfo
 import logging
 
 LOG = logging.getLogger(__name__)
 
+# Buffers making up a high resolution profile
+HIGH_RESOLUTION_SENSORS = [SensorReadInfo.RAWSENSOR, SensorReadInfo.FILTERED_BAROMETER_DEPTH,
+                           SensorReadInfo.ACCELEROMETER]
+
+
 def build_high_resolution_data(raw_sensor, baro_depth, acceleration, log):
     """
     Grabs the bottom sensors (sampled at the highest rate) then grabs the supporting sensors
@@ -28,3 +36,67 @@ def build_high_resolution_data(raw_sensor, baro_depth, acceleration, log):
     log.info("Infilling and interpolating dataset...")
     result = merge_on_to_time([raw_sensor, baro_depth, acceleration], raw_sensor.index)
     return result
+
+
+def download_high_resolution_data(probe, log, retries=3):
+    """
+    Downloads the sensors needed for a high resolution profile. Each buffer
+    is decoded on a worker thread while the next one is transferred from the
+    probe so only the final merge waits on the downloads.
+
+    Args:
+        probe: Connected RAD_Probe
+        log: Instantiated logger object
+        retries: Number of attempts to download each buffer
+
+    Returns:
+        result: Single data frame containing Force, NIR, Ambient NIR, Accel, Depth
+                or None if any download failed
+    """
+    sensors = HIGH_RESOLUTION_SENSORS
+
+    # Settings used by the decode are read now, so only this thread talks to the probe
+    sampling_rate = probe.sampling_rate
+    accelerometer_range = probe.accelerometer_range
+    log.debug("Decoding at %s Hz with a %s g accelerometer range", sampling_rate, accelerometer_range)
+
+    with ThreadPoolExecutor(max_workers=1, thread_name_prefix='decode') as executor:
+        decoded = []
+
+        for sensor in sensors:
+            log.info('Downloading {} data from probe...'.format(sensor.readable_name))
+            data = None
+            attempts = 0
+
+            while data is None and attempts < retries:
+                data = probe.download_sensor(sensor)
+                attempts += 1
+
+            if data is None:
+                log.error("Unable to retrieve {} data after {} attempts".format(sensor.readable_name, attempts))
+                for future in decoded:
+                    future.cancel()
+                return None
+
+            decoded.append(executor.submit(probe.unpack_sensor, data, sensor))
+
+        raw_sensor, baro_depth, acceleration = [future.result() for future in decoded]
+
+    return build_high_resolution_data(raw_sensor, baro_depth, acceleration, log)
+
+
+def decode_archive(path, log):
+    """
+    Build the high resolution profile of a measurement in a raw archive as
+    if it had just been downloaded
+
+    Args:
+        path: Measurement folder written by RAD_Probe.archive_sensors
+        log: Instantiated logger object
+
+    Returns:
+        tuple: Single data frame containing Force, NIR, Ambient NIR, Accel, Depth and the header dictionary
+    """
+    header, buffers = RawArchive.load(path)
+    raw_sensor, baro_depth, acceleration = [buffers[sensor] for sensor in HIGH_RESOLUTION_SENSORS]
+    return build_high_resolution_data(raw_sensor, baro_depth, acceleration, log), header
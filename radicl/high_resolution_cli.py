@@ -12,16 +12,14 @@ Usage:  1. plug in the probe.
 """
 
 from radicl import __version__
-from radicl.interface import RADICL
-from radicl.ui_tools import get_logger, exit_requested
-from radicl.plotting import plot_hi_res
-from radicl.high_resolution import build_high_resolution_data
-from radicl.gps import USBGPS
+from radicl.ui_tools import get_logger, exit_requested, retry_requested
+from radicl.writers import WRITERS
 import argparse
 from argparse import RawTextHelpFormatter
 import json
 import sys
 import logging
+from pathlib import Path
 
 
 LOG = logging.getLogger(__name__)
@@ -61,10 +59,37 @@ def main():
     p.add_argument('--version', action='version',
                    version='%(prog)s v{version}'.format(version=__version__))
     p.add_argument('--plot_time', default=10, type=int, help='Automatically close a plot after number of seconds')
+    p.add_argument('--plot_output', default='window', choices=['window', 'png', 'svg', 'none'],
+                   help='Show each plot in a window or render it to an image next to the data in the background, '
+                        'so the next measurement can start right away. Without a display images are rendered')
 
     p.add_argument('--n_measurements', default=0, type=int, help='Number of measurements to take without asking to exit')
+    p.add_argument('--download_attempts', default=3, type=int,
+                   help='Number of attempts to download a measurement before asking whether to keep trying, '
+                        'or discarding it when --n_measurements is set. '
+                        'The measurement stays on the probe and each attempt resumes the last one')
+    p.add_argument('--pipeline_window', default=1, type=int,
+                   help='Number of data segment requests to keep in flight while downloading')
+    p.add_argument('--background_reader', action='store_true',
+                   help='Read the probe from a background thread so state changes are picked up when pushed')
+    p.add_argument('--capture_dir', default=None,
+                   help='Keep a raw copy of every download in this folder to recover data from')
+    p.add_argument('--identity_file', default=None,
+                   help='Remember probes in this json file so reconnecting to a known probe takes a single request')
+    p.add_argument('--output_format', default='csv', choices=list(WRITERS),
+                   help='File format to save measurements in, npz is much faster to write and read back')
+    p.add_argument('--raw_archive', '--raw-archive', dest='raw_archive', default=None,
+                   help='Only write the bytes downloaded to a measurement folder in this archive, without decoding '
+                        'or plotting them. Use radicl-decode to build the profiles later')
     args = p.parse_args()
 
+    # Only loaded once the arguments are parsed so --help and --version return right away
+    from radicl.interface import RADICL
+    from radicl.plotting import BackgroundRenderer, has_display, plot_hi_res
+    from radicl.high_resolution import download_high_resolution_data, HIGH_RESOLUTION_SENSORS
+    from radicl.cache import RawArchive
+    from radicl.gps import USBGPS
+
     if args.calibration is not None:
         with open(args.calibration, 'r') as fp:
             calibration = json.load(fp)
@@ -74,19 +99,37 @@ def main():
     # Start this scripts logging
     log = get_logger("RAD Hi-Res Script", debug=args.debug)
 
+    plot_output = args.plot_output
+    if plot_output == 'window' and not has_display():
+        log.warning("No display available, plots are saved as png instead")
+        plot_output = 'png'
+
+    renderer = None
+    if plot_output in ['png', 'svg'] and args.raw_archive is None:
+        renderer = BackgroundRenderer(log=log)
+
     log.info("Starting High Resolution DAQ Script")
 
     # Retrieve a connection to the probe
-    cli = RADICL()
+    cli = RADICL(pipeline_window=args.pipeline_window, background_reader=args.background_reader,
+                 capture_dir=args.capture_dir, identity_file=args.identity_file, output_format=args.output_format)
 
     # Look for a gps
     gps = USBGPS()
 
+    archive = None
+    if args.raw_archive is not None:
+        archive = RawArchive(args.raw_archive, debug=args.debug)
+
     # Keep count of measurements taken
     i = 0
 
-    # Reset the probe in the event the probe was closed out without reset
-    response = cli.probe.resetMeasurement()
+    # Reset the probe in the event the probe was closed out without reset, unless
+    # a download was interrupted, then the staged measurement is downloaded first
+    if cli.probe.has_checkpoints():
+        log.info("Resuming the download of the measurement on the probe")
+    else:
+        cli.probe.resetMeasurement()
 
     # Grab the probe sample rate
     finished = exit_requested()
@@ -97,13 +140,7 @@ def main():
         # take a measurement
         cli.listen_for_a_reading()
 
-        # Collect and build the data
-        raw_sensor = cli.grab_data(data_request='rawsensor')
-        baro_depth = cli.grab_data(data_request='filtereddepth')
-        acceleration = cli.grab_data(data_request='rawacceleration')
-
-        ts = build_high_resolution_data(raw_sensor, baro_depth, acceleration, log)
-        meta = cli.probe.getProbeHeader()
+        meta = {}
 
         # Attempt to get a fix, if no gps cnx then no location data is returned
         location = gps.get_fix()
@@ -115,11 +152,47 @@ def main():
             log.warning("Unable to get GPS fix")
             meta['Latitude'] = 'N/A'
             meta['Longitude'] = 'N/A'
-        # Output the data to a datetime file
-        filename = cli.write_probe_data(ts, extra_meta=meta)
 
-        # Plot the data
-        plot_hi_res(fname=filename, calibration_dict=calibration, timed_plot=args.plot_time)
+        # The measurement stays staged on the probe until it is downloaded, so
+        # each attempt only requests the segments still missing
+        attempts = 0
+        while True:
+            attempts += 1
+            if archive is not None:
+                # Only write what the probe sent, decoding is left to radicl-decode
+                result = cli.probe.archive_sensors(archive, HIGH_RESOLUTION_SENSORS, extra_meta=meta)
+            else:
+                # Collect and build the data, decoding each buffer while the next downloads
+                result = download_high_resolution_data(cli.probe, log)
+
+            if result is not None:
+                break
+
+            log.error(f"Unable to download the measurement after {attempts} attempt(s)")
+            if attempts % max(args.download_attempts, 1) == 0:
+                # Unattended runs discard the measurement instead of waiting on an answer
+                if args.n_measurements > 0 or not retry_requested():
+                    break
+
+        if result is None:
+            log.error("Measurement discarded, resetting the probe")
+            cli.probe.resetMeasurement()
+            continue
+
+        if archive is not None:
+            log.info(f"Archived measurement to {result}")
+
+        else:
+            ts = result
+
+            # Output the data to a datetime file
+            filename = cli.write_probe_data(ts, extra_meta=meta)
+
+            # Plot the data
+            if renderer is not None:
+                renderer.submit(filename, Path(filename).with_suffix(f'.{plot_output}'))
+            elif plot_output == 'window':
+                plot_hi_res(fname=filename, calibration_dict=calibration, timed_plot=args.plot_time)
 
         # Reset the probe / clear out the data
         cli.probe.resetMeasurement()
@@ -130,9 +203,63 @@ def main():
             finished = exit_requested()
 
     log.info(f"{i} measurements taken this session")
+    if renderer is not None:
+        renderer.close()
     log.info("Exiting High Resolution DAQ Script")
     sys.exit()
 
 
+def decode_cli():
+    """
+    Build the profiles of measurements archived with lyte_hi_res --raw_archive
+    """
+    p = argparse.ArgumentParser(description='Decode the measurements of a raw archive written by lyte_hi_res '
+                                            'into high resolution profiles')
+    p.add_argument('paths', nargs='+', help='Measurement folders or archives holding them')
+    p.add_argument('--output_format', default='csv', choices=list(WRITERS),
+                   help='File format to write the profiles in')
+    p.add_argument('--output_dir', default=None,
+                   help='Folder to write the profiles to, defaults to the folder holding each measurement')
+    p.add_argument('-d', '--debug', dest='debug', action='store_true',
+                   help="Debug flag will print out much more info")
+    p.add_argument('--version', action='version',
+                   version='%(prog)s v{version}'.format(version=__version__))
+    args = p.parse_args()
+
+    from radicl.cache import RawArchive
+    from radicl.high_resolution import decode_archive
+    from radicl.writers import write_profile
+
+    log = get_logger("RAD Decode", debug=args.debug)
+
+    measurements = []
+    for path in args.paths:
+        if RawArchive.is_measurement(path):
+            measurements.append(Path(path))
+        else:
+            measurements += RawArchive(path).measurements()
+
+    if not measurements:
+        log.error("No archived measurements found")
+        sys.exit(1)
+
+    if args.output_dir is not None:
+        Path(args.output_dir).mkdir(parents=True, exist_ok=True)
+
+    failed = 0
+    for i, path in enumerate(measurements):
+        output = Path(args.output_dir or path.parent).joinpath(path.name)
+        try:
+            df, header = decode_archive(path, log)
+            filename = write_profile(df, header, output, fmt=args.output_format)
+            log.info(f"({i + 1}/{len(measurements)}) Decoded {path} to {filename}")
+        except Exception as e:
+            log.error(f"Unable to decode {path}: {e}")
+            failed += 1
+
+    log.info(f"Decoded {len(measurements) - failed}/{len(measurements)} measurements")
+    sys.exit(1 if failed else 0)
+
+
 if __name__ == '__main__':
     main()
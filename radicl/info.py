@@ -1,5 +1,7 @@
 from enum import Enum
 
+from .commands import find_command
+
 
 class ProbeState(Enum):
     """ States for the probe running during a measurement"""
@@ -84,12 +86,7 @@ class ProbeErrors(Enum):
 
     @classmethod
     def from_code(cls, code):
-        final = cls.UNKNOWN_ERROR
-        for e in cls:
-            if e.error_code == code:
-                final = e
-                break
-        return final
+        return _PROBE_ERRORS.get(code, cls.UNKNOWN_ERROR)
 
 
     @classmethod
@@ -100,6 +97,53 @@ class ProbeErrors(Enum):
         return final
 
 
+_PROBE_ERRORS = {e.error_code: e for e in ProbeErrors}
+
+
+class ProbeError(IOError):
+    """
+    A request the probe rejected or did not answer. Carries the command
+    requested and the error code so failures can be reported and handled
+    without inspecting the call stack.
+
+    Usage:
+        error = ProbeError(MeasCMD.STATE.cmd, 2054, caller='getProbeMeasState')
+        if error.error == ProbeErrors.FAILED_DATA_READ:
+            ...
+    """
+
+    def __init__(self, cmd=None, error_code=None, caller=None):
+        """
+        Args:
+            cmd: Integer command code of the request
+            error_code: Error code returned by the probe, None for a com error
+            caller: Name of the function making the request
+        """
+        self.cmd = cmd
+        self.command = find_command(cmd)
+        self.error_code = error_code
+        self.error = None if error_code is None else ProbeErrors.from_code(error_code)
+        self.caller = caller
+        super().__init__(str(self))
+
+    @property
+    def com_error(self):
+        """True when the probe did not answer"""
+        return self.error_code is None
+
+    def __str__(self):
+        if self.command is not None:
+            command = f"{type(self.command).__name__}.{self.command.name}"
+        else:
+            command = 'unknown command' if self.cmd is None else f"command {self.cmd:#04x}"
+
+        if self.error_code is None:
+            reason = 'COM'
+        else:
+            reason = f"{self.error_code} ({self.error.name})"
+        return f"{self.caller or 'Probe'} error: {reason} requesting {command}"
+
+
 class AccelerometerRange(Enum):
     # From Data sheet for accelerometer in REV C
     RANGE_2G = 2, 0.06
@@ -4,13 +4,14 @@ import inspect
 import sys
 import time
 from os.path import abspath, dirname, expanduser, isdir
+from pathlib import Path
 
-import pandas as pd
 from termcolor import colored
-from study_lyte.io import write_csv
 
 from .utilities import get_default_filename
+from .writers import get_writer
 from .probe import RAD_Probe
+from .cache import CaptureCache, IdentityCache
 from .calibrate import get_avg_sensor
 from .ui_tools import (Messages, get_logger, parse_func_list, parse_help,
                        print_helpme)
@@ -31,6 +32,8 @@ def dataframe_this(data, name=None):
     Returns:
         df: pd.Dataframe of the provided data
     """
+    import pandas as pd
+
     t = type(data)
     if t == dict:
         df = pd.DataFrame.from_dict(data)
@@ -54,7 +57,8 @@ class RADICL(object):
     Attributes:
         probe: radicl
     """
-    defaults = {'debug': False}
+    defaults = {'debug': False, 'pipeline_window': 1, 'background_reader': False, 'capture_dir': None,
+                'identity_file': None, 'output_format': 'csv'}
 
     def __init__(self, **kwargs):
 
@@ -67,13 +71,24 @@ class RADICL(object):
                 kwargs[k] = v
 
         self.log = get_logger(__name__, debug=kwargs['debug'])
+        self.output_format = kwargs['output_format']
 
         self.tasks = ['daq', 'settings', 'update']
         self.task_help = {'daq': "Data acquisition using the probe.",
                           'settings': 'Interface for modifying the behavior of the probe',
                           'update': 'Firmware update dialog for the probe.'}
 
-        self.probe = RAD_Probe(debug=kwargs['debug'])
+        capture_cache = None
+        if kwargs['capture_dir'] is not None:
+            capture_cache = CaptureCache(kwargs['capture_dir'], debug=kwargs['debug'])
+
+        identity_cache = None
+        if kwargs['identity_file'] is not None:
+            identity_cache = IdentityCache(kwargs['identity_file'], debug=kwargs['debug'])
+
+        self.probe = RAD_Probe(debug=kwargs['debug'], pipeline_window=kwargs['pipeline_window'],
+                               background_reader=kwargs['background_reader'], capture_cache=capture_cache,
+                               identity_cache=identity_cache)
         self.probe.connect()
 
         self.running = True
@@ -221,11 +236,11 @@ class RADICL(object):
         """
 
         out.msg(">> Press the probe button to start the measurement:")
-        self.probe.wait_for_state(ProbeState.MEASURING, retry=1000, delay=0.3)
+        self.probe.wait_for_state(ProbeState.MEASURING, retry=3000, delay=0.1)
         out.respond("Measurement Started...")
 
         out.msg(">> Press the probe button to end the measurement:")
-        self.probe.wait_for_state(ProbeState.DATA_STAGED, retry=1000, delay=0.3)
+        self.probe.wait_for_state(ProbeState.DATA_STAGED, retry=3000, delay=0.1)
         out.respond("Measurement ended...")
 
     def grab_data(self, data_request, retries=3):
@@ -356,7 +371,9 @@ class RADICL(object):
                             self.state = CLIState.DAQ_FINISHED
 
             if self.output_preference in ['plot', 'both']:
-                self.data.plot()
+                import matplotlib.pyplot as plt
+                from .decimate import decimate
+                decimate(self.data).plot()
                 plt.show()
                 self.state = CLIState.DAQ_FINISHED
 
@@ -478,20 +495,28 @@ class RADICL(object):
 
         msg = "\n===== Current Probe Settings =====\n"
 
+        # All read in one batch
+        settings = self.probe.getAllSettings()
+
         for s, fn in self.probe.getters.items():
             if s.lower() not in ['calibdata', 'numsegments']:
-                value = self.probe.getSetting(setting_name=s)
+                value = settings[s] if s in settings else self.probe.getSetting(setting_name=s)
                 msg += "{} = {}\n".format(s, value)
         out.msg(msg)
         time.sleep(2)
 
-    def write_probe_data(self, df, filename='', extra_meta={}):
+    def write_probe_data(self, df, filename='', extra_meta={}, fmt=None):
         """
-        Writes out a dataframe with a probe header to csv
+        Writes out a dataframe with a probe header to csv or another output
+        format from radicl.writers
         Args:
             df: pandas dataframe containing data
             filename: valid path to output to, if empty uses datetime
             extra_meta: Dictionary of extra notes to add to the file header
+            fmt: Name of the output format, defaults to the output_format given to RADICL
+
+        Returns:
+            filename: Path written, with the extension of the output format
         """
 
         # Receive a default request
@@ -501,13 +526,15 @@ class RADICL(object):
         else:
             filename = expanduser(filename)
 
+        writer = get_writer(fmt or self.output_format)
+        filename = str(Path(filename).with_suffix(writer.extension))
         out.msg("Saving Data to :\n{0}".format(filename))
 
         if not df.empty:
             # Write the header so we know things about this
             meta = self.probe.getProbeHeader()
             meta.update(extra_meta)
-            write_csv(df, meta, filename)
+            writer.write(df, meta, filename)
         return filename
 
     def ask_user(self, question_str, answer_lst=None, helpme=None,
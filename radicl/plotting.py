@@ -6,41 +6,54 @@ import sys
 import platform
 import time
 import traceback
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
 
-import numpy as np
-from matplotlib import pyplot as plt
-import matplotlib
-import traceback
+from radicl.decimate import decimate, minmax_indices
 from radicl.ui_tools import get_logger, get_index_from_ratio
-from study_lyte.profile import LyteProfileV6, Sensor
-from study_lyte.styles import SensorStyle, EventStyle
-from study_lyte.plotting import plot_events
+from radicl.writers import read_lyte_profile
+
+
+# Matplotlib and study_lyte are slow to import, so they are loaded in the
+# functions using them to keep the command line help fast
+def _matplotlib():
+    import matplotlib
+    matplotlib.rcParams['agg.path.chunksize'] = 100000
+    return matplotlib
 
 
-matplotlib.rcParams['agg.path.chunksize'] = 100000
+def _pyplot():
+    _matplotlib()
+    from matplotlib import pyplot as plt
+    return plt
+
 
 
 def plot_nir_depth_correct(ax, profile):
+    from study_lyte.styles import SensorStyle
     ax.grid(True, axis='y', alpha=0.5)
+    nir = decimate(profile.nir, columns=['Sensor2', 'Sensor3', 'nir'])
 
     for sensor in ['Sensor2', 'Sensor3']:
         style = SensorStyle.from_column(sensor)
-        ax.plot(profile.nir[sensor],
-                profile.nir.depth,
+        ax.plot(nir[sensor],
+                nir.depth,
                 alpha=0.3, color=style.color, label=style.label)
 
     style = SensorStyle.ACTIVE_NIR
-    ax.plot(profile.nir['nir'], profile.nir['depth'], color=style.color, label=style.label)
+    ax.plot(nir['nir'], nir['depth'], color=style.color, label=style.label)
     ax.set_title("NIR Depth Corrected")
     ax.legend(loc='lower left', fontsize='small')
     return ax
 
 
 def plot_force_depth_corrected(ax, profile, ):
+    from study_lyte.styles import SensorStyle
     # plot the depth corrected Force
     force_style = SensorStyle.RAW_FORCE
     ax.grid(True, axis='y', which='both', alpha=0.5)
-    ax.plot(profile.force['force'], profile.force['depth'], color=force_style.color, label=force_style.label)
+    force = decimate(profile.force, columns=['force'])
+    ax.plot(force['force'], force['depth'], color=force_style.color, label=force_style.label)
     ax.set_title("Force Depth Corrected")
     ax.legend(loc='lower left', fontsize='small')
     ax.set_ylabel('Depth [cm]')
@@ -48,46 +61,41 @@ def plot_force_depth_corrected(ax, profile, ):
     return ax
 
 def report_profile_error(ax):
+    import numpy as np
     ylims = ax.get_ylim()
     xlims = ax.get_xlim()
     ax.annotate('Failed to compute \ncorrected profile.', (np.mean(xlims)*0.25, np.mean(ylims)))
     return ax
 
 
-def plot_hi_res(fname=None, timed_plot=None, calibration_dict={}):
+def draw_hi_res(fig, profile, log=None):
     """
-    Plots the timeseries, the depth corrected, accelerometer and depth data.
-    Plot from a dataframe or from a file. Use auto close to auto close the figure
-    after a some amount of time.
+    Draws the timeseries, the depth corrected, accelerometer and depth panels
+    of a profile on a figure
 
     Args:
-        fname: Path to csv containing hi resolution data
-        timed_plot: Amount of time to show the plot, if none user has to close it
-        calibration_dict: Dictionary to offer calibration coefficients for any of the sensors
-
+        fig: matplotlib Figure to draw on
+        profile: study_lyte LyteProfileV6 of the hi resolution data
+        log: Logger to report failed panels to
     """
-    log = get_logger('Hi Res Plot')
-    if 'Linux' in platform.platform():
-        matplotlib.use('TkAgg')
+    from study_lyte.profile import Sensor
+    from study_lyte.styles import SensorStyle
+    from study_lyte.plotting import plot_events
 
-    # Setup a panel of plots
-    fig = plt.figure(figsize=(10, 6), constrained_layout=True)
+    log = log or get_logger('Hi Res Plot')
     gs = fig.add_gridspec(2, 5)
 
-    print('')
-    if fname is not None:
-        profile = LyteProfileV6(fname)
-        log.info(f"Filename: {profile.filename}")
-        plt.suptitle(os.path.basename(profile.filename))
-
-    # print out some handy numbers
-    log.info(profile.report_card())
+    # Only about a point per pixel is drawn, keeping the peaks of every sensor
+    sensors = ['Sensor1', 'Sensor2', 'Sensor3']
+    if profile.acceleration is not Sensor.UNAVAILABLE:
+        sensors += profile.acceleration_names
+    decimated = decimate(profile.raw, columns=sensors)
 
     # Plot time series data force data
     ax = fig.add_subplot(gs[:, 0])
     plot_events(ax, profile.events, plot_type='vertical')
     force_style = SensorStyle.from_column('Sensor1')
-    ax.plot(profile.raw['Sensor1'], profile.time, color=force_style.color)
+    ax.plot(decimated['Sensor1'], decimated['time'], color=force_style.color)
     ax.set_title("Raw Force Timeseries")
     ax.legend(loc='lower left')
     ax.set_ylabel('Time [s]')
@@ -99,7 +107,7 @@ def plot_hi_res(fname=None, timed_plot=None, calibration_dict={}):
     plot_events(ax, profile.events, plot_type='vertical')
     for sensor in ['Sensor2', 'Sensor3']:
         style = SensorStyle.from_column(sensor)
-        ax.plot(profile.raw[sensor], profile.time, color=style.color, label=style.label)
+        ax.plot(decimated[sensor], decimated['time'], color=style.color, label=style.label)
     ax.set_title("NIR Timeseries")
     ax.legend(loc='lower left')
     ax.invert_yaxis()
@@ -131,7 +139,7 @@ def plot_hi_res(fname=None, timed_plot=None, calibration_dict={}):
             if c != profile.motion_detect_name:
                 alpha = 0.3
             style = SensorStyle.from_column(c)
-            ax.plot(profile.time, profile.raw[c], color=style.color,
+            ax.plot(decimated['time'], decimated[c], color=style.color,
                     label=style.label, alpha=alpha)
 
         ax.set_ylabel("Acceleration [g's]")
@@ -155,9 +163,10 @@ def plot_hi_res(fname=None, timed_plot=None, calibration_dict={}):
         style = SensorStyle.FUSED
         ax.plot(profile.barometer.raw.index, profile.barometer.raw.values, color=raw.color, label=raw.label, alpha=0.5)
         ax.plot(profile.barometer.depth.index, profile.barometer.depth.values, color=baro_style.color, label=baro_style.label, alpha=0.5)
-        ax.plot(profile.accelerometer.depth, color=acc_style.color, label=acc_style.label, alpha=0.5)
+        ax.plot(decimate(profile.accelerometer.depth), color=acc_style.color, label=acc_style.label, alpha=0.5)
 
-    ax.plot(profile.time, profile.depth, color=style.color, label=style.label)
+    idx = minmax_indices(profile.depth.values)
+    ax.plot(profile.time.values[idx], profile.depth.values[idx], color=style.color, label=style.label)
 
     ax.legend(loc='upper right', fontsize='xx-small')
     # limits for depth
@@ -174,6 +183,146 @@ def plot_hi_res(fname=None, timed_plot=None, calibration_dict={}):
     # ax.set_xlim(ts1, ts2)
     # ax.set_ylim(*sorted([depth1, depth2]))
     ax.grid(True, axis='y', which='both', alpha=0.5)
+    return fig
+
+
+def save_hi_res(fname, output):
+    """
+    Renders the plot_hi_res figure of a profile to an image file with the
+    Agg backend, so no display is needed
+
+    Args:
+        fname: Path to the hi resolution data in any of the radicl.writers formats
+        output: Path to the image, the format follows its extension (png, svg, pdf)
+
+    Returns:
+        output: Path to the image
+    """
+    return render_hi_res(read_lyte_profile(fname), output)
+
+
+def render_hi_res(profile, output, log=None):
+    """
+    Renders the plot_hi_res figure of an already loaded profile to an image
+    file with the Agg backend
+
+    Args:
+        profile: study_lyte LyteProfileV6 of the hi resolution data
+        output: Path to the image, the format follows its extension (png, svg, pdf)
+        log: Logger to report failed panels to
+
+    Returns:
+        output: Path to the image
+    """
+    from matplotlib.figure import Figure
+
+    _matplotlib()
+    fig = Figure(figsize=(10, 6), constrained_layout=True)
+    fig.suptitle(os.path.basename(profile.filename))
+    draw_hi_res(fig, profile, log)
+    fig.savefig(output)
+    return output
+
+
+def has_display():
+    """
+    Whether a plot window can be opened, Linux needs an X or Wayland display
+    """
+    if 'Linux' not in platform.platform():
+        return True
+    return bool(os.environ.get('DISPLAY') or os.environ.get('WAYLAND_DISPLAY'))
+
+
+class BackgroundRenderer:
+    """
+    Renders plot_hi_res figures to image files in a separate process so the
+    caller moves on as soon as a profile is submitted. Figures are drawn with
+    the Agg backend so no display is needed. The process is spawned rather
+    than forked so it does not inherit the threads talking to the probe.
+
+    Usage:
+        with BackgroundRenderer() as renderer:
+            renderer.submit('profile.csv', 'profile.png')
+    """
+
+    def __init__(self, log=None):
+        self.log = log or get_logger('Hi Res Plot')
+        self._executor = ProcessPoolExecutor(max_workers=1, mp_context=get_context('spawn'))
+        self.pending = set()
+
+    def submit(self, fname, output):
+        """
+        Queue a profile to render, see save_hi_res
+
+        Returns:
+            future: concurrent.futures.Future resolved with the image path
+        """
+        future = self._executor.submit(save_hi_res, str(fname), str(output))
+        self.pending.add(future)
+        future.add_done_callback(self.__done)
+        return future
+
+    def __done(self, future):
+        self.pending.discard(future)
+        if future.cancelled():
+            return
+        if future.exception() is not None:
+            self.log.error(f"Unable to render plot: {future.exception()}")
+        else:
+            self.log.info(f"Plot saved to {future.result()}")
+
+    def close(self, wait=True):
+        """
+        Stop the rendering process
+
+        Args:
+            wait: Finish the plots queued first, otherwise they are dropped
+        """
+        if wait and self.pending:
+            self.log.info(f"Waiting on {len(self.pending)} plots to render...")
+        elif not wait:
+            for future in list(self.pending):
+                future.cancel()
+        self._executor.shutdown(wait=wait)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+def plot_hi_res(fname=None, timed_plot=None, calibration_dict={}):
+    """
+    Plots the timeseries, the depth corrected, accelerometer and depth data.
+    Plot from a dataframe or from a file. Use auto close to auto close the figure
+    after a some amount of time.
+
+    Args:
+        fname: Path to the hi resolution data in any of the radicl.writers formats
+        timed_plot: Amount of time to show the plot, if none user has to close it
+        calibration_dict: Dictionary to offer calibration coefficients for any of the sensors
+
+    """
+    matplotlib = _matplotlib()
+    plt = _pyplot()
+    log = get_logger('Hi Res Plot')
+    if 'Linux' in platform.platform():
+        matplotlib.use('TkAgg')
+
+    # Setup a panel of plots
+    fig = plt.figure(figsize=(10, 6), constrained_layout=True)
+
+    print('')
+    if fname is not None:
+        profile = read_lyte_profile(fname)
+        log.info(f"Filename: {profile.filename}")
+        plt.suptitle(os.path.basename(profile.filename))
+
+    # print out some handy numbers
+    log.info(profile.report_card())
+
+    draw_hi_res(fig, profile, log)
 
     # Make the figure full screen
     manager = plt.get_current_fig_manager()
@@ -195,6 +344,7 @@ def plot_hi_res(fname=None, timed_plot=None, calibration_dict={}):
 
 def plot_hi_res_cli():
     files = sys.argv[1:]
+    plt = _pyplot()
 
     for f in files:
         try:
@@ -222,6 +372,7 @@ def main():
                         help='plots only a specific sensor, must be between 1-4')
 
     args = parser.parse_args()
+    plt = _pyplot()
 
     # Provide a opportunity to look at lots
     filenames = []
@@ -288,6 +439,7 @@ def main():
 
             # Parse the datetime
             for k, d in data.items():
+                d = decimate(d)
                 plt.plot(d, d.index, label=k)
 
             plt.title(os.path.basename(f))
@@ -0,0 +1,232 @@
+# coding: utf-8
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from .api import RAD_API
+from .com import RAD_Serial, find_kw_port
+from .probe import RAD_Probe
+from .ui_tools import get_logger
+
+
+class ProbePool:
+    """
+    Drives every probe attached to the computer at once. Each probe gets its
+    own port and is keyed by its serial number. Requests are sent to all the
+    probes in parallel from a thread pool.
+
+    Usage:
+        with ProbePool() as pool:
+            pool.resetMeasurement()
+            pool.startMeasurement()
+            ...
+            pool.stopMeasurement()
+            data = pool.download('rawsensor')
+    """
+
+    def __init__(self, devices=None, port_factory=None, debug=False, max_workers=None, **probe_kwargs):
+        """
+        Args:
+            devices: List of port device names, None finds every probe attached
+            port_factory: Callable receiving a device name and returning an
+                          opened port. Defaults to opening a RAD_Serial
+            max_workers: Number of threads, defaults to one per probe
+            probe_kwargs: Keyword arguments passed to every RAD_Probe
+        """
+        self.debug = debug
+        self.devices = devices
+        self.port_factory = port_factory or self.open_serial
+        self.max_workers = max_workers
+        self.probe_kwargs = probe_kwargs
+        self.log = get_logger(__name__, debug=debug)
+
+        self.probes = {}
+        self._executor = None
+
+        # Exception raised by each probe that failed the last operation
+        self.errors = {}
+
+        # Seconds each probe took on the last operation and for all of them
+        self.timing = {}
+        self.wall_time = None
+
+    def open_serial(self, device):
+        port = RAD_Serial(debug=self.debug)
+        port.openPort(com_port=device)
+        return port
+
+    def __enter__(self):
+        self.connect()
+        return self
+
+    def __exit__(self, *args):
+        self.disconnect()
+
+    def __len__(self):
+        return len(self.probes)
+
+    def __map(self, func, items):
+        """
+        Run func on every item in the thread pool and time each call. An
+        exception raised by one call is returned as its result so it does
+        not stop the others.
+
+        Returns:
+            results: List of (item, result, seconds) in the order of items
+        """
+        def timed(item):
+            start = time.perf_counter()
+            try:
+                result = func(item)
+            except Exception as e:
+                result = e
+            return item, result, time.perf_counter() - start
+
+        start = time.perf_counter()
+        results = list(self._executor.map(timed, items))
+        self.wall_time = time.perf_counter() - start
+        return results
+
+    def __connect_device(self, device):
+        """
+        Open and connect to a single device, a busy or unplugged port only
+        leaves out its own probe
+
+        Returns:
+            probe: Connected RAD_Probe or None
+        """
+        port = None
+        try:
+            port = self.port_factory(device)
+            port.flushPort()
+            api = RAD_API(port, debug=self.debug)
+            api.sendApiPortEnable()
+
+            probe = RAD_Probe(ext_api=api, debug=self.debug, **self.probe_kwargs)
+            if probe.connect():
+                return probe
+
+        except Exception as e:
+            self.log.error(f"Unable to open {device}: {e}")
+
+        if port is not None:
+            try:
+                port.closePort()
+            except Exception as e:
+                self.log.debug(f"Unable to close {device}: {e}")
+        return None
+
+    def connect(self):
+        """
+        Open and connect to every device. Devices that do not respond
+        are skipped.
+
+        Returns:
+            serials: List of the serial numbers of the connected probes
+        """
+        if self.devices is None:
+            self.devices = [p.device for p in find_kw_port(['STMicroelectronics', 'STM32'])]
+
+        if not self.devices:
+            self.log.error("No serial ports were found for the Lyte probe!")
+            return []
+
+        # Probes and threads of an earlier connection are not left behind
+        self.disconnect()
+
+        workers = self.max_workers or len(self.devices)
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='ProbePool')
+
+        for device, probe, seconds in self.__map(self.__connect_device, self.devices):
+            if probe is None:
+                self.log.error(f"Unable to connect to the probe on {device}")
+                continue
+
+            # Fall back on the port name to keep the probe
+            serial = probe.serial_number or device
+            self.log.info(f"Connected to probe {serial} on {device} in {seconds:0.2f}s")
+            self.probes[serial] = probe
+
+        return list(self.probes.keys())
+
+    def disconnect(self):
+        for probe in self.probes.values():
+            probe.disconnect()
+        self.probes = {}
+
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def run(self, func, *args, **kwargs):
+        """
+        Call a function on every probe in parallel
+
+        Args:
+            func: Name of a RAD_Probe method or a callable receiving the probe
+            args: Arguments passed on to the function
+            kwargs: Keyword arguments passed on to the function
+
+        Returns:
+            results: Dictionary of serial number to the result, None for the
+                     probes that raised an exception, kept in self.errors
+        """
+        def call(serial):
+            probe = self.probes[serial]
+            if isinstance(func, str):
+                return getattr(probe, func)(*args, **kwargs)
+            return func(probe, *args, **kwargs)
+
+        results = {}
+        self.errors = {}
+        self.timing = {}
+
+        for serial, result, seconds in self.__map(call, list(self.probes.keys())):
+            if isinstance(result, Exception):
+                self.log.error(f"Probe {serial} failed: {result}")
+                self.errors[serial] = result
+                result = None
+
+            results[serial] = result
+            self.timing[serial] = seconds
+
+        return results
+
+    def resetMeasurement(self):
+        return self.run('resetMeasurement')
+
+    def startMeasurement(self):
+        return self.run('startMeasurement')
+
+    def stopMeasurement(self):
+        return self.run('stopMeasurement')
+
+    def download(self, data_name='rawsensor'):
+        """
+        Download and decode the same data from every probe
+
+        Args:
+            data_name: Name of the data as used by RADICL.grab_data e.g. rawsensor
+
+        Returns:
+            data: Dictionary of serial number to dataframe or None if failed
+        """
+        name = data_name.lower()
+        func = [f for f in dir(RAD_Probe) if f.lower() == f'read{name}data']
+        if not func:
+            raise ValueError(f"No probe data named {data_name}")
+
+        return self.run(func[0])
+
+    def timing_stats(self):
+        """
+        Summary of the time taken by the probes on the last operation
+
+        Returns:
+            stats: Dictionary of min, mean and max seconds per probe and the wall time
+        """
+        seconds = list(self.timing.values())
+        if not seconds:
+            return {}
+        return {'min': min(seconds), 'mean': sum(seconds) / len(seconds), 'max': max(seconds),
+                'wall': self.wall_time}
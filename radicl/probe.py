@@ -2,17 +2,25 @@
 
 import datetime
 import inspect
-import struct
+import sys
 import time
 import numpy as np
-import pandas as pd
 from pathlib import Path
 
 from . import __version__
 from .com import RAD_Serial, find_kw_port
-from .api import RAD_API
+from .api import RAD_API, RETRY_TIME_LIMIT
+from .cache import CaptureCache, IdentityCache, ProbeSettingsCache, RawArchive, SegmentCheckpoint
+from .decode import decode_buffer, get_sample_times, get_sample_rate
+from .commands import AttributeCMD, MeasCMD
+from .transfer import RetryController
 from .ui_tools import get_logger, parse_func_list
-from .info import ProbeState, AccelerometerRange, SensorReadInfo
+from .watcher import StateWatcher
+from .info import Firmware, ProbeError, ProbeState, SensorReadInfo
+from .protocol import decode_temperature
+
+# Maximum number of bytes in a single data segment
+SEGMENT_SIZE = 256
 
 
 class RAD_Probe:
@@ -26,10 +34,19 @@ class RAD_Probe:
                            'Pressure/Depth Correlation',
                            'Depth Corrected Sensor']
 
-    def __init__(self, ext_api: RAD_API=None, debug=False):
+    def __init__(self, ext_api: RAD_API=None, debug=False, pipeline_window=1,
+                 background_reader=False, capture_cache: CaptureCache=None,
+                 settings_cache: ProbeSettingsCache=None, identity_cache: IdentityCache=None):
         """
         Args:
             ext_api: rad_api.RAD_API object pre-instantiated
+            pipeline_window: Number of segment requests kept in flight while
+                             downloading data, 1 reads a segment at a time
+            background_reader: Read the port from a background thread once
+                               connected so waits block on message queues
+            capture_cache: CaptureCache to keep a copy of every download in
+            settings_cache: ProbeSettingsCache to share, a new one is used by default
+            identity_cache: IdentityCache to restore the identity of known probes from on connect
         """
 
         self._state = ProbeState.NOT_SET
@@ -43,6 +60,28 @@ class RAD_Probe:
         self._getters = None
 
         self.debug = debug
+        self.pipeline_window = pipeline_window
+        self.background_reader = background_reader
+        self.capture_cache = capture_cache
+
+        # Segments received of buffers not fully downloaded yet
+        self._checkpoints = {}
+
+        # Statistics of the last buffer transfer
+        self.transfer_stats = None
+
+        # ProbeError of the last request that failed
+        self.last_error = None
+
+        # Follows the measurement state
+        self.state_watcher = StateWatcher(self)
+
+        # Settings read from the probe
+        self.settings_cache = settings_cache or ProbeSettingsCache(debug=debug)
+
+        # Identities of the probes seen before and the USB device connected through
+        self.identity_cache = identity_cache
+        self._usb_id = None
         self.api:RAD_API = ext_api
         self.available_devices = None
 
@@ -93,15 +132,80 @@ class RAD_Probe:
                 # Switch the device over to API mode
                 api.sendApiPortEnable()
                 self.api = api
-                self.api.Identify()
+                self._usb_id = port.usb_id
+
+                if not self.__restoreIdentity():
+                    self.api.Identify()
+                    self.__saveIdentity()
+
+        if self.background_reader and self.api is not None:
+            self.api.port.startReader()
 
-        ret = self.getProbeMeasState()
+        # A restored identity comes with the state
+        if self.state in [ProbeState.NOT_SET, ProbeState.UNKOWN_STATE]:
+            ret = self.getProbeMeasState()
+        else:
+            ret = self.state.value
         connected = True if ret is not None else False
         if not connected:
             self.log.error("Unable to connect to the probe. Unplug and"
                            " power cycle it.")
         return connected
 
+    def __restoreIdentity(self):
+        """
+        Prefill the attributes of a probe seen before on the same USB device.
+        The serial number and firmware revision are requested together with
+        the measurement state to confirm it is the same probe on the same
+        firmware, so a known probe is ready after a single round trip. An
+        identity that no longer matches is forgotten.
+
+        Returns:
+            bool: True when the identity was restored
+        """
+        if self.identity_cache is None:
+            return False
+
+        identity = self.identity_cache.get(self._usb_id)
+        if identity is None:
+            return False
+
+        results = self.api.batchRequest({AttributeCMD.SERIAL.cmd: 8, AttributeCMD.FULL_FW_REV.cmd: 4,
+                                         MeasCMD.STATE.cmd: 1})
+        state = results[MeasCMD.STATE.cmd]
+        if state.status == 1 and state.data is not None:
+            self._update_state(int.from_bytes(state.data, byteorder='little'))
+
+        serial = self.__parseSerial(results[AttributeCMD.SERIAL.cmd])
+        if serial is None or serial != identity['serial']:
+            self.log.info("Connected probe is not the one last seen on this port, identifying it...")
+            self.identity_cache.forget(self._usb_id)
+            return False
+
+        firmware = results[AttributeCMD.FULL_FW_REV.cmd]
+        if firmware.status != 1 or firmware.data is None or \
+                Firmware(self.api.parseFullFWREV(firmware.data)) != Firmware(identity['full_fw_rev']):
+            self.log.info("Probe firmware changed since it was last seen, identifying it...")
+            self.identity_cache.forget(self._usb_id)
+            return False
+
+        self._serial_number = serial
+        self.api.restoreIdentity(identity)
+        self.log.info(f"Attached device: {self.api.hw_id_str}, Revision={self.api.hw_rev}, "
+                      f"Firmware = {self.api.full_fw_rev}, Serial = {serial}")
+        return True
+
+    def __saveIdentity(self):
+        """
+        Remember the identity of the connected probe for the next session
+        """
+        if self.identity_cache is None or self._usb_id is None or self.api.hw_id is None:
+            return
+
+        if self.serial_number is not None:
+            identity = {'serial': self.serial_number, **self.api.getIdentity()}
+            self.identity_cache.save(self._usb_id, identity)
+
     def disconnect(self):
         self.log.info("Disconnecting probe.")
         self.api.port.closePort()
@@ -165,25 +269,30 @@ class RAD_Probe:
         return self._getters
 
 
-    def manage_error(self, ret_dict, stack_id=1):
+    def manage_error(self, ret_dict, stack_id=1, caller=None):
         """
         Handles the common scenario of looking at the returned Dictionary
         from the probe where there may be an error or simply a com error.
-        This function reports the name of the function and reports the error
-        function.
+        This function reports the name of the function, the command requested
+        and the error.
 
         Args:
-            ret_dict: Dictionary of keys ['Status','data','errorCode']
+            ret_dict: ApiResult or dictionary of keys ['status','data','errorCode']
             stack_id: number of functions up the stack to use for reporting
                       function name when errors occur.
+            caller: Name of the function to report, skips looking up the stack
+
+        Returns:
+            error: ProbeError describing the failure, also kept in last_error
         """
-        name = inspect.stack()[stack_id][3]
+        if caller is None:
+            # Only the code object of the frame is needed, not the whole stack
+            caller = sys._getframe(stack_id).f_code.co_name
 
-        if ret_dict['errorCode'] is not None:
-            self.log.error("{} error:{}".format(name, ret_dict['errorCode']))
-
-        else:
-            self.log.error("{} error: COM".format(name))
+        error = ProbeError(getattr(ret_dict, 'cmd', None), ret_dict['errorCode'], caller=caller)
+        self.last_error = error
+        self.log.error(str(error))
+        return error
 
     def manage_data_return(self, ret, num_values=1, dtype=int):
         """
@@ -215,7 +324,7 @@ class RAD_Probe:
                     value = int.from_bytes(data, byteorder='little')
 
                 elif dtype == str:
-                    value = data.decode('utf-8')
+                    value = bytes(data).decode('utf-8')
 
                 elif dtype == 'hex':
                     value = data.hex()
@@ -235,18 +344,18 @@ class RAD_Probe:
 
         return result
 
-    def readData_by_segment(self, buffer_id, segment):
+    def readData_by_segment(self, buffer_id, segment, timeout=None):
         """
-        Read segments one at a time
+        Read segments one at a time, timeout defaults to the one of the api
         """
         # Data Segments to collect
         result = False
 
         # Request the data
-        ret = self.api.MeasReadDataSegment(buffer_id, segment)
+        ret = self.api.MeasReadDataSegment(buffer_id, segment, timeout=timeout)
 
-        if ret['status'] == 1 and ret['data'] is not None:
-            data_chunk = ret['data']
+        if ret.status == 1 and ret.data is not None:
+            data_chunk = ret.data
         else:
             data_chunk = None
         return data_chunk
@@ -260,17 +369,136 @@ class RAD_Probe:
             num_segments = None
         return num_segments
 
+    def __iterSequential(self, buffer_id, segments, max_retry, controller):
+        """
+        Request each segment and wait for it before requesting the next.
+
+        Yields:
+            tuple: segment index and payload of each segment received
+        """
+        buffer_name = self.__data_buffer_guide[buffer_id]
+        num_segments = len(segments)
+
+        # Data Segments to collect
+        for ii, segment in enumerate(segments):
+            result = False
+            attempts = 0
+            deadline = time.perf_counter() + RETRY_TIME_LIMIT
+
+            # Delays and retry
+            for jj in range(0, max_retry):
+                attempts += 1
+
+                # Waits only while the link is backing off
+                controller.wait()
+                start = time.perf_counter()
+
+                # Request the data
+                data_chunk = self.readData_by_segment(buffer_id, segment, timeout=controller.timeout)
+
+                if data_chunk is not None:
+                    controller.success(time.perf_counter() - start, len(data_chunk))
+                    yield segment, data_chunk
+                    result = True
+                    # Break the retry loop
+                    break
+
+                else:
+                    controller.failure()
+
+                    # Developer friendly response in event of read error
+                    self.log.debug("%s Data Error: Buffer ID = %d, Segment ID=%d (%d/%d), Retry #%d, COM Delay = %ss",
+                                   buffer_name, buffer_id, segment, ii, num_segments, jj, controller.delay)
+
+                    # Give up on a segment failing for too long
+                    if time.perf_counter() > deadline:
+                        break
+
+            if not result:
+                self.log.warning('Missed data segment {0:d}, after {1:d} attempts.'.format(segment, attempts))
+
+    def __iterSegmentData(self, buffer_id, segments, max_retry=10, init_delay=0.004, controller=None):
+        """
+        Payloads of the requested segments of a buffer using the pipelined
+        reads when a window is set. Segments are yielded as they arrive and
+        any missed are skipped. Requests are paced by a RetryController whose
+        stats are kept in transfer_stats once done.
+
+        Args:
+            controller: RetryController to carry on with, a new one is used by default
+
+        Yields:
+            tuple: segment index and payload of each segment received
+        """
+        controller = controller or RetryController(init_delay=init_delay)
+
+        if self.pipeline_window > 1:
+            segments = self.api.MeasReadDataSegments(buffer_id, segments, window=self.pipeline_window,
+                                                     max_retry=max_retry, controller=controller)
+        else:
+            segments = self.__iterSequential(buffer_id, segments, max_retry, controller)
+
+        try:
+            yield from segments
+        finally:
+            stats = controller.stats()
+            self.transfer_stats = stats
+            self.log.debug(f"Buffer {buffer_id} transfer: {stats['segments']:,} segments, "
+                           f"{stats['retries']:,} retries, {stats['throughput'] or 0:,.0f} bytes/s")
+
+    def __getCheckpoint(self, buffer_id, num_segments, identity):
+        """
+        Segments already received for a buffer from an earlier attempt to
+        download the same measurement, told apart by the fingerprint of the
+        first segment. Checkpoints are kept in the capture cache when there
+        is one so they outlive the connection.
+        """
+        checkpoint = self._checkpoints.get(buffer_id)
+
+        if checkpoint is None or checkpoint.num_segments != num_segments or checkpoint.identity != identity:
+            if checkpoint is not None:
+                checkpoint.discard()
+
+            if self.capture_cache is not None:
+                checkpoint = self.capture_cache.checkpoint(buffer_id, self.serial_number, num_segments,
+                                                           identity=identity)
+            else:
+                checkpoint = SegmentCheckpoint(num_segments, identity=identity)
+            self._checkpoints[buffer_id] = checkpoint
+
+        return checkpoint
+
+    def has_checkpoints(self):
+        """
+        Whether a download of the measurement staged on the probe was left
+        unfinished, in this session or in the capture cache
+        """
+        if self._checkpoints:
+            return True
+        return self.capture_cache is not None and self.capture_cache.has_checkpoints(self.serial_number)
+
+    def discard_checkpoints(self):
+        """
+        Forget any partially downloaded buffers, used when the measurement on
+        the probe is cleared
+        """
+        for checkpoint in self._checkpoints.values():
+            checkpoint.discard()
+        self._checkpoints = {}
+
+        if self.capture_cache is not None:
+            self.capture_cache.discard_checkpoints(self.serial_number)
+
     def __readData(self, buffer_id, max_retry=10, init_delay=0.004):
         """
         Private function to retrieve data from the probe.
          Args:
             buffer_id: Integer specifying location in the probe buffer
             max_retry: Integer number of attempts before exiting with a fail
+            init_delay: Seconds of delay the requests back off from after a failure
         """
 
-        result = False
         num_segments = 0
-        data = []
 
         buffer_name = self.__data_buffer_guide[buffer_id]
         self.log.info("Querying probe for {} data...".format(buffer_name.lower()))
@@ -293,54 +521,41 @@ class RAD_Probe:
         # If we do have number of segments
         if num_segments != 0 and num_segments is not None:
             self.log.debug("Reading %d segments" % num_segments)
-            byte_counter = 0
-
-            # Data Segments to collect
-            for ii in range(0, num_segments):
-                result = False
-
-                # initial delay time
-                wait_time = init_delay
-
-                # Delays and retry
-                for jj in range(0, max_retry):
 
-                    time.sleep(wait_time)
+            # The first segment identifies the measurement, so segments kept
+            # from an earlier one are never mixed in
+            controller = RetryController(init_delay=init_delay)
+            first = dict(self.__iterSegmentData(buffer_id, [0], max_retry, init_delay, controller)).get(0)
+            if first is None:
+                self.log.error(f"Unable to read the first segment of {buffer_name.lower()} data")
+                return final
 
-                    # Request the data
-                    data_chunk = self.readData_by_segment(buffer_id, ii)
+            # Only request the segments missing from earlier attempts
+            checkpoint = self.__getCheckpoint(buffer_id, num_segments, SegmentCheckpoint.fingerprint(first))
+            checkpoint.store(0, first)
+            missing = checkpoint.missing()
 
-                    if data_chunk is not None:
-                        data.extend(data_chunk)
-                        byte_counter = len(data)
-                        result = True
-                        # Break the retry loop
-                        break
-
-                    else:
-                        if jj >= max_retry:
-                            self.log.warning('Missed data segment, after {0:d} attempts.'.format(jj + 1))
-
-                        # Developer friendly response in event of read error
-                        msg = ("{0} Data Error: Buffer ID = {1:d}, "
-                               "Segment ID={2:d}/{3:d}, Retry #{4:d}, "
-                               " COM Delay = {5}s "
-                               "").format(buffer_name, buffer_id, ii,
-                                          num_segments, jj, wait_time)
+            if len(missing) < num_segments:
+                self.log.info("Resuming {} download, {:,}/{:,} segments missing".format(
+                    buffer_name.lower(), len(missing), num_segments))
 
-                        self.log.debug(msg)
-
-                        # Increase the wait time every failed request
-                        wait_time += wait_time
+            # Each segment is written in place by its index
+            for segment, data_chunk in self.__iterSegmentData(buffer_id, missing, max_retry, init_delay, controller):
+                checkpoint.store(segment, data_chunk)
 
             # Was the data read successful?
-            final['status'] = int(result)
+            final['status'] = int(checkpoint.complete)
             final['SegmentsAvailable'] = num_segments
-            final['SegmentsRead'] = ii + 1  # Report this not zero based
-            final['BytesRead'] = byte_counter
+            final['SegmentsRead'] = checkpoint.received
+            final['BytesRead'] = checkpoint.nbytes
 
             if final['SegmentsRead'] > 0:
-                final['data'] = data
+                final['data'] = checkpoint.assemble()
+
+            # A complete buffer never needs to be requested again
+            if checkpoint.complete:
+                checkpoint.discard()
+                del self._checkpoints[buffer_id]
 
         return final
 
@@ -352,8 +567,10 @@ class RAD_Probe:
         Returns the probe's serial number. The return value is a string. If the
         request fails it will return None
         """
+        return self.__parseSerial(self.api.getSerialNumber())
 
-        ret = self.api.getSerialNumber()
+    def __parseSerial(self, ret):
+        result = None
         if ret['data'] is not None:
             # Flip the byte array since it comes in backwards
             ret['data'] = ret['data'][::-1]
@@ -391,18 +608,32 @@ class RAD_Probe:
         """
         data = None
         attempts = 0
+        deadline = time.perf_counter() + RETRY_TIME_LIMIT
 
-        while data is None and attempts < 10:
+        while data is None and attempts < 10 and (attempts == 0 or time.perf_counter() < deadline):
             ret = self.api.getMeasState()
             data = self.manage_data_return(ret, dtype=int)
             attempts += 1
 
-        if self.state != data:
-            self._last_state = self._state
-            self._state = ProbeState.from_state(data)
-
+        self._update_state(data)
         return data
 
+    def _update_state(self, value):
+        """
+        Keep the measurement state reported by the probe
+
+        Args:
+            value: Integer state or None when it is unknown
+
+        Returns:
+            state: ProbeState of the probe
+        """
+        state = ProbeState.from_state(value)
+        if state != self._state:
+            self._last_state = self._state
+            self._state = state
+        return state
+
     def startMeasurement(self):
         """
         Starts a new measurement. Returns 1 if successful, 0 otherwise
@@ -412,13 +643,16 @@ class RAD_Probe:
         self.log.debug("Start measurement requested.")
 
         if ret['status'] == 1:
+            self.discard_checkpoints()
+            # A new measurement has its own temperature
+            self.settings_cache.invalidate(self, 'temp')
             self.wait_for_state(ProbeState.MEASURING)
             self.log.info("Measurement started...")
 
             return 1
 
         else:
-            self.manage_error(ret)
+            self.manage_error(ret, caller='startMeasurement')
 
             return 0
 
@@ -436,7 +670,7 @@ class RAD_Probe:
 
             return 1
         else:
-            self.manage_error(ret)
+            self.manage_error(ret, caller='stopMeasurement')
 
             return 0
 
@@ -450,61 +684,42 @@ class RAD_Probe:
         self.log.debug("Measurement reset requested...")
 
         if ret['status'] == 1:
+            self.discard_checkpoints()
+            # A new measurement has its own temperature
+            self.settings_cache.invalidate(self, 'temp')
             result = self.wait_for_state(ProbeState.IDLE, delay=0.1)
             self.log.info("Probe measurement reset...")
 
             return 1
 
         else:
-            self.manage_error(ret)
+            self.manage_error(ret, caller='resetMeasurement')
 
             return 0
 
     def wait_for_state(self, state:ProbeState, retry=500, delay=0.2):
         """
         Waits for the specified state to occur. This is particularly useful when
-        a command is requested.
+        a command is requested. State changes pushed by the probe are picked up
+        right away with a background reader, otherwise the state is polled
+        quickly at first and every delay seconds at most.
 
         Args:
             state: single integer
             retry: Number of attempts to try while Waiting for the states
-            delay: time in seconds to wait between each attempt
+            delay: longest time in seconds to wait between each attempt
 
         """
-
-        attempts = 0
-        result = False
         self.log.info(f"Waiting for state {state.value}, current state = {self.state.value}")
-
-        while not result:
-            result = self.state == state
-
-            # Check for a probe advanced past the state
-            if state != ProbeState.IDLE:
-                if self.state >= state:
-                    result = True
-
-            if ProbeState.ready(state):
-                if self.state == ProbeState.IDLE:
-                        result = True
-
-            if attempts > retry:
-                self.log.error(
-                    "Retry Exceeded waiting for state(s) {0}".format(state))
-                result = False
-                break
-            else:
-                attempts += 1
-
-            time.sleep(delay)
-
-            # Update the state
-            self.getProbeMeasState()
+        result, polls = self.state_watcher.wait_for(state, timeout=retry * delay, max_interval=delay)
 
         if result:
             self.log.debug(
                 "{} queries while waiting for state {}".format(
-                    attempts, state))
+                    polls, state))
+        else:
+            self.log.error(
+                "Retry Exceeded waiting for state(s) {0}".format(state))
 
         return result
 
@@ -548,7 +763,7 @@ class RAD_Probe:
 
             # Data from SPI Flash
             if from_spi:
-                expected_bytes = ret_dict['SegmentsRead'] * 256
+                expected_bytes = ret_dict['SegmentsRead'] * SEGMENT_SIZE
 
                 # Check we read all bytes:
                 complete_bytes = expected_bytes == ret_dict['BytesRead']
@@ -589,54 +804,22 @@ class RAD_Probe:
         Args:
             data: Data to unpack
             sensor: Sensor storage info
-            extra_conversion: Option to add a more dynamic conversion like in accelerometer
 
         Returns:
-            final: Dictionary of unpacked data
+            final: Dataframe of unpacked data indexed by time
 
         """
-        offset = 0
-        final = {name: [] for name in sensor.data_names}
-
-        unpack_bytes = sensor.unpack_type is not None
-        convert = sensor.conversion_factor is not None
-
-        samples = len(data) // sensor.bytes_per_sample
-
-        for ii in range(0, samples):
-
-            # Loop over each sensor and add it to the final dict
-            for idx, name in enumerate(sensor.data_names):
-                # Form the index for the bytes for the start of each value.
-                byte_idx = idx * sensor.nbytes_per_value + offset
-
-                # Certain datasets need to be unpacked
-                if unpack_bytes:
-                    # Form a byte object and unpack it
-                    byte_list = data[byte_idx: (byte_idx + sensor.nbytes_per_value)]
-                    byte_object = bytes(byte_list)
-                    value = struct.unpack(sensor.unpack_type, byte_object)[0]
-
-                else:
-                    value = data[byte_idx] + \
-                                   data[byte_idx + 1] * sensor.bytes_per_segment
-
-                # Perform conversion of units
-                if convert:
-                    value *= sensor.conversion_factor
-
-                # Grab each sensor value in the byte array
-                final[name].append(value)
-
-            # Move farther down the bytes to read the next segment.
-            offset += sensor.nbytes_per_value * sensor.expected_values
-        df = pd.DataFrame.from_dict(final)
+        accelerometer_range = None
 
         # Special Treatment of the accelerometer data
         if sensor == SensorReadInfo.ACCELEROMETER:
             self.log.info('Scaling accelerometer data')
-            sensitivity = AccelerometerRange.from_range(self.accelerometer_range)
-            df = df.mul(sensitivity.value_scaling)
+            accelerometer_range = self.accelerometer_range
+
+        import pandas as pd
+
+        final = decode_buffer(data, sensor, accelerometer_range=accelerometer_range)
+        df = pd.DataFrame(final)
 
         df = self.time_decimate(df, sensor)
         return df
@@ -646,24 +829,203 @@ class RAD_Probe:
         Form the data into a dataframe and scale it according to the ratio of max
         sample rate as is done in the FW
         """
-        n_samples = df.index.size
-        # Decimation ratio for peripheral sensors
-        ratio = self.sampling_rate / SensorReadInfo.RAWSENSOR.max_sample_rate
-        sr = int(sensor.max_sample_rate * ratio)
-        seconds = np.linspace(0, n_samples / sr, n_samples)
-        df['time'] = seconds
+        df['time'] = get_sample_times(df.index.size, sensor, self.sampling_rate)
         df = df.set_index('time')
         return df
 
-    def _parse_data(self, sensor):
+    def download_sensor(self, sensor: SensorReadInfo):
+        """
+        Download a sensor buffer and check its integrity without decoding it
+
+        Args:
+            sensor: Sensor storage info
+
+        Returns:
+            data: Bytes of the buffer or None if the download failed
+        """
         ret = self.__readData(sensor.buffer_id)
-        ret = self.read_check_data_integrity(sensor.buffer_id, ret, nbytes_per_value=sensor.nbytes_per_value,
-                                             nvalues=sensor.expected_values, from_spi=sensor.uses_spi)
+        checked = self.read_check_data_integrity(sensor.buffer_id, ret, nbytes_per_value=sensor.nbytes_per_value,
+                                                 nvalues=sensor.expected_values, from_spi=sensor.uses_spi)
+
+        # Keep what was received, even incomplete, so it can be recovered later
+        if self.capture_cache is not None and ret['data'] is not None:
+            self.cache_capture(ret['data'], sensor, complete=checked is not None)
+
+        if checked is not None:
+            return checked['data']
+        return None
+
+    def cache_capture(self, data, sensor: SensorReadInfo, complete=True, cache: CaptureCache = None):
+        """
+        Write downloaded bytes to the capture cache with the probe info
+        needed to decode them later
+
+        Args:
+            cache: CaptureCache to write to, defaults to the capture cache of the probe
+
+        Returns:
+            path: Path to the cached file or None if it could not be written
+        """
+        cache = cache or self.capture_cache
+        try:
+            return cache.save(data, sensor, sampling_rate=self.sampling_rate,
+                                           accelerometer_range=self.accelerometer_range,
+                                           serial=self.serial_number, firmware=self.api.full_fw_rev,
+                                           complete=complete)
+        except OSError as e:
+            self.log.error(f"Unable to cache {sensor.readable_name} data: {e}")
+            return None
+
+    def archive_sensors(self, archive: RawArchive, sensors, extra_meta={}, retries=3):
+        """
+        Download sensor buffers and write the verified bytes to a new
+        measurement in a raw archive without decoding them
+
+        Args:
+            archive: RawArchive to write the measurement to
+            sensors: List of SensorReadInfo to download
+            extra_meta: Dictionary of extra notes to add to the header
+            retries: Number of attempts to download each buffer
+
+        Returns:
+            path: Measurement folder or None if any download failed
+        """
+        cache = archive.create(self.serial_number)
+
+        for sensor in sensors:
+            data = None
+            attempts = 0
+
+            while data is None and attempts < retries:
+                data = self.download_sensor(sensor)
+                attempts += 1
+
+            if data is None:
+                self.log.error(f"Unable to retrieve {sensor.readable_name} data after {attempts} attempts")
+                return None
+
+            if self.cache_capture(data, sensor, cache=cache) is None:
+                return None
+
+        header = self.getProbeHeader()
+        header.update(extra_meta)
+        archive.finish(cache.directory, header)
+        return cache.directory
+
+    def _parse_data(self, sensor):
+        data = self.download_sensor(sensor)
         final = None
-        if ret is not None:
-            final = self.unpack_sensor(ret['data'], sensor)
+        if data is not None:
+            final = self.unpack_sensor(data, sensor)
         return final
 
+    def iter_segments(self, sensor: SensorReadInfo, max_retry=10):
+        """
+        Download a sensor buffer and decode it a segment at a time as the
+        segments arrive, so the whole buffer is never held in memory. Bytes
+        of a sample split across two segments are carried over to the next.
+
+        Args:
+            sensor: Sensor storage info
+            max_retry: Number of attempts per segment
+
+        Yields:
+            values: Dictionary of numpy arrays keyed by the sensor data names
+
+        Raises:
+            IOError: A segment could not be read
+        """
+        num_segments = self.get_number_of_segments(sensor.buffer_id)
+        if not num_segments:
+            self.log.error('Read error: No data available!')
+            return
+
+        accelerometer_range = None
+        if sensor == SensorReadInfo.ACCELEROMETER:
+            accelerometer_range = self.accelerometer_range
+
+        self.log.info("Streaming {:,} segments of {} data...".format(num_segments, sensor.readable_name))
+        remainder = b''
+        segments_read = 0
+
+        # Segments arriving ahead of one being retried are held to keep the order
+        held = {}
+        window = max(self.pipeline_window, 1)
+
+        for segment, data_chunk in self.__iterSegmentData(sensor.buffer_id, range(num_segments), max_retry):
+            held[segment] = data_chunk
+
+            while segments_read in held:
+                data_chunk = held.pop(segments_read)
+
+                # Data from SPI flash always fills the segments
+                if sensor.uses_spi and len(data_chunk) != SEGMENT_SIZE:
+                    break
+
+                segments_read += 1
+                chunk = remainder + bytes(data_chunk)
+                complete = len(chunk) - len(chunk) % sensor.bytes_per_sample
+                remainder = chunk[complete:]
+
+                if complete:
+                    yield decode_buffer(chunk[:complete], sensor, accelerometer_range=accelerometer_range)
+
+            # More held than in flight means the next segment was given up on
+            if len(held) > window:
+                break
+
+        if segments_read != num_segments:
+            msg = "Data Integrity Error: Unable to retrieve all data for {}.".format(sensor.readable_name)
+            self.log.error(msg)
+            raise IOError(msg)
+
+        if remainder:
+            self.log.warning("Ignoring {} bytes of an incomplete {} sample".format(len(remainder),
+                                                                                 sensor.readable_name))
+
+    def iter_samples(self, sensor: SensorReadInfo, chunk_size=4096, max_retry=10):
+        """
+        Stream a sensor buffer as dataframes indexed by time. Times are the
+        sample number over the sample rate since the total number of samples
+        is not known until the download is done.
+
+        Args:
+            sensor: Sensor storage info
+            chunk_size: Minimum number of samples in each dataframe except the last
+            max_retry: Number of attempts per segment
+
+        Yields:
+            df: Dataframe of the next samples indexed by time
+
+        Raises:
+            IOError: A segment could not be read
+        """
+        sample_rate = get_sample_rate(sensor, self.sampling_rate)
+        pending = []
+        n_pending = 0
+        start = 0
+
+        def to_frame(pending, start):
+            import pandas as pd
+
+            values = {name: np.concatenate([p[name] for p in pending]) for name in sensor.data_names}
+            n = len(values[sensor.data_names[0]])
+            index = pd.Index((start + np.arange(n)) / sample_rate, name='time')
+            return pd.DataFrame(values, index=index)
+
+        for values in self.iter_segments(sensor, max_retry=max_retry):
+            pending.append(values)
+            n_pending += len(values[sensor.data_names[0]])
+
+            if n_pending >= chunk_size:
+                yield to_frame(pending, start)
+                start += n_pending
+                pending = []
+                n_pending = 0
+
+        if pending:
+            yield to_frame(pending, start)
+
     def readRawSensorData(self):
         """
         Reads the RAW sensor data.
@@ -747,7 +1109,7 @@ class RAD_Probe:
         """
 
         ret = self.api.MeasGetMeasTemp()
-        result = struct.unpack('<i', ret['data'][5:])[0]
+        result = decode_temperature(ret['data'])
         return result
 
     def getProbeHeader(self):
@@ -764,14 +1126,15 @@ class RAD_Probe:
                   "HARDWARE REVISION": self.api.hw_rev,
                   "MODEL NUMBER": self.api.hw_id,
                   "Serial Num.":self.serial_number,
-                  "Baro Temp.":self.readMeasurementTemperature(),
+                  "Baro Temp.":self.getSetting(setting_name='temp'),
                   "ACC. Range": str(self.accelerometer_range)}
         return header
 
     def getSetting(self, setting_name=None, sensor=None):
         """
         Reads the probes setting from the dictionary of functions. Calls the
-        function and manages the data.
+        function and manages the data. Settings kept in the settings cache are
+        only read from the probe when not known or changed.
 
         Args:
             setting_name: name of the function minus Meas and get
@@ -780,6 +1143,9 @@ class RAD_Probe:
         Returns:
             int: from the function getting the probe setting, or list of 2 for calibration data
         """
+        if setting_name in ProbeSettingsCache.settings:
+            return self.settings_cache.get(self, setting_name)
+
         if setting_name == 'calibdata':
             ret = self.getters[setting_name](sensor)
             num_values = 2
@@ -789,6 +1155,16 @@ class RAD_Probe:
 
         return self.manage_data_return(ret, num_values=num_values, dtype=int)
 
+    def getAllSettings(self):
+        """
+        Reads every setting of the probe in a single batch, settings already
+        known are served from the settings cache
+
+        Returns:
+            dict: Setting name to integer value, None for any that could not be read
+        """
+        return self.settings_cache.snapshot(self)
+
     def setSetting(self, setting_name=None, sensor=None, value=None, low_value=None,
                    hi_value=None):
         """
@@ -802,6 +1178,8 @@ class RAD_Probe:
             ret = self.settings[setting_name](value)
         # Successful change!
         if ret['status'] == 1:
+            self.settings_cache.invalidate(self, setting_name)
+
             # Reset properties to pull again
             if setting_name == 'accrange':
                 self._accelerometer_range = None
@@ -815,6 +1193,6 @@ class RAD_Probe:
             return True
 
         else:
-            self.manage_error(ret)
+            self.manage_error(ret, caller='setSetting')
 
         return None
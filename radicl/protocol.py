@@ -0,0 +1,432 @@
+# coding: utf-8
+
+import struct
+from collections.abc import Mapping
+from enum import Enum
+
+from .commands import AttributeCMD, MeasCMD, SettingsCMD, SystemCMD, FWUpdateCMD
+
+# Every message starts with this byte
+SYNC_BYTE = 0x9F
+
+# Sync byte, command, message type, crc/extra and payload length
+HEADER_SIZE = 5
+
+# Long responses do not report their length, they are always this size
+LONG_PAYLOAD_SIZE = 256
+
+# Sent on its own to switch the probe over to the API
+API_PORT_ENABLE = bytes([0x21])
+
+
+class MessageType(Enum):
+    """Message types found in the third byte of the header"""
+    REQUEST = 0x00
+    SET = 0x01
+    RESPONSE = 0x02
+    PUSH = 0x03
+    ACK = 0x04
+    NACK = 0x05
+    LONG_RESPONSE = 0x06
+    LONG_REQUEST = 0x07
+
+
+# Plain integers of the message types for the hot paths
+REQUEST = MessageType.REQUEST.value
+SET = MessageType.SET.value
+RESPONSE = MessageType.RESPONSE.value
+PUSH = MessageType.PUSH.value
+ACK = MessageType.ACK.value
+NACK = MessageType.NACK.value
+LONG_RESPONSE = MessageType.LONG_RESPONSE.value
+
+# Temperature responses do not follow the usual message types
+TEMPERATURE_CMD = MeasCMD.TEMP.cmd
+
+
+def frame_length(header):
+    """
+    Determine the total length of a message from its header
+
+    Args:
+        header: Bytes like object with at least HEADER_SIZE bytes
+
+    Returns:
+        length: Integer number of bytes in the full message including the header
+    """
+    if header[2] == LONG_RESPONSE:
+        return HEADER_SIZE + LONG_PAYLOAD_SIZE
+    return HEADER_SIZE + header[4]
+
+
+def split_frames(buffer: bytearray):
+    """
+    Remove all the complete messages from the front of a receive buffer.
+    Bytes preceding a sync byte are discarded and an incomplete message is
+    left in the buffer to be completed by the next read.
+
+    Args:
+        buffer: bytearray of received bytes, modified in place
+
+    Returns:
+        frames: List of bytes objects each containing a single message
+    """
+    frames = []
+    start = 0
+
+    while True:
+        start = buffer.find(SYNC_BYTE, start)
+        if start == -1:
+            start = len(buffer)
+            break
+
+        if len(buffer) - start < HEADER_SIZE:
+            break
+
+        end = start + frame_length(buffer[start:start + HEADER_SIZE])
+        if end > len(buffer):
+            break
+
+        frames.append(bytes(buffer[start:end]))
+        start = end
+
+    del buffer[:start]
+    return frames
+
+
+def bytes_needed(buffer):
+    """
+    Number of bytes still required to complete the message at the front of
+    a receive buffer. The header is parsed as soon as it is available so
+    the exact length of the rest of the message is known.
+
+    Args:
+        buffer: Bytes like object starting on a sync byte or empty
+
+    Returns:
+        n: Integer number of bytes missing
+    """
+    if len(buffer) < HEADER_SIZE:
+        return HEADER_SIZE - len(buffer)
+    return max(frame_length(buffer) - len(buffer), 1)
+
+
+class Frame:
+    """
+    A single message from the probe decoded in one pass over its header
+    """
+    __slots__ = ('raw', 'cmd', 'type', 'extra', 'length')
+
+    def __init__(self, raw):
+        """
+        Args:
+            raw: Bytes of the message starting with the sync byte, at least HEADER_SIZE long
+        """
+        self.raw = raw
+        self.cmd = raw[1]
+        self.type = raw[2]
+        self.extra = raw[3]
+        self.length = raw[4]
+
+    @classmethod
+    def decode(cls, message):
+        """
+        Returns a Frame or None when the message is too short to have a header
+        """
+        if message is None or len(message) < HEADER_SIZE:
+            return None
+        return cls(message)
+
+    @property
+    def num_payload_bytes(self):
+        """
+        Number of bytes present in the payload. This takes long responses
+        into account
+        """
+        if self.type == RESPONSE or self.type == PUSH:
+            return self.length
+        elif self.type == LONG_RESPONSE:
+            return LONG_PAYLOAD_SIZE
+        return 0
+
+    @property
+    def data(self):
+        """
+        Payload of the message, messages without a payload return the whole message
+        """
+        n = self.num_payload_bytes
+        return self.raw[-n:] if n else self.raw
+
+    @property
+    def nack_value(self):
+        """
+        Error code of a NACK, 0 if there is none
+        """
+        if len(self.raw) >= HEADER_SIZE + 2:
+            return int.from_bytes(self.raw[5:7], byteorder='little')
+        return 0
+
+    def is_response(self, cmd):
+        """
+        Returns True if the message is a valid response to the command
+        """
+        # Cope with temperature measurement request
+        if self.type == RESPONSE or cmd == TEMPERATURE_CMD:
+            return self.cmd == cmd and len(self.raw) == HEADER_SIZE + self.length
+
+        return self.type == LONG_RESPONSE and len(self.raw) == HEADER_SIZE + LONG_PAYLOAD_SIZE
+
+    def is_push_message(self, cmd=None, data_len=None):
+        """
+        Returns True if the message is a valid push message
+        """
+        if cmd is not None and self.cmd != cmd:
+            return False
+        if data_len is not None and self.length != data_len:
+            return False
+        return self.type == PUSH and len(self.raw) == HEADER_SIZE + self.length
+
+    def evaluate(self, expected_command, num_expected_payload_bytes):
+        """
+        Prepares the API return value, see evaluate_response
+        """
+        return evaluate_response(self.raw, expected_command, num_expected_payload_bytes)
+
+    def __repr__(self):
+        return f"Frame(cmd={self.cmd:#04x}, type={self.type:#04x}, length={self.length})"
+
+
+class ApiResult:
+    """
+    Result of an API request. The fields are attributes but can also be
+    accessed by key like the dictionaries the API used to return. Payloads
+    are memoryviews of the message received so they are never copied.
+
+    Usage:
+        ret = api.MeasGetNumSegments(0)
+        if ret.status == 1:
+            num_segments = int.from_bytes(ret.data, byteorder='little')
+    """
+    __slots__ = ('status', 'errorCode', 'data', 'cmd')
+
+    # Keys available like the old dictionaries
+    _fields = ('status', 'errorCode', 'data')
+
+    def __init__(self, status=0, errorCode=None, data=None, cmd=None):
+        self.status = status
+        self.errorCode = errorCode
+        self.data = data
+        # Command code of the request answered
+        self.cmd = cmd
+
+    def __getitem__(self, key):
+        if key not in ApiResult._fields:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __setitem__(self, key, value):
+        if key not in ApiResult._fields:
+            raise KeyError(key)
+        setattr(self, key, value)
+
+    def __contains__(self, key):
+        return key in ApiResult._fields
+
+    def __iter__(self):
+        return iter(ApiResult._fields)
+
+    def __len__(self):
+        return len(ApiResult._fields)
+
+    def get(self, key, default=None):
+        return getattr(self, key) if key in ApiResult._fields else default
+
+    def keys(self):
+        return list(ApiResult._fields)
+
+    def values(self):
+        return [self.status, self.errorCode, self.data]
+
+    def items(self):
+        return list(zip(ApiResult._fields, self.values()))
+
+    def __eq__(self, other):
+        if isinstance(other, (ApiResult, Mapping)):
+            return dict(self.items()) == dict(other.items())
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"ApiResult(status={self.status}, errorCode={self.errorCode}, data={self.data!r}, cmd={self.cmd})"
+
+
+def evaluate_response(response, expected_command,
+                      num_expected_payload_bytes):
+    """
+    This function evaluates the response and prepares the API return value
+    If 'num_expected_payload_bytes' is 0, then the response guides how
+    many bytes will be returned. The header is only read once since every
+    response goes through here.
+
+    Args:
+            response: data in bytes of a single message from the probe or a Frame
+            expected_command: Command code the response should be for
+            num_expected_payload_bytes: Integer number of bytes expecting to receive
+
+    Returns:
+            result: ApiResult of the status, error code and payload
+    """
+    if type(response) is Frame:
+        response = response.raw
+
+    if response is None or len(response) < HEADER_SIZE:
+        return ApiResult(cmd=expected_command)
+
+    size = len(response)
+    msg_type = response[2]
+    length = response[4]
+    complete = size == HEADER_SIZE + length
+
+    # Cope with temperature measurement request
+    if msg_type == RESPONSE or expected_command == TEMPERATURE_CMD:
+        valid = complete and response[1] == expected_command
+    else:
+        valid = msg_type == LONG_RESPONSE and size == HEADER_SIZE + LONG_PAYLOAD_SIZE
+
+    # Push messages answering the command
+    if not valid and msg_type == PUSH and complete:
+        valid = (expected_command is None or response[1] == expected_command) and \
+                (num_expected_payload_bytes is None or length == num_expected_payload_bytes)
+
+    if valid:
+        if msg_type == RESPONSE or msg_type == PUSH:
+            n = length
+        elif msg_type == LONG_RESPONSE:
+            n = LONG_PAYLOAD_SIZE
+        else:
+            n = 0
+        # Messages without a payload return the whole message
+        data = memoryview(response)
+        return ApiResult(1, None, data[-n:] if n else data, expected_command)
+
+    elif msg_type == ACK:
+        return ApiResult(1, cmd=expected_command)
+
+    elif msg_type == NACK:
+        value = int.from_bytes(response[5:7], byteorder='little') if size >= HEADER_SIZE + 2 else 0
+        return ApiResult(0, value, cmd=expected_command)
+
+    return ApiResult(cmd=expected_command)
+
+
+def decode_temperature(data):
+    """
+    Temperature of the last measurement, a signed 32 bit integer. The probe
+    answers with a message type that carries no payload length so the
+    result holds the whole message and the value follows the header, as
+    RAD_Probe.readMeasurementTemperature has always read it. A plain
+    response holding only the value decodes the same.
+
+    Args:
+        data: Data of the ApiResult of a temperature request
+
+    Returns:
+        temperature: Integer
+    """
+    return struct.unpack('<i', bytes(data[-4:]))[0]
+
+
+def _all_commands():
+    for group in (AttributeCMD, MeasCMD, SettingsCMD, SystemCMD, FWUpdateCMD):
+        for command in group:
+            yield command.cmd
+
+
+# Frames without a payload never change so they are only built once
+REQUEST_FRAMES = {cmd: bytes([SYNC_BYTE, cmd, REQUEST, 0x00, 0x00]) for cmd in _all_commands()}
+SET_FRAMES = {cmd: bytes([SYNC_BYTE, cmd, SET, 0x00, 0x00]) for cmd in _all_commands()}
+
+
+def request_frame(cmd):
+    """
+    Frame requesting a value from the probe
+    """
+    frame = REQUEST_FRAMES.get(cmd)
+    if frame is None:
+        frame = bytes([SYNC_BYTE, cmd, REQUEST, 0x00, 0x00])
+    return frame
+
+
+def set_frame(cmd):
+    """
+    Frame telling the probe to do something without a payload
+    """
+    frame = SET_FRAMES.get(cmd)
+    if frame is None:
+        frame = bytes([SYNC_BYTE, cmd, SET, 0x00, 0x00])
+    return frame
+
+
+def build_frame(cmd, msg_type, payload, extra=0x00, length=None):
+    """
+    Frame with a variable payload
+
+    Args:
+        cmd: Command code
+        msg_type: MessageType of the frame
+        payload: Bytes like object or list of integer bytes
+        extra: Value of the crc/extra byte
+        length: Value of the length byte, defaults to the payload length
+
+    Returns:
+        frame: bytes of the full frame
+    """
+    if length is None:
+        length = len(payload)
+    return bytes([SYNC_BYTE, cmd, msg_type.value, extra, length]) + bytes(payload)
+
+
+class FrameEncoder:
+    """
+    Builds frames with a payload. Payloads are packed with a precompiled
+    struct straight into a buffer kept for each command, so an encoder must
+    not be shared between threads and a frame returned is only valid until
+    the next one for the same command is built.
+
+    Usage:
+        encoder = FrameEncoder()
+        frame = encoder.encode(MeasCMD.DATA_SEGMENT.cmd, 'BI', buffer_id, segment,
+                               msg_type=MessageType.REQUEST)
+    """
+    __slots__ = ('_buffers',)
+
+    def __init__(self):
+        self._buffers = {}
+
+    def encode(self, cmd, fmt, *values, msg_type=MessageType.SET, extra=0x00):
+        """
+        Args:
+            cmd: Command code
+            fmt: struct format of the payload without a byte order, always little endian
+            values: Values to pack into the payload
+            msg_type: MessageType of the frame
+            extra: Value of the crc/extra byte
+
+        Returns:
+            frame: bytearray of the full frame
+        """
+        key = (cmd, fmt, msg_type)
+        entry = self._buffers.get(key)
+
+        if entry is None:
+            packer = struct.Struct('<' + fmt)
+            buffer = bytearray(HEADER_SIZE + packer.size)
+            buffer[:HEADER_SIZE] = bytes([SYNC_BYTE, cmd, msg_type.value, extra, packer.size])
+            entry = (packer, buffer)
+            self._buffers[key] = entry
+
+        packer, buffer = entry
+        buffer[3] = extra
+        packer.pack_into(buffer, HEADER_SIZE, *values)
+        return buffer
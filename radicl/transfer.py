@@ -0,0 +1,126 @@
+# coding: utf-8
+
+import time
+from collections import deque
+
+
+class RetryController:
+    """
+    Paces the segment requests of a download. One controller is shared by
+    every request of a download so it learns how the link behaves:
+
+    * No delay is added before a request while responses come back fine.
+    * Failures back off link wide, doubling the delay before every request,
+      and the delay only decays again once errors stop clustering.
+    * The response timeout follows the observed round trip time.
+
+    Statistics of the download are kept for reporting.
+    """
+
+    def __init__(self, init_delay=0.004, max_delay=1.0, timeout=1.0, min_timeout=0.1,
+                 error_window=16, error_threshold=0.25):
+        """
+        Args:
+            init_delay: Seconds of delay added after the first failure
+            max_delay: Longest delay in seconds to add before a request
+            timeout: Seconds to wait for a response until a latency is learned,
+                     also the longest timeout used
+            min_timeout: Shortest timeout in seconds used once a latency is learned
+            error_window: Number of recent requests used to judge the error rate
+            error_threshold: Fraction of recent requests failing to keep backing off
+        """
+        self.init_delay = init_delay
+        self.max_delay = max_delay
+        self.max_timeout = timeout
+        self.min_timeout = min_timeout
+        self.error_threshold = error_threshold
+
+        # Seconds to wait before each request
+        self.delay = 0.0
+
+        # Smoothed round trip time and its mean deviation
+        self.rtt = None
+        self.rtt_deviation = 0.0
+
+        self._recent = deque(maxlen=error_window)
+        self._start = time.perf_counter()
+        self._rtt_total = 0.0
+
+        self.requests = 0
+        self.failures = 0
+        self.segments = 0
+        self.bytes = 0
+
+    @property
+    def timeout(self):
+        """Seconds to wait on a response, a few deviations past the usual latency"""
+        if self.rtt is None:
+            return self.max_timeout
+        timeout = 2 * self.rtt + 8 * self.rtt_deviation
+        return min(max(timeout, self.min_timeout), self.max_timeout)
+
+    @property
+    def error_rate(self):
+        """Fraction of the recent requests that failed"""
+        if not self._recent:
+            return 0.0
+        return sum(self._recent) / len(self._recent)
+
+    def wait(self):
+        """Sleep before a request if the link is backing off"""
+        self.requests += 1
+        if self.delay > 0:
+            time.sleep(self.delay)
+
+    def success(self, rtt, nbytes):
+        """
+        Record a request answered
+
+        Args:
+            rtt: Seconds from sending the request to receiving the response
+            nbytes: Number of payload bytes received
+        """
+        self._recent.append(False)
+        self.segments += 1
+        self.bytes += nbytes
+        self._rtt_total += rtt
+
+        if self.rtt is None:
+            self.rtt = rtt
+            self.rtt_deviation = rtt / 2
+        else:
+            self.rtt_deviation += 0.25 * (abs(rtt - self.rtt) - self.rtt_deviation)
+            self.rtt += 0.125 * (rtt - self.rtt)
+
+        # Ease off the back off once the errors have cleared up
+        if self.delay > 0 and self.error_rate < self.error_threshold:
+            self.delay /= 2
+            if self.delay < self.init_delay:
+                self.delay = 0.0
+
+    def failure(self):
+        """Record a request that was rejected or went unanswered"""
+        self._recent.append(True)
+        self.failures += 1
+        self.delay = min(max(2 * self.delay, self.init_delay), self.max_delay)
+
+    @property
+    def retries(self):
+        return self.requests - self.segments
+
+    def stats(self):
+        """
+        Summary of the download so far
+
+        Returns:
+            stats: Dictionary of the segments and bytes received, the requests
+                   retried, failures, mean round trip time and throughput
+        """
+        elapsed = time.perf_counter() - self._start
+        return {'segments': self.segments,
+                'bytes': self.bytes,
+                'retries': max(self.retries, 0),
+                'failures': self.failures,
+                'mean_rtt': self._rtt_total / self.segments if self.segments else None,
+                'seconds': elapsed,
+                'throughput': self.bytes / elapsed if elapsed > 0 else None}
@@ -160,8 +160,17 @@ def print_helpme(help_str, help_dict):
     print(print_able)
 
 
+# Colored handler installed on each logger by name
+_HANDLERS = {}
+
+
 def get_logger(name, debug=False, ext_logger=None):
     """
+    Colored logger. The handler is only installed the first time a logger is
+    requested, later requests only change its level. The level is set on the
+    logger itself so debug statements return right away when debug is off,
+    pass their arguments %-style to also skip the formatting.
+
     Args:
         name: Name of the logger.
         debug: Bool whether to show debug statements
@@ -170,17 +179,27 @@ def get_logger(name, debug=False, ext_logger=None):
     Returns:
         log: Instantiated logger
     """
-    fmt = fmt = '%(name)s %(levelname)s %(message)s'
+    fmt = '%(name)s %(levelname)s %(message)s'
     if ext_logger is None:
         log = logging.getLogger(name)
     else:
         log = ext_logger
     if debug:
-        level = 'DEBUG'
+        level = logging.DEBUG
     else:
-        level = 'INFO'
+        level = logging.INFO
 
-    coloredlogs.install(fmt=fmt, level=level, logger=log)
+    if log.name in _HANDLERS:
+        _HANDLERS[log.name].setLevel(level)
+    else:
+        coloredlogs.install(fmt=fmt, level=level, logger=log)
+        # The handler goes on a parent logger when one already logs to the
+        # terminal. That one is shared with other loggers so it is installed
+        # again next time instead of having its level changed here.
+        for handler in log.handlers:
+            if coloredlogs.match_stream_handler(handler, [sys.stdout, sys.stderr]):
+                _HANDLERS[log.name] = handler
+    log.setLevel(level)
     return log
 
 
@@ -192,6 +211,14 @@ def exit_requested():
         return False
 
 
+def retry_requested():
+    ans = input('\nThe measurement is still on the probe, try downloading it again? (y/n): ')
+    if ans.strip().lower() in ['n', 'no']:
+        return False
+    else:
+        return True
+
+
 def get_index_from_ratio(idx, ratio, n_samples):
     """
     Sometimes we have an index and we want something
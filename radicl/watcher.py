@@ -0,0 +1,201 @@
+# coding: utf-8
+
+import time
+from concurrent.futures import Future
+
+from .commands import MeasCMD
+from .info import ProbeState
+
+
+def state_reached(current: ProbeState, state: ProbeState):
+    """
+    Check whether the probe is in a state, has advanced past it or, for the
+    ready states, is idle
+
+    Args:
+        current: ProbeState of the probe
+        state: ProbeState waited on
+
+    Returns:
+        bool: True when the wait is over
+    """
+    # Nothing is known about the probe yet
+    if current in [ProbeState.NOT_SET, ProbeState.UNKOWN_STATE]:
+        return False
+
+    if current == state:
+        return True
+
+    # Check for a probe advanced past the state
+    if state != ProbeState.IDLE and current >= state:
+        return True
+
+    return ProbeState.ready(state) and current == ProbeState.IDLE
+
+
+class StateWatcher:
+    """
+    Follows the measurement state of a probe and reports the transitions.
+
+    When the port has a background reader, the watcher wakes up as soon as
+    the firmware pushes a state change (type 0x03 message). Otherwise, and
+    to confirm the state between pushes, the state is polled. Polling starts
+    fast right after a command or a change and backs off while the state
+    stays the same, so changes caused by a command are caught quickly and
+    the link is left alone while waiting on a button press.
+
+    Transitions call the registered callbacks and resolve the futures
+    waiting on a state. Both run in the thread driving the watcher through
+    poll or wait_for.
+
+    Usage:
+        watcher = StateWatcher(probe)
+        watcher.on_change(lambda old, new: print(f"{old.name} -> {new.name}"))
+        measuring = watcher.when(ProbeState.MEASURING)
+        watcher.wait_for(ProbeState.DATA_STAGED, timeout=300)
+    """
+
+    def __init__(self, probe, min_interval=0.02, max_interval=0.2, push_interval=1.0, backoff=1.5):
+        """
+        Args:
+            probe: RAD_Probe to watch
+            min_interval: Seconds between polls right after a command or change
+            max_interval: Longest seconds between polls without push messages
+            push_interval: Longest seconds between polls once the probe is known to push changes
+            backoff: Factor the poll interval grows by while the state is unchanged
+        """
+        self.probe = probe
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.push_interval = push_interval
+        self.backoff = backoff
+
+        self.interval = min_interval
+
+        # Set once the probe has pushed a state change
+        self.push_supported = False
+
+        self._callbacks = []
+        self._futures = []
+
+    @property
+    def state(self):
+        return self.probe.state
+
+    def on_change(self, callback):
+        """
+        Register a function called with the old and new ProbeState on every
+        transition
+
+        Returns:
+            callback: The function registered, so this can be used as a decorator
+        """
+        self._callbacks.append(callback)
+        return callback
+
+    def remove_callback(self, callback):
+        self._callbacks.remove(callback)
+
+    def when(self, state: ProbeState):
+        """
+        Future resolved with the ProbeState once the probe reaches a state
+
+        Args:
+            state: ProbeState to wait on, see state_reached
+
+        Returns:
+            future: concurrent.futures.Future
+        """
+        future = Future()
+        if state_reached(self.state, state):
+            future.set_result(self.state)
+        else:
+            self._futures.append((state, future))
+        return future
+
+    def __transition(self, old, new):
+        for callback in list(self._callbacks):
+            callback(old, new)
+
+        pending = []
+        for state, future in self._futures:
+            if future.cancelled():
+                continue
+            if state_reached(new, state):
+                future.set_result(new)
+            else:
+                pending.append((state, future))
+        self._futures = pending
+
+    def reset_interval(self):
+        """Poll quickly again, used right after sending a command"""
+        self.interval = self.min_interval
+
+    def poll(self, max_wait=None):
+        """
+        Wait for a pushed state change or until the next poll is due, then
+        update the state
+
+        Args:
+            max_wait: Longest seconds to wait, defaults to the current poll interval
+
+        Returns:
+            state: ProbeState of the probe
+        """
+        wait = self.interval if max_wait is None else min(self.interval, max_wait)
+        api = self.probe.api
+        old = self.probe.state
+        new = None
+
+        if api.reader_active:
+            ret = api.waitForPushMessage(MeasCMD.STATE.cmd, wait)
+            if ret.status == 1 and ret.data:
+                self.push_supported = True
+                new = self.probe._update_state(int.from_bytes(ret.data, byteorder='little'))
+        else:
+            time.sleep(wait)
+
+        if new is None:
+            self.probe.getProbeMeasState()
+            new = self.probe.state
+
+        if new != old:
+            self.interval = self.min_interval
+            self.__transition(old, new)
+        else:
+            longest = self.push_interval if self.push_supported else self.max_interval
+            self.interval = min(self.interval * self.backoff, longest)
+
+        return new
+
+    def wait_for(self, state: ProbeState, timeout=100.0, max_interval=None):
+        """
+        Block until the probe reaches a state
+
+        Args:
+            state: ProbeState to wait on, see state_reached
+            timeout: Seconds to wait
+            max_interval: Longest seconds between polls without push messages for this wait
+
+        Returns:
+            tuple: True if the state was reached and the number of polls made
+        """
+        deadline = time.perf_counter() + timeout
+        default_interval = self.max_interval
+        if max_interval is not None:
+            self.max_interval = max_interval
+
+        self.reset_interval()
+        polls = 0
+
+        try:
+            while not state_reached(self.state, state):
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    return False, polls
+                self.poll(remaining)
+                polls += 1
+        finally:
+            self.max_interval = default_interval
+
+        return True, polls
@@ -0,0 +1,170 @@
+# coding: utf-8
+
+import json
+import os
+import tempfile
+from pathlib import Path
+
+
+class CSVWriter:
+    """
+    Text file with the probe header above the data, the format read by
+    study_lyte
+    """
+    extension = '.csv'
+
+    @staticmethod
+    def write(df, meta, filename):
+        from study_lyte.io import write_csv
+        write_csv(df, meta, str(filename))
+
+    @staticmethod
+    def read(filename):
+        from study_lyte.io import read_csv
+        df, meta = read_csv(str(filename))
+        if 'time' in df.columns:
+            df = df.set_index('time')
+        return df, meta
+
+
+class NPZWriter:
+    """
+    Uncompressed numpy archive with one array per column, the index under
+    __index__ and a json header under __header__ holding the probe header,
+    the column order and the index name. Arrays keep their dtype so values
+    are written and loaded without any text conversion.
+    """
+    extension = '.npz'
+
+    @staticmethod
+    def write(df, meta, filename):
+        import numpy as np
+
+        header = {'meta': meta, 'columns': [str(c) for c in df.columns], 'index': df.index.name}
+        arrays = {str(c): df[c].to_numpy() for c in df.columns}
+        if df.index.name is not None:
+            arrays['__index__'] = df.index.to_numpy()
+        arrays['__header__'] = np.array(json.dumps(header, default=str))
+
+        with open(filename, 'wb') as fp:
+            np.savez(fp, **arrays)
+
+    @staticmethod
+    def read(filename):
+        import numpy as np
+        import pandas as pd
+
+        with np.load(filename, allow_pickle=False) as data:
+            header = json.loads(data['__header__'].item())
+            df = pd.DataFrame({c: data[c] for c in header['columns']})
+            if header['index'] is not None:
+                df.index = pd.Index(data['__index__'], name=header['index'])
+        return df, header['meta']
+
+
+# Output formats by name, add a class with an extension, write and read to support another
+WRITERS = {'csv': CSVWriter, 'npz': NPZWriter}
+
+
+def get_writer(fmt):
+    """
+    Args:
+        fmt: Name of the output format, see WRITERS
+
+    Returns:
+        writer: Class writing and reading the format
+    """
+    try:
+        return WRITERS[fmt.lower()]
+    except KeyError:
+        raise ValueError(f"Unknown output format {fmt}, use one of {', '.join(WRITERS)}")
+
+
+def writer_for(filename):
+    """
+    Writer for a file found by its extension, files with an unknown
+    extension are treated as CSV
+    """
+    ext = Path(filename).suffix.lower()
+    for writer in WRITERS.values():
+        if writer.extension == ext:
+            return writer
+    return CSVWriter
+
+
+def write_profile(df, meta, filename, fmt=None):
+    """
+    Write a dataframe and the probe header to a file
+
+    Args:
+        df: pandas Dataframe of the profile
+        meta: Dictionary of header information
+        filename: Path to write to, its extension is replaced by the one of the format
+        fmt: Name of the output format, defaults to the one matching the extension
+
+    Returns:
+        filename: Path written
+    """
+    writer = writer_for(filename) if fmt is None else get_writer(fmt)
+    filename = str(Path(filename).with_suffix(writer.extension))
+    writer.write(df, meta, filename)
+    return filename
+
+
+def read_profile(filename):
+    """
+    Read a file written by any of the writers
+
+    Returns:
+        tuple: pandas Dataframe and dictionary of header information
+    """
+    return writer_for(filename).read(filename)
+
+
+def to_csv(filename, csv_filename=None):
+    """
+    Produce the CSV of a profile written in another format, CSV files are
+    left as they are
+
+    Args:
+        filename: Path to the profile
+        csv_filename: Path of the CSV, defaults to the profile path with a .csv extension
+
+    Returns:
+        csv_filename: Path to the CSV
+    """
+    if writer_for(filename) is CSVWriter:
+        return str(filename)
+
+    csv_filename = csv_filename or str(Path(filename).with_suffix(CSVWriter.extension))
+    df, meta = read_profile(filename)
+    CSVWriter.write(df, meta, csv_filename)
+    return csv_filename
+
+
+def read_lyte_profile(filename, **kwargs):
+    """
+    study_lyte profile of a file written by any of the writers. study_lyte
+    only reads CSV, so other formats are converted to a scratch copy that is
+    removed once the profile is loaded and nothing is left next to the data.
+
+    Args:
+        filename: Path to the profile
+        kwargs: Keyword arguments passed on to LyteProfileV6
+
+    Returns:
+        profile: study_lyte LyteProfileV6 with its data loaded
+    """
+    from study_lyte.profile import LyteProfileV6
+
+    if writer_for(filename) is CSVWriter:
+        return LyteProfileV6(str(filename), **kwargs)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        profile = LyteProfileV6(to_csv(filename, os.path.join(tmp, Path(filename).stem + CSVWriter.extension)),
+                                **kwargs)
+        # The file is only read on first use
+        profile.raw
+
+    profile.filename = Path(filename)
+    return profile
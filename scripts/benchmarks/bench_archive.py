@@ -0,0 +1,76 @@
+"""
+Benchmark the field side cost of a high resolution measurement: the
+transfer alone, writing a raw archive and the full decode, merge and CSV
+write of lyte_hi_res, using a loopback stand in port.
+
+Usage:
+    python scripts/benchmarks/bench_archive.py --seconds 10
+"""
+
+import argparse
+import logging
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from radicl.api import RAD_API
+from radicl.cache import RawArchive
+from radicl.high_resolution import HIGH_RESOLUTION_SENSORS, download_high_resolution_data
+from radicl.probe import RAD_Probe
+from radicl.writers import write_profile
+
+from loopback import LoopbackPort
+
+
+def timed(fn):
+    """Wall and CPU seconds of a call"""
+    wall, cpu = time.perf_counter(), time.process_time()
+    result = fn()
+    return result, time.perf_counter() - wall, time.process_time() - cpu
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument('--seconds', type=float, default=10, help='Length of the measurement in seconds at 16 kHz')
+    parser.add_argument('--pipeline_window', type=int, default=8, help='Segment requests kept in flight')
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+
+    n = int(args.seconds * 16000)
+    rng = np.random.default_rng(0)
+    raw = rng.integers(0, 4096, 4 * n, dtype='<u2').tobytes()
+    depth = np.linspace(100, 0, n // 16, dtype='<f4').tobytes()
+    acc = rng.integers(-1000, 1000, 3 * (n // 16), dtype='<i2').tobytes()
+
+    port = LoopbackPort(latency=0, packet_gap=0, packet_size=4096, buffers={0: raw, 4: depth, 1: acc},
+                        responses={0x40: b'\x00', 0x46: (16000).to_bytes(4, byteorder='little'), 0x52: bytes([16]),
+                                   0x01: b'\x01', 0x02: b'\x01', 0x03: b'\x01\x00', 0x04: bytes(range(8)),
+                                   0x09: b'\x01\x02\x03\x04'})
+    probe = RAD_Probe(ext_api=RAD_API(port), pipeline_window=args.pipeline_window)
+    log = logging.getLogger('bench')
+    probe.sampling_rate
+    probe.accelerometer_range
+
+    with tempfile.TemporaryDirectory() as tmp:
+        _, transfer_wall, transfer_cpu = timed(lambda: [probe.download_sensor(s) for s in HIGH_RESOLUTION_SENSORS])
+        _, archive_wall, archive_cpu = timed(
+            lambda: probe.archive_sensors(RawArchive(tmp), HIGH_RESOLUTION_SENSORS))
+
+        def full():
+            df = download_high_resolution_data(probe, log)
+            return write_profile(df, probe.getProbeHeader(), os.path.join(tmp, 'profile.csv'))
+
+        _, full_wall, full_cpu = timed(full)
+
+    print(f"Measurement of {n:,} samples, {len(raw) + len(depth) + len(acc):,} bytes:")
+    print(f"\tTransfer only:       {transfer_wall:0.2f} s wall, {transfer_cpu:0.2f} s CPU")
+    print(f"\tRaw archive:         {archive_wall:0.2f} s wall, {archive_cpu:0.2f} s CPU")
+    print(f"\tDecode, merge, CSV:  {full_wall:0.2f} s wall, {full_cpu:0.2f} s CPU")
+    print(f"\tRaw archive overhead over the transfer: {(archive_wall - transfer_wall) * 1000:0.0f} ms")
+    print(f"\tSpeedup: {full_wall / archive_wall:0.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+"""
+Benchmark reprocessing a folder of synthetic profiles one after another,
+like plot_hi_res_cli, against radicl-batch spreading them over a process
+pool.
+
+Usage:
+    python scripts/benchmarks/bench_batch.py --profiles 16 --workers 4
+"""
+
+import argparse
+import logging
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from radicl.batch import find_profiles, process_profile, run_batch
+from radicl.writers import write_profile
+
+
+def synthetic_profile(seconds, sample_rate=16000):
+    n = int(seconds * sample_rate)
+    t = np.arange(n) / sample_rate
+    moving = (t > seconds / 4) & (t < 3 * seconds / 4)
+    acceleration = np.full(n, -1.0)
+    acceleration[np.abs(t - seconds / 4) < 0.05] = -1.5
+    acceleration[np.abs(t - 3 * seconds / 4) < 0.05] = -0.5
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({'Sensor1': np.where(moving, 2000.0, 100.0) + rng.normal(0, 20, n),
+                       'Sensor2': np.full(n, 300.0), 'Sensor3': np.where(moving, 2500.0, 1200.0),
+                       'Sensor4': np.zeros(n), 'depth': -np.cumsum(moving) / sample_rate * 50,
+                       'X-Axis': np.zeros(n), 'Y-Axis': acceleration, 'Z-Axis': np.zeros(n)},
+                      index=pd.Index(t, name='time'))
+    meta = {'RECORDED': '2024-01-01--12:00:00', 'Serial Num.': 'ABC123', 'ACC. Range': '16'}
+    return df, meta
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument('--profiles', type=int, default=16, help='Number of profiles processed')
+    parser.add_argument('--seconds', type=float, default=4, help='Length of each profile in seconds at 16 kHz')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help='Number of processes')
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        df, meta = synthetic_profile(args.seconds)
+        for i in range(args.profiles):
+            write_profile(df, meta, os.path.join(tmp, f'profile_{i}.npz'))
+        profiles = find_profiles([tmp])
+
+        t0 = time.perf_counter()
+        for p in profiles:
+            process_profile(p, os.path.join(tmp, 'serial'))
+        serial = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        summaries = run_batch(profiles, os.path.join(tmp, 'batch'), workers=args.workers)
+        batch = time.perf_counter() - t0
+
+    assert all(s['error'] is None for s in summaries)
+    print(f"Rebuilding, summarizing and plotting {args.profiles} profiles of {len(df):,} samples:")
+    print(f"\tSerial:                {serial:0.1f} s ({args.profiles / serial:0.2f} profiles/s)")
+    print(f"\tProcess pool of {args.workers}:     {batch:0.1f} s ({args.profiles / batch:0.2f} profiles/s)")
+    print(f"\tSpeedup: {serial / batch:0.1f}x")
+
+
+if __name__ == '__main__':
+    main()
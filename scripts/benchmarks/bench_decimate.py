@@ -0,0 +1,62 @@
+"""
+Benchmark drawing a hi res series with and without decimating it to screen
+resolution first. Each series is rendered to a png with the Agg backend,
+the same way plot_hi_res and radicl-batch draw their panels, and the
+decimated plot keeps every peak of the full one.
+
+Usage:
+    python scripts/benchmarks/bench_decimate.py --samples 1000000 10000000
+"""
+
+import argparse
+import io
+import time
+
+import numpy as np
+import pandas as pd
+from matplotlib.figure import Figure
+
+from radicl.decimate import decimate
+
+
+def render(series):
+    fig = Figure(figsize=(6, 10))
+    ax = fig.add_subplot()
+    ax.plot(series.values, series.index)
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format='png', dpi=100)
+    return buffer.getbuffer().nbytes
+
+
+def timed(func, *args):
+    t0 = time.perf_counter()
+    result = func(*args)
+    return time.perf_counter() - t0, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument('--samples', type=int, nargs='+', default=[1_000_000, 10_000_000],
+                        help='Sizes of the series rendered')
+    parser.add_argument('--max_points', type=int, default=4000, help='Points kept by the decimation')
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    print(f"{'samples':>12} {'full':>10} {'decimate':>10} {'render':>10} {'speedup':>8} {'points':>8}")
+
+    for n in args.samples:
+        t = np.arange(n) / 16000
+        series = pd.Series(np.cumsum(rng.normal(0, 1, n)), index=t)
+        series.iloc[rng.integers(0, n, 10)] += 1000
+
+        full, _ = timed(render, series)
+        reduce, decimated = timed(decimate, series, args.max_points)
+        drawn, _ = timed(render, decimated)
+        assert decimated.max() == series.max() and decimated.min() == series.min()
+
+        print(f"{n:>12,} {full:>9.2f}s {reduce:>9.3f}s {drawn:>9.3f}s "
+              f"{full / (reduce + drawn):>7.1f}x {len(decimated):>8,}")
+
+
+if __name__ == '__main__':
+    main()
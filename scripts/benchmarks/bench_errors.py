@@ -0,0 +1,82 @@
+"""
+Benchmark the error path of RAD_Probe under a NACK storm, where every
+measurement state request is rejected, comparing the original
+manage_error looking up its caller with inspect.stack() against the
+structured error reporting.
+
+Usage:
+    python scripts/benchmarks/bench_errors.py --calls 50
+"""
+
+import argparse
+import inspect
+import logging
+import time
+import timeit
+
+from radicl.api import RAD_API
+from radicl.commands import MeasCMD
+from radicl.info import ProbeErrors
+from radicl.probe import RAD_Probe
+from radicl.protocol import evaluate_response
+
+from loopback import LoopbackPort
+
+
+class LegacyProbe(RAD_Probe):
+    def manage_error(self, ret_dict, stack_id=1, caller=None):
+        """
+        The original RAD_Probe.manage_error
+        """
+        name = inspect.stack()[stack_id][3]
+
+        if ret_dict['errorCode'] is not None:
+            self.log.error("{} error:{}".format(name, ret_dict['errorCode']))
+
+        else:
+            self.log.error("{} error: COM".format(name))
+
+
+def time_storm(probe, calls):
+    """Seconds per failed getProbeMeasState, each retrying 10 times"""
+    t0 = time.perf_counter()
+    for i in range(calls):
+        assert probe.getProbeMeasState() is None
+    return (time.perf_counter() - t0) / calls
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument('--calls', type=int, default=50, help='Number of failed state requests timed')
+    parser.add_argument('--number', type=int, default=2000, help='Number of manage_error calls timed')
+    args = parser.parse_args()
+
+    # Only time the reporting, not writing log records
+    logging.disable(logging.CRITICAL)
+
+    code = MeasCMD.STATE.cmd
+    error_code = ProbeErrors.FAILED_DATA_READ.error_code
+    nack = bytes([0x9F, code, 0x05, 0x00, 0x02]) + error_code.to_bytes(2, byteorder='little')
+    ret = evaluate_response(nack, code, 1)
+
+    print("manage_error alone:")
+    results = {}
+    for name, cls in [('Legacy', LegacyProbe), ('Structured', RAD_Probe)]:
+        probe = cls(ext_api=RAD_API(LoopbackPort(latency=0, packet_gap=0)))
+        # Called a few frames deep like it is from manage_data_return
+        results[name] = min(timeit.repeat(lambda: probe.manage_data_return(ret), number=args.number, repeat=3))
+        print(f"\t{name}: {results[name] / args.number * 1e6:0.1f} us/call")
+    print(f"\tSpeedup: {results['Legacy'] / results['Structured']:0.1f}x")
+
+    print("NACK storm, failed getProbeMeasState:")
+    results = {}
+    for name, cls in [('Legacy', LegacyProbe), ('Structured', RAD_Probe)]:
+        port = LoopbackPort(latency=0, packet_gap=0, nacks={code: error_code})
+        probe = cls(ext_api=RAD_API(port))
+        results[name] = time_storm(probe, args.calls)
+        print(f"\t{name}: {results[name] * 1e3:0.2f} ms/call")
+    print(f"\tSpeedup: {results['Legacy'] / results['Structured']:0.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+"""
+Measure the import time of every radicl entry point with python -X importtime
+and check it against the budgets in pyproject.toml under
+[tool.radicl.import-budget]. Exits with 1 when an entry point is over budget.
+
+Usage:
+    python scripts/benchmarks/bench_importtime.py --repeat 5
+"""
+
+import argparse
+import subprocess
+import sys
+from pathlib import Path
+
+try:
+    import tomllib
+except ImportError:
+    import tomli as tomllib
+
+PYPROJECT = Path(__file__).parents[2].joinpath('pyproject.toml')
+
+
+def import_time(module):
+    """
+    Cumulative import time of a module in a fresh interpreter
+
+    Returns:
+        float: milliseconds
+    """
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                            capture_output=True, text=True, check=True)
+    for line in result.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        fields = [f.strip() for f in line.split(':', 1)[-1].split('|')]
+        if len(fields) == 3 and fields[2] == module:
+            return int(fields[1]) / 1000
+    raise ValueError(f'No import time reported for {module}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=5, help='Imports timed per entry point, the fastest is kept')
+    args = parser.parse_args()
+
+    with open(PYPROJECT, 'rb') as fp:
+        project = tomllib.load(fp)
+    scripts = project['project']['scripts']
+    budgets = project['tool']['radicl']['import-budget']
+
+    over = []
+    print("Entry point import times:")
+    for name, target in scripts.items():
+        module = target.split(':')[0]
+        ms = min(import_time(module) for i in range(args.repeat))
+        budget = budgets.get(name)
+        status = '' if budget is None else f'/ {budget} ms'
+        if budget is not None and ms > budget:
+            over.append(name)
+            status += ' OVER BUDGET'
+        print(f"\t{name} ({module}): {ms:0.1f} ms {status}")
+
+    sys.exit(1 if over else 0)
+
+
+if __name__ == '__main__':
+    main()
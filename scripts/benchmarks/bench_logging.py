@@ -0,0 +1,71 @@
+"""
+Benchmark the logging cost of each segment of a download, comparing the
+original get_logger reinstalling coloredlogs on every call with debug
+messages formatted up front, against the handler installed once and lazy
+%-style arguments.
+
+Usage:
+    python scripts/benchmarks/bench_logging.py --segments 100000
+"""
+
+import argparse
+import io
+import logging
+import timeit
+
+import coloredlogs
+
+from radicl.ui_tools import get_logger
+
+FMT = '%(name)s %(levelname)s %(message)s'
+
+
+def legacy_get_logger(name, debug=False, stream=None):
+    """
+    The original get_logger
+    """
+    log = logging.getLogger(name)
+    level = 'DEBUG' if debug else 'INFO'
+    coloredlogs.install(fmt=FMT, level=level, logger=log, stream=stream)
+    return log
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument('--segments', type=int, default=100000, help='Number of segments logged')
+    parser.add_argument('--loggers', type=int, default=200, help='Number of get_logger calls timed')
+    args = parser.parse_args()
+    sink = io.StringIO()
+
+    print("get_logger:")
+    legacy = min(timeit.repeat(lambda: legacy_get_logger('bench.legacy', stream=sink), number=args.loggers, repeat=3))
+    current = min(timeit.repeat(lambda: get_logger('bench.current'), number=args.loggers, repeat=3))
+    print(f"\tLegacy:  {legacy / args.loggers * 1e6:0.1f} us/call")
+    print(f"\tCurrent: {current / args.loggers * 1e6:0.1f} us/call")
+    print(f"\tSpeedup: {legacy / current:0.1f}x")
+
+    for debug in [False, True]:
+        # A debug probe created first leaves the original logger at the debug level
+        legacy_get_logger('bench.legacy', debug=True, stream=sink)
+        legacy_log = legacy_get_logger('bench.legacy', debug=debug, stream=sink)
+        log = get_logger('bench.current', debug=debug)
+        log.handlers[-1].setStream(sink)
+
+        def legacy_segment(segment=1234, delay=0.004):
+            legacy_log.debug(f"Data Error: Segment ID={segment:d}, COM Delay = {delay}s")
+
+        def current_segment(segment=1234, delay=0.004):
+            log.debug("Data Error: Segment ID=%d, COM Delay = %ss", segment, delay)
+
+        legacy = min(timeit.repeat(legacy_segment, number=args.segments, repeat=3))
+        current = min(timeit.repeat(current_segment, number=args.segments, repeat=3))
+        print(f"Per segment debug message, debug {'on' if debug else 'off'}:")
+        print(f"\tLegacy:  {legacy / args.segments * 1e9:0.0f} ns/segment")
+        print(f"\tCurrent: {current / args.segments * 1e9:0.0f} ns/segment")
+        print(f"\tSpeedup: {legacy / current:0.1f}x")
+        sink.seek(0)
+        sink.truncate()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,128 @@
+"""
+Benchmark encoding requests and decoding responses with the protocol codec
+against building lists per call and checking responses with the original
+separate predicates.
+
+Usage:
+    python scripts/benchmarks/bench_protocol.py --number 200000
+"""
+
+import argparse
+import timeit
+
+import serial
+
+from radicl.commands import MeasCMD
+from radicl.protocol import FrameEncoder, MessageType, evaluate_response, request_frame
+
+
+def legacy_is_response(message, cmd=None, data_len=None):
+    valid = 0
+    length = len(message)
+    if length >= 5:
+        if message[2] == 0x02 or cmd == 79:
+            calc_len = message[4] + 5
+            if message[1] == cmd:
+                valid = 1
+            if (data_len is not None) and (data_len != 0):
+                if message[4] == data_len:
+                    valid = valid * 1
+            if length == calc_len:
+                valid = valid * 1
+            else:
+                valid = 0
+        elif (message[2] == 0x06) and (length == 261):
+            valid = 1
+    return valid
+
+
+def legacy_is_push_message(message, cmd=None, data_len=None):
+    length = len(message)
+    if length >= 5:
+        calc_len = message[4] + 5
+        if cmd is not None and message[1] != cmd:
+            return 0
+        if data_len is not None and message[4] != data_len:
+            return 0
+        return int(message[2] == 0x03 and length == calc_len)
+    return 0
+
+
+def legacy_num_payload_bytes(message):
+    if message[2] == 0x02 or message[2] == 0x03:
+        return message[4]
+    elif message[2] == 0x06:
+        return 256
+    return 0
+
+
+def legacy_evaluate(response, cmd, n):
+    """
+    The original RAD_API.__EvaluateAndReturn
+    """
+    if response is None:
+        return {'status': 0, 'errorCode': None, 'data': None}
+    elif legacy_is_response(response, cmd, n):
+        return {'status': 1, 'errorCode': None, 'data': response[-(legacy_num_payload_bytes(response)):]}
+    elif legacy_is_push_message(response, cmd, n):
+        return {'status': 1, 'errorCode': None, 'data': response[-(legacy_num_payload_bytes(response)):]}
+    elif len(response) >= 5 and response[2] == 0x04:
+        return {'status': 1, 'errorCode': None, 'data': None}
+    elif len(response) >= 5 and response[2] == 0x05:
+        value = int.from_bytes(response[5:7], byteorder='little') if len(response) >= 7 else 0
+        return {'status': 0, 'errorCode': value, 'data': None}
+    return {'status': 0, 'errorCode': None, 'data': None}
+
+
+def legacy_segment_request(buffer_id, segment):
+    code = MeasCMD.DATA_SEGMENT.cmd
+    message = [0x9F, code, 0x00, 0x00, 0x05]
+    message.extend(buffer_id.to_bytes(1, byteorder='little'))
+    message.extend(segment.to_bytes(4, byteorder='little'))
+    return serial.to_bytes(message)
+
+
+def legacy_state_request():
+    return serial.to_bytes([0x9F, MeasCMD.STATE.cmd, 0x00, 0x00, 0x00])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument('--number', type=int, default=200000, help='Number of calls timed per case')
+    args = parser.parse_args()
+
+    encoder = FrameEncoder()
+    code = MeasCMD.DATA_SEGMENT.cmd
+    segment_response = bytes([0x9F, code, 0x06, 0x00, 0x00]) + bytes(256)
+    state_response = bytes([0x9F, MeasCMD.STATE.cmd, 0x02, 0x00, 0x01, 0x03])
+
+    # Same bytes either way
+    assert bytes(encoder.encode(code, 'BI', 0, 1234, msg_type=MessageType.REQUEST)) == \
+        legacy_segment_request(0, 1234)
+    assert request_frame(MeasCMD.STATE.cmd) == legacy_state_request()
+    for response, cmd, n in [(segment_response, code, 0), (state_response, MeasCMD.STATE.cmd, 1)]:
+        assert evaluate_response(response, cmd, n) == legacy_evaluate(response, cmd, n)
+
+    cases = {
+        'Encode fixed request': (legacy_state_request,
+                                 lambda: serial.to_bytes(request_frame(MeasCMD.STATE.cmd))),
+        'Encode segment request': (lambda: legacy_segment_request(0, 1234),
+                                   lambda: serial.to_bytes(encoder.encode(code, 'BI', 0, 1234,
+                                                                          msg_type=MessageType.REQUEST))),
+        'Decode segment response': (lambda: legacy_evaluate(segment_response, code, 0),
+                                    lambda: evaluate_response(segment_response, code, 0)),
+        'Decode state response': (lambda: legacy_evaluate(state_response, MeasCMD.STATE.cmd, 1),
+                                  lambda: evaluate_response(state_response, MeasCMD.STATE.cmd, 1)),
+    }
+
+    for name, (legacy, codec) in cases.items():
+        legacy_time = min(timeit.repeat(legacy, number=args.number, repeat=3))
+        codec_time = min(timeit.repeat(codec, number=args.number, repeat=3))
+        print(f"{name}:")
+        print(f"\tLegacy: {legacy_time / args.number * 1e9:0.0f} ns/call")
+        print(f"\tCodec:  {codec_time / args.number * 1e9:0.0f} ns/call")
+        print(f"\tSpeedup: {legacy_time / codec_time:0.1f}x")
+
+
+if __name__ == '__main__':
+    main()
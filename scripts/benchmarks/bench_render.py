@@ -0,0 +1,78 @@
+"""
+Benchmark how long the lyte_hi_res loop is held up by plotting each
+measurement: rendering the figure in the loop against handing it to the
+background renderer. Showing the plot in a window, as before, holds the
+loop for --plot_time seconds (10 by default) on top of the rendering.
+
+Usage:
+    python scripts/benchmarks/bench_render.py --measurements 4 --seconds 4
+"""
+
+import argparse
+import logging
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from radicl.plotting import BackgroundRenderer, save_hi_res
+from radicl.writers import write_profile
+
+
+def synthetic_profile(seconds, sample_rate=16000):
+    n = int(seconds * sample_rate)
+    t = np.arange(n) / sample_rate
+    moving = (t > seconds / 4) & (t < 3 * seconds / 4)
+    acceleration = np.full(n, -1.0)
+    acceleration[np.abs(t - seconds / 4) < 0.05] = -1.5
+    acceleration[np.abs(t - 3 * seconds / 4) < 0.05] = -0.5
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({'Sensor1': np.where(moving, 2000.0, 100.0) + rng.normal(0, 20, n),
+                       'Sensor2': np.full(n, 300.0), 'Sensor3': np.where(moving, 2500.0, 1200.0),
+                       'Sensor4': np.zeros(n), 'depth': -np.cumsum(moving) / sample_rate * 50,
+                       'X-Axis': np.zeros(n), 'Y-Axis': acceleration, 'Z-Axis': np.zeros(n)},
+                      index=pd.Index(t, name='time'))
+    meta = {'RECORDED': '2024-01-01--12:00:00', 'Serial Num.': 'ABC123', 'ACC. Range': '16'}
+    return df, meta
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument('--measurements', type=int, default=4, help='Number of measurements plotted')
+    parser.add_argument('--seconds', type=float, default=4, help='Length of each profile in seconds at 16 kHz')
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+
+    df, meta = synthetic_profile(args.seconds)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        files = [write_profile(df, meta, os.path.join(tmp, f'profile_{i}.csv')) for i in range(args.measurements)]
+
+        held = []
+        for f in files:
+            t0 = time.perf_counter()
+            save_hi_res(f, f.replace('.csv', '_inline.png'))
+            held.append(time.perf_counter() - t0)
+        inline = np.mean(held)
+
+        renderer = BackgroundRenderer()
+        held = []
+        t_start = time.perf_counter()
+        for f in files:
+            t0 = time.perf_counter()
+            renderer.submit(f, f.replace('.csv', '_background.png'))
+            held.append(time.perf_counter() - t0)
+        renderer.close()
+        total = time.perf_counter() - t_start
+        background = np.mean(held)
+
+    print(f"Loop held up per measurement of {len(df):,} samples:")
+    print(f"\tRendered in the loop: {inline * 1000:0.0f} ms")
+    print(f"\tBackground renderer:  {background * 1000:0.2f} ms "
+          f"(all {args.measurements} rendered {total:0.1f} s after the first was queued)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+"""
+Compare the response latency of the frame aware reader in RAD_API against
+the original sleep polling send/receive using a loopback stand in port.
+Prints a latency histogram and the number of truncated responses.
+
+Usage:
+    python scripts/benchmarks/bench_send_receive.py --requests 200
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from radicl.api import RAD_API
+from radicl.protocol import frame_length
+
+from loopback import LoopbackPort
+
+BINS = [0, 0.5, 1, 2, 3, 5, 10, 20, 50, np.inf]
+
+
+def legacy_send_receive(port, data, read_delay=0.05):
+    """
+    The original RAD_API.__send_receive
+    """
+    delay_counter = 0.001
+    port.writePort(data)
+    time.sleep(0.001)
+    ret = port.readPort(port.numBytesInBuffer())
+    while not ret and delay_counter < read_delay:
+        time.sleep(delay_counter)
+        delay_counter += 0.001
+        ret = port.readPort(port.numBytesInBuffer())
+    return ret
+
+
+def print_histogram(name, latencies, truncated):
+    latencies = np.array(latencies) * 1000
+    counts, _ = np.histogram(latencies, bins=BINS)
+    print(f"\n{name}: median {np.median(latencies):0.2f}ms, "
+          f"p99 {np.percentile(latencies, 99):0.2f}ms, truncated responses {truncated}")
+    scale = 50 / max(counts.max(), 1)
+    for lo, hi, count in zip(BINS[:-1], BINS[1:], counts):
+        label = f"{lo:>4}-{hi:<4} ms" if np.isfinite(hi) else f"{lo:>4}+     ms"
+        print(f"\t{label} {count:5d} {'#' * int(count * scale)}")
+
+
+def run(port, requests, legacy, message):
+    api = RAD_API(port)
+    read = api.getMeasState if message[1] == 0x40 else lambda: api.MeasReadDataSegment(0, 0)
+    latencies = []
+    truncated = 0
+
+    for _ in range(requests):
+        t0 = time.perf_counter()
+        if legacy:
+            response = legacy_send_receive(port, message)
+            complete = len(response) >= 5 and len(response) == frame_length(response)
+        else:
+            complete = read()['status'] == 1
+        latencies.append(time.perf_counter() - t0)
+        truncated += int(not complete)
+
+        # Let any straggling packets land before the next request
+        time.sleep(0.005)
+        port.readPort(port.numBytesInBuffer())
+
+    return latencies, truncated
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument('--requests', type=int, default=200, help='Number of requests per scenario')
+    parser.add_argument('--latency', type=float, default=0.0005, help='Simulated probe latency in seconds')
+    args = parser.parse_args()
+
+    port = LoopbackPort(latency=args.latency, buffers={0: bytes(256)})
+    scenarios = {'State query (6 bytes)': [0x9F, 0x40, 0x00, 0x00, 0x00],
+                 'Data segment (261 bytes)': [0x9F, 0x45, 0x00, 0x00, 0x05, 0, 0, 0, 0, 0]}
+
+    for scenario, message in scenarios.items():
+        print(f"\n===== {scenario} =====")
+        for legacy in [True, False]:
+            name = 'Sleep polling' if legacy else 'Frame reader'
+            latencies, truncated = run(port, args.requests, legacy, message)
+            print_histogram(name, latencies, truncated)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+"""
+Benchmark reading every probe setting one request at a time, like
+print_settings did, against the batched read of the settings cache
+using a loopback stand in port.
+
+Usage:
+    python scripts/benchmarks/bench_settings.py --latency 0.005
+"""
+
+import argparse
+import time
+
+from radicl.api import RAD_API
+from radicl.cache import ProbeSettingsCache
+from radicl.probe import RAD_Probe
+
+from loopback import LoopbackPort
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument('--latency', type=float, default=0.005, help='Seconds before the probe answers a request')
+    args = parser.parse_args()
+
+    responses = {code: (1).to_bytes(n, byteorder='little') for code, n, _ in ProbeSettingsCache.settings.values()}
+    # State, hardware id and revisions, serial number and full firmware revision
+    responses.update({0x40: b'\x00', 0x01: b'\x01', 0x02: b'\x01', 0x03: b'\x01\x00', 0x04: bytes(range(8)),
+                      0x09: b'\x01\x02\x03\x04'})
+    port = LoopbackPort(latency=args.latency, responses=responses)
+    api = RAD_API(port)
+    probe = RAD_Probe(ext_api=api)
+
+    # Identify the probe first, the snapshot is kept by serial and firmware
+    ProbeSettingsCache.key(probe)
+
+    # Every setting requested and waited on in turn
+    t0 = time.perf_counter()
+    legacy = {}
+    for name in ProbeSettingsCache.settings:
+        ret = probe.getters[name]()
+        legacy[name] = ret.data
+    legacy_time = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    settings = probe.getAllSettings()
+    batch_time = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    probe.getAllSettings()
+    cached_time = time.perf_counter() - t0
+
+    assert all(v is not None for v in settings.values())
+    print(f"Reading {len(settings)} settings with {args.latency * 1000:0.1f} ms latency:")
+    print(f"\tOne at a time: {legacy_time * 1000:0.1f} ms")
+    print(f"\tBatched:       {batch_time * 1000:0.1f} ms")
+    print(f"\tCached:        {cached_time * 1000:0.3f} ms")
+    print(f"\tSpeedup: {legacy_time / batch_time:0.1f}x")
+
+
+if __name__ == '__main__':
+    main()
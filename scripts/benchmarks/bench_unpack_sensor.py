@@ -0,0 +1,76 @@
+"""
+Benchmark the vectorized sensor decoder against the original per value
+struct loop on a synthetic raw sensor buffer.
+
+Usage:
+    python scripts/benchmarks/bench_unpack_sensor.py --samples 1000000
+"""
+
+import argparse
+import struct
+import time
+
+import numpy as np
+
+from radicl.decode import decode_buffer
+from radicl.info import SensorReadInfo
+
+
+def legacy_unpack(data, sensor):
+    """
+    The original RAD_Probe.unpack_sensor loop without the dataframe
+    """
+    offset = 0
+    final = {name: [] for name in sensor.data_names}
+    unpack_bytes = sensor.unpack_type is not None
+    convert = sensor.conversion_factor is not None
+    samples = len(data) // sensor.bytes_per_sample
+
+    for ii in range(0, samples):
+        for idx, name in enumerate(sensor.data_names):
+            byte_idx = idx * sensor.nbytes_per_value + offset
+            if unpack_bytes:
+                byte_list = data[byte_idx: (byte_idx + sensor.nbytes_per_value)]
+                value = struct.unpack(sensor.unpack_type, bytes(byte_list))[0]
+            else:
+                value = data[byte_idx] + data[byte_idx + 1] * sensor.bytes_per_segment
+            if convert:
+                value *= sensor.conversion_factor
+            final[name].append(value)
+        offset += sensor.nbytes_per_value * sensor.expected_values
+    return final
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument('--samples', type=int, default=1000000, help='Number of samples in the synthetic buffer')
+    parser.add_argument('--sensor', default='rawsensor', help='Data request name of the sensor to decode')
+    args = parser.parse_args()
+
+    sensor = SensorReadInfo.from_data_request(args.sensor)
+    rng = np.random.default_rng(0)
+    payload = rng.integers(0, 256, args.samples * sensor.bytes_per_sample, dtype=np.uint8)
+
+    # The legacy loop received a list of ints
+    data_list = payload.tolist()
+    t0 = time.perf_counter()
+    legacy = legacy_unpack(data_list, sensor)
+    legacy_time = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    vectorized = decode_buffer(payload.tobytes(), sensor, accelerometer_range=16)
+    vector_time = time.perf_counter() - t0
+
+    # The legacy loop does not scale the accelerometer, skip the comparison
+    if sensor != SensorReadInfo.ACCELEROMETER:
+        for name in sensor.data_names:
+            np.testing.assert_allclose(vectorized[name], legacy[name])
+
+    print(f"{sensor.readable_name}: {args.samples:,} samples")
+    print(f"\tLegacy loop: {legacy_time:0.3f}s")
+    print(f"\tVectorized:  {vector_time:0.3f}s")
+    print(f"\tSpeedup:     {legacy_time / vector_time:0.0f}x")
+
+
+if __name__ == '__main__':
+    main()
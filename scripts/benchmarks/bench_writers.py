@@ -0,0 +1,63 @@
+"""
+Benchmark writing and reading back a hi resolution profile with each of the
+output formats in radicl.writers, using a synthetic profile shaped like the
+lyte_hi_res output.
+
+Usage:
+    python scripts/benchmarks/bench_writers.py --seconds 30
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from radicl.writers import WRITERS, write_profile, read_profile
+
+
+def synthetic_profile(seconds, sample_rate=16000):
+    n = int(seconds * sample_rate)
+    rng = np.random.default_rng(0)
+    columns = ['Sensor1', 'Sensor2', 'Sensor3', 'Sensor4', 'depth', 'X-Axis', 'Y-Axis', 'Z-Axis']
+    df = pd.DataFrame({c: rng.random(n) * 4096 for c in columns},
+                      index=pd.Index(np.arange(n) / sample_rate, name='time'))
+    meta = {'RECORDED': '2024-01-01--12:00:00', 'radicl VERSION': '0.12.2', 'Serial Num.': 'ABC123',
+            'ACC. Range': '16'}
+    return df, meta
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument('--seconds', type=float, default=30, help='Length of the profile in seconds at 16 kHz')
+    args = parser.parse_args()
+
+    df, meta = synthetic_profile(args.seconds)
+    print(f"Profile of {len(df):,} samples and {len(df.columns)} columns:")
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for fmt in WRITERS:
+            t0 = time.perf_counter()
+            filename = write_profile(df, meta, os.path.join(tmp, 'profile'), fmt=fmt)
+            write_time = time.perf_counter() - t0
+
+            t0 = time.perf_counter()
+            read_profile(filename)
+            read_time = time.perf_counter() - t0
+
+            mb = os.path.getsize(filename) / 1e6
+            results[fmt] = (write_time, read_time)
+            print(f"\t{fmt}: {mb:0.1f} MB, write {write_time * 1000:0.0f} ms ({mb / write_time:0.0f} MB/s), "
+                  f"read {read_time * 1000:0.0f} ms ({mb / read_time:0.0f} MB/s)")
+
+    for fmt, (write_time, read_time) in results.items():
+        if fmt != 'csv':
+            print(f"\t{fmt} speedup over csv: write {results['csv'][0] / write_time:0.1f}x, "
+                  f"read {results['csv'][1] / read_time:0.1f}x")
+
+
+if __name__ == '__main__':
+    main()
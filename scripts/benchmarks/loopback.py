@@ -0,0 +1,111 @@
+"""
+Loopback stand in for RAD_Serial used by the benchmarks. Requests are
+answered like a probe from a background thread after a simulated latency
+and responses are delivered in USB sized packets. Reads block like a
+pyserial port with a timeout.
+"""
+
+import queue
+import threading
+import time
+
+from radicl.protocol import split_frames
+
+
+class LoopbackPort:
+    """
+    Args:
+        latency: Seconds between a request and the first packet of the response
+        packet_size: Number of bytes delivered at once
+        packet_gap: Seconds between packets of the same response
+        read_timeout: Seconds a read blocks waiting on bytes, like pyserial
+        buffers: Dictionary of buffer_id to bytes stored on the probe
+        responses: Dictionary of command code to response payload bytes
+        nacks: Dictionary of command code to the error code rejecting every request of it
+    """
+    def __init__(self, latency=0.002, packet_size=64, packet_gap=0.0002, read_timeout=0.01,
+                 buffers=None, responses=None, nacks=None):
+        self.latency = latency
+        self.packet_size = packet_size
+        self.packet_gap = packet_gap
+        self.read_timeout = read_timeout
+        self.buffers = buffers or {}
+        self.responses = responses or {0x40: b'\x00'}
+        self.nacks = nacks or {}
+
+        self._rx = bytearray()
+        self._cv = threading.Condition()
+        self._requests = queue.Queue()
+        self._thread = threading.Thread(target=self._respond, daemon=True)
+        self._thread.start()
+
+    def _answer(self, data):
+        cmd = data[1]
+        if cmd in self.nacks:
+            return bytes([0x9F, cmd, 0x05, 0x00, 0x02]) + self.nacks[cmd].to_bytes(2, byteorder='little')
+
+        elif cmd == 0x44:
+            n_segments = -(-len(self.buffers.get(data[5], b'')) // 256)
+            return self._response(cmd, n_segments.to_bytes(4, byteorder='little'))
+
+        elif cmd == 0x45:
+            segment = int.from_bytes(data[6:10], byteorder='little')
+            chunk = self.buffers[data[5]][segment * 256:(segment + 1) * 256]
+            if len(chunk) == 256:
+                return bytes([0x9F, cmd, 0x06, 0x00, 0x00]) + chunk
+            return self._response(cmd, chunk)
+
+        elif cmd in self.responses:
+            return self._response(cmd, self.responses[cmd])
+
+        return bytes([0x9F, cmd, 0x04, 0x00, 0x00])
+
+    @staticmethod
+    def _response(cmd, payload):
+        return bytes([0x9F, cmd, 0x02, 0x00, len(payload)]) + bytes(payload)
+
+    def _respond(self):
+        while True:
+            received, data = self._requests.get()
+            frame = self._answer(data)
+            delay = received + self.latency - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+
+            for i in range(0, len(frame), self.packet_size):
+                with self._cv:
+                    self._rx.extend(frame[i:i + self.packet_size])
+                    self._cv.notify_all()
+                if self.packet_gap:
+                    time.sleep(self.packet_gap)
+
+    def openPort(self, com_port=None):
+        pass
+
+    def closePort(self):
+        pass
+
+    def flushPort(self):
+        pass
+
+    def writePort(self, data):
+        data = bytes(data)
+        received = time.perf_counter()
+        # Requests written at once are answered in order
+        for frame in split_frames(bytearray(data)) or [data]:
+            self._requests.put((received, frame))
+        return len(data)
+
+    def readPort(self, numBytes=None):
+        with self._cv:
+            if numBytes is None:
+                numBytes = len(self._rx)
+            else:
+                self._cv.wait_for(lambda: len(self._rx) >= numBytes, timeout=self.read_timeout)
+            result = bytes(self._rx[:numBytes])
+            del self._rx[:len(result)]
+        return result
+
+    def numBytesInBuffer(self):
+        with self._cv:
+            return len(self._rx)
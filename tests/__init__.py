@@ -1,4 +1,5 @@
 from radicl.probe import RAD_Probe
+from radicl.protocol import split_frames
 import pandas as pd
 import numpy as np
 from radicl.gps import USBGPS
@@ -82,6 +83,82 @@ class MockRADPort:
         return len(self.payload)
 
 
+class MockProbePort(MockRADPort):
+    """
+    Port that answers API requests like a probe. Data buffers are served
+    by segment and any other command is answered with the payload in
+    responses or an ACK.
+
+    Args:
+        buffers: Dictionary of buffer_id to bytes stored on the probe
+        responses: Dictionary of command code to response payload bytes
+    """
+    # Hardware ID, HW revision, FW revision, full FW revision and serial number
+    attributes = {0x01: bytes([1]), 0x02: bytes([1]), 0x03: bytes([1, 0]), 0x09: bytes([1, 2, 3, 4]),
+                  0x04: bytes(range(8))}
+
+    def __init__(self, buffers=None, responses=None):
+        self.buffers = buffers or {}
+        self.responses = {**self.attributes, **(responses or {})}
+        self.rx = bytearray()
+        self.requests = []
+
+    def writePort(self, data):
+        data = bytes(data)
+
+        # Requests written at once are answered in order
+        frames = split_frames(bytearray(data))
+        if len(frames) > 1:
+            for frame in frames:
+                self.writePort(frame)
+            return len(data)
+
+        self.requests.append(data)
+
+        # The API port enable byte is not answered
+        if data[0] != 0x9F:
+            return len(data)
+
+        cmd = data[1]
+
+        # Number of segments
+        if cmd == 0x44:
+            n_segments = -(-len(self.buffers.get(data[5], b'')) // 256)
+            frame = self.response_frame(cmd, n_segments.to_bytes(4, byteorder='little'))
+
+        # Data segment
+        elif cmd == 0x45:
+            segment = int.from_bytes(data[6:10], byteorder='little')
+            chunk = self.buffers[data[5]][segment * 256:(segment + 1) * 256]
+            if len(chunk) == 256:
+                frame = bytes([0x9F, cmd, 0x06, 0x00, 0x00]) + chunk
+            else:
+                frame = self.response_frame(cmd, chunk)
+
+        elif cmd in self.responses:
+            frame = self.response_frame(cmd, self.responses[cmd])
+
+        else:
+            frame = bytes([0x9F, cmd, 0x04, 0x00, 0x00])
+
+        self.rx.extend(frame)
+        return len(data)
+
+    @staticmethod
+    def response_frame(cmd, payload):
+        return bytes([0x9F, cmd, 0x02, 0x00, len(payload)]) + bytes(payload)
+
+    def readPort(self, nbytes=None):
+        if nbytes is None:
+            nbytes = len(self.rx)
+        result = bytes(self.rx[:nbytes])
+        del self.rx[:nbytes]
+        return result
+
+    def numBytesInBuffer(self):
+        return len(self.rx)
+
+
 class MockProbe:
     pass
 
@@ -120,6 +197,26 @@ class MOCKCLI:
         return result
 
 
+def synthetic_profile(seconds=2, sample_rate=16000):
+    """
+    Profile of a probe still for a quarter of the time, pushed down through
+    the snow and still again
+    """
+    n = int(seconds * sample_rate)
+    t = np.arange(n) / sample_rate
+    moving = (t > seconds / 4) & (t < 3 * seconds / 4)
+    acceleration = np.full(n, -1.0)
+    acceleration[np.abs(t - seconds / 4) < 0.05] = -1.5
+    acceleration[np.abs(t - 3 * seconds / 4) < 0.05] = -0.5
+    df = pd.DataFrame({'Sensor1': np.where(moving, 2000.0, 100.0), 'Sensor2': np.full(n, 300.0),
+                       'Sensor3': np.where(moving, 2500.0, 1200.0), 'Sensor4': np.zeros(n),
+                       'depth': -np.cumsum(moving) / sample_rate * 50,
+                       'X-Axis': np.zeros(n), 'Y-Axis': acceleration, 'Z-Axis': np.zeros(n)},
+                      index=pd.Index(t, name='time'))
+    meta = {'RECORDED': '2024-01-01--12:00:00', 'Serial Num.': 'ABC123', 'ACC. Range': '16'}
+    return df, meta
+
+
 class MockGPSStream:
     def __init__(self, payload):
         self.payload = payload
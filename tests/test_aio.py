@@ -0,0 +1,162 @@
+import asyncio
+import itertools
+import socket
+
+import numpy as np
+import pytest
+
+from radicl.aio import AsyncRAD_API, AsyncRAD_Probe
+from radicl.info import ProbeState, SensorReadInfo
+from radicl.probe import RAD_Probe
+
+from . import MockProbePort
+
+
+async def serve(port, reader, writer, delays=None):
+    """
+    Answer requests arriving on a stream with a mock probe port, the
+    requests numbered in delays are answered after that many seconds
+    """
+    delays = delays or {}
+    try:
+        for i in itertools.count():
+            header = await reader.readexactly(5)
+            payload = await reader.readexactly(header[4])
+            port.writePort(header + payload)
+            if i in delays:
+                await asyncio.sleep(delays[i])
+            writer.write(port.readPort())
+            await writer.drain()
+    except asyncio.IncompleteReadError:
+        pass
+
+
+async def open_probe(port, delays=None):
+    """
+    Connect an AsyncRAD_Probe to a mock probe port through a socket pair.
+    Returns the probe and a coroutine function to close the connection.
+    """
+    probe_sock, client_sock = socket.socketpair()
+    probe_reader, probe_writer = await asyncio.open_connection(sock=probe_sock)
+    reader, writer = await asyncio.open_connection(sock=client_sock)
+    server = asyncio.create_task(serve(port, probe_reader, probe_writer, delays=delays))
+
+    async def close():
+        writer.close()
+        probe_writer.close()
+        await server
+
+    return AsyncRAD_Probe(AsyncRAD_API(reader, writer)), close
+
+
+def run_with_probe(port, test):
+    """
+    Run a coroutine taking an AsyncRAD_Probe against a mock probe port
+    """
+    async def main():
+        probe, close = await open_probe(port)
+        try:
+            return await test(probe)
+        finally:
+            await close()
+
+    return asyncio.run(main())
+
+
+@pytest.fixture()
+def buffer():
+    return (np.arange(256 * 4) % 251).astype(np.uint8).tobytes()
+
+
+@pytest.fixture()
+def port(buffer):
+    return MockProbePort(buffers={SensorReadInfo.RAWSENSOR.buffer_id: buffer},
+                         responses={0x40: bytes([ProbeState.DATA_STAGED.value]),
+                                    0x46: (16000).to_bytes(4, byteorder='little'),
+                                    0x04: bytes(range(8))})
+
+
+def test_getMeasState(port):
+    async def test(probe):
+        return await probe.api.getMeasState()
+
+    ret = run_with_probe(port, test)
+    assert ret['status'] == 1
+    assert ret['data'] == bytes([ProbeState.DATA_STAGED.value])
+
+
+def test_getProbeSerial(port):
+    async def test(probe):
+        return await probe.getProbeSerial()
+
+    assert run_with_probe(port, test) == '0706050403020100'
+
+
+def test_wait_for_state(port):
+    async def test(probe):
+        return await probe.wait_for_state(ProbeState.DATA_STAGED, delay=0)
+
+    assert run_with_probe(port, test)
+
+
+def test_read_buffer(port, buffer):
+    async def test(probe):
+        return await probe.read_buffer(SensorReadInfo.RAWSENSOR)
+
+    assert bytes(run_with_probe(port, test)) == buffer
+
+
+def test_MeasReadDataSegment_late_response(port, buffer):
+    """
+    An answer arriving after its request timed out is not returned as the
+    response to the next request
+    """
+    async def main():
+        probe, close = await open_probe(port, delays={0: 0.05})
+        try:
+            first = await probe.api.MeasReadDataSegment(SensorReadInfo.RAWSENSOR.buffer_id, 0, timeout=0.01)
+            # Let the late answer land
+            await asyncio.sleep(0.1)
+            second = await probe.api.MeasReadDataSegment(SensorReadInfo.RAWSENSOR.buffer_id, 1)
+            return first, second
+        finally:
+            await close()
+
+    first, second = asyncio.run(main())
+    assert first.status == 0
+    assert bytes(second.data) == buffer[256:512]
+
+
+def test_read_sensor_matches_probe(port, buffer):
+    """
+    Async downloads are decoded the same as the blocking probe
+    """
+    async def test(probe):
+        return await probe.readRawSensorData()
+
+    df = run_with_probe(port, test)
+
+    blocking = RAD_Probe()
+    blocking._sampling_rate = 16000
+    expected = blocking.unpack_sensor(buffer, SensorReadInfo.RAWSENSOR)
+    np.testing.assert_array_equal(df.to_numpy(), expected.to_numpy())
+    np.testing.assert_array_equal(df.index, expected.index)
+
+
+def test_concurrent_probes(buffer):
+    """
+    Many probes can be downloaded from on a single loop
+    """
+    ports = [MockProbePort(buffers={SensorReadInfo.RAWSENSOR.buffer_id: buffer}) for i in range(3)]
+
+    async def main():
+        connections = [await open_probe(p) for p in ports]
+        try:
+            return await asyncio.gather(*[probe.read_buffer(SensorReadInfo.RAWSENSOR)
+                                          for probe, close in connections])
+        finally:
+            for probe, close in connections:
+                await close()
+
+    for result in asyncio.run(main()):
+        assert bytes(result) == buffer
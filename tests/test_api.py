@@ -1,5 +1,5 @@
 import pytest
-from . import MockRADPort
+from . import MockRADPort, MockProbePort
 from radicl.api import RAD_API
 
 
@@ -39,3 +39,109 @@ class TestApi:
     def test_getFullFWREV(self, mock_api, payload, expected):
         ret = mock_api.getFullFWREV()
         assert ret['data'] == expected
+
+
+@pytest.mark.parametrize('n_segments, window', [
+    (10, 1),
+    (10, 4),
+    (3, 8),
+])
+def test_MeasReadDataSegments(n_segments, window):
+    payload = bytes(range(256)) * n_segments
+    port = MockProbePort(buffers={0: payload})
+    api = RAD_API(port)
+    result = dict(api.MeasReadDataSegments(0, range(n_segments), window=window))
+    assert b''.join(result[i] for i in range(n_segments)) == payload
+
+
+def test_MeasReadDataSegments_unanswered():
+    """
+    Segments that never get a response are dropped after their retries
+    """
+    port = MockProbePort(buffers={0: bytes(256)})
+    port.writePort = lambda data: 1
+    api = RAD_API(port)
+    result = list(api.MeasReadDataSegments(0, range(2), max_retry=2, timeout=0.01))
+    assert result == []
+
+
+@pytest.mark.parametrize('failure', ['nack', 'drop'])
+def test_MeasReadDataSegments_failed_middle(failure):
+    """
+    A segment NACKed or never answered while later ones still arrive does
+    not shift their payloads onto the wrong segments
+    """
+    n_segments = 10
+    payload = bytes(i % 251 for i in range(256 * n_segments))
+    port = MockProbePort(buffers={0: payload})
+    failed = []
+
+    def write(data):
+        segment = int.from_bytes(data[6:10], byteorder='little')
+        if data[1] == 0x45 and segment == 5 and not failed:
+            failed.append(segment)
+            if failure == 'nack':
+                port.rx.extend(bytes([0x9F, 0x45, 0x05, 0x01, 0x00]))
+            return len(data)
+        return MockProbePort.writePort(port, data)
+
+    port.writePort = write
+    api = RAD_API(port)
+    result = dict(api.MeasReadDataSegments(0, range(n_segments), window=4, timeout=0.01))
+    assert failed == [5]
+    assert b''.join(result[i] for i in range(n_segments)) == payload
+
+
+def test_batchRequest():
+    """
+    Requests are written at once and every one gets a result
+    """
+    port = MockProbePort(responses={0x46: (16000).to_bytes(4, byteorder='little'), 0x52: bytes([2])})
+    writes = []
+
+    def write(data):
+        writes.append(bytes(data))
+        # Never answer 0x47
+        if data[1] != 0x47:
+            return MockProbePort.writePort(port, data)
+
+    port.writePort = write
+    api = RAD_API(port)
+    result = api.batchRequest({0x46: 4, 0x52: 1, 0x47: 4}, timeout=0.05)
+
+    assert writes[0] == b'\x9f\x46\x00\x00\x00\x9f\x52\x00\x00\x00\x9f\x47\x00\x00\x00'
+    assert int.from_bytes(result[0x46].data, byteorder='little') == 16000
+    assert result[0x52].data == bytes([2])
+    assert result[0x47].status == 0
+
+
+class FragmentedPort(MockRADPort):
+    """
+    Port that only hands back a few bytes per read, like a slow link
+    """
+    def __init__(self, payload, chunk_size=1):
+        super().__init__(payload)
+        self.rx = bytearray(payload)
+        self.chunk_size = chunk_size
+
+    def readPort(self, nbytes):
+        result = bytes(self.rx[:min(nbytes, self.chunk_size)])
+        del self.rx[:len(result)]
+        return result
+
+    def numBytesInBuffer(self):
+        return 0
+
+
+@pytest.mark.parametrize('payload, chunk_size, expected', [
+    # Response arrives one byte at a time
+    (b'\x9f\x40\x02\x00\x01\x03', 1, b'\x03'),
+    # Unrelated push message ahead of the response is skipped
+    (b'\x9f\x01\x03\x00\x01\x07\x9f\x40\x02\x00\x01\x02', 3, b'\x02'),
+    # Incomplete response is never returned
+    (b'\x9f\x40\x02\x00\x01', 2, None),
+])
+def test_getMeasState_framing(payload, chunk_size, expected):
+    api = RAD_API(FragmentedPort(payload, chunk_size=chunk_size))
+    ret = api.getMeasState()
+    assert ret['data'] == expected
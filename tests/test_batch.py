@@ -0,0 +1,78 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from radicl.api import RAD_API
+from radicl.batch import find_profiles, output_folders, process_profile, run_batch
+from radicl.cache import RawArchive
+from radicl.high_resolution import HIGH_RESOLUTION_SENSORS
+from radicl.probe import RAD_Probe
+from radicl.writers import write_profile
+
+from . import MockProbePort, synthetic_profile
+
+
+@pytest.fixture()
+def season(tmp_path):
+    df, meta = synthetic_profile()
+    write_profile(df, meta, tmp_path.joinpath('profile_1.csv'))
+    write_profile(df, meta, tmp_path.joinpath('profile_1.npz'))
+    tmp_path.joinpath('nested').mkdir()
+    write_profile(df, meta, tmp_path.joinpath('nested', 'profile_2.npz'), fmt='csv')
+    tmp_path.joinpath('broken.npz').write_bytes(b'not a profile')
+
+    raw = (np.arange(256 * 4) % 251).astype(np.uint8).tobytes()
+    depth = np.linspace(100, 0, 30).astype('<f4').tobytes()
+    acc = np.arange(60, dtype='<i2').tobytes()
+    port = MockProbePort(buffers={0: raw, 4: depth, 1: acc},
+                         responses={0x46: (16000).to_bytes(4, byteorder='little'), 0x52: bytes([16])})
+    probe = RAD_Probe(ext_api=RAD_API(port))
+    probe.archive_sensors(RawArchive(tmp_path.joinpath('archive')), HIGH_RESOLUTION_SENSORS)
+    return tmp_path
+
+
+def test_find_profiles(season):
+    profiles = find_profiles([season], exclude=season.joinpath('archive'))
+    # The csv is preferred over the npz of the same profile
+    assert [p.name for p in profiles] == ['broken.npz', 'profile_2.csv', 'profile_1.csv']
+
+    profiles = find_profiles([season])
+    assert len(profiles) == 4
+    assert RawArchive.is_measurement(profiles[0])
+
+
+def test_process_profile_error(season, tmp_path):
+    summary = process_profile(season.joinpath('broken.npz'), tmp_path.joinpath('out'), image_format=None)
+    assert summary['error'] is not None
+
+
+def test_run_batch(season):
+    output = season.joinpath('out')
+    profiles = find_profiles([season], exclude=output)
+    summaries = run_batch(profiles, output, workers=2, chunksize=1, output_format='npz', image_format='png')
+
+    assert [s['file'] for s in summaries] == [str(p) for p in profiles]
+    errors = {s['file']: s['error'] for s in summaries}
+    # Failures are kept to their own file
+    assert errors[str(season.joinpath('broken.npz'))] is not None
+    assert errors[str(season.joinpath('profile_1.csv'))] is None
+
+    summary = summaries[profiles.index(season.joinpath('profile_1.csv'))]
+    assert summary['samples'] == 32000
+    assert output.joinpath('profile_1.png').is_file()
+    # Raw archive measurements are rebuilt in the output format
+    assert summaries[0]['output'].endswith('.npz')
+    # Profiles in sub folders keep their folder
+    assert output.joinpath('nested', 'profile_2.png').is_file()
+
+
+def test_output_folders(tmp_path):
+    """
+    Profiles sharing a name in different folders get their own outputs
+    """
+    paths = [tmp_path.joinpath('2023', 'site', 'profile.csv'), tmp_path.joinpath('2024', 'site', 'profile.csv'),
+             tmp_path.joinpath('2024', 'profile.csv')]
+    output = tmp_path.joinpath('out')
+    assert output_folders(paths, output) == [output.joinpath('2023', 'site'), output.joinpath('2024', 'site'),
+                                             output.joinpath('2024')]
+    assert output_folders(paths[:1], output) == [output]
@@ -0,0 +1,192 @@
+import struct
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from radicl.api import RAD_API
+from radicl.cache import CaptureCache, IdentityCache, ProbeSettingsCache
+from radicl.info import ProbeState, SensorReadInfo
+from radicl.probe import RAD_Probe
+
+from . import MockProbePort
+
+
+@pytest.fixture()
+def cache(tmp_path):
+    return CaptureCache(tmp_path)
+
+
+@pytest.fixture()
+def payload():
+    return struct.pack('<300h', *range(-150, 150))
+
+
+@pytest.fixture()
+def probe(cache, payload):
+    port = MockProbePort(buffers={SensorReadInfo.ACCELEROMETER.buffer_id: payload},
+                         responses={0x04: bytes(range(8))})
+    probe = RAD_Probe(ext_api=RAD_API(port), capture_cache=cache)
+    probe._sampling_rate = 16000
+    probe._accelerometer_range = 16
+    return probe
+
+
+def test_save_load(cache, payload):
+    path = cache.save(payload, SensorReadInfo.ACCELEROMETER, sampling_rate=16000, serial='ABC')
+    data, meta = cache.load(path)
+    assert isinstance(data, np.memmap)
+    assert data.tobytes() == payload
+    assert meta['sensor'] == 'ACCELEROMETER'
+    assert meta['serial'] == 'ABC'
+    assert meta['bytes'] == len(payload)
+
+
+def test_save_unique(cache, payload):
+    paths = [cache.save(payload, SensorReadInfo.ACCELEROMETER) for i in range(3)]
+    assert len(set(paths)) == 3
+    assert cache.captures() == sorted(paths)
+    assert cache.captures(SensorReadInfo.RAWSENSOR) == []
+
+
+def test_load_empty(cache):
+    data, meta = cache.load(cache.save(b'', SensorReadInfo.RAWSENSOR))
+    assert data.size == 0
+
+
+def test_decode_matches_probe(cache, probe):
+    """
+    Cached downloads decode the same as the data returned from the probe
+    """
+    df = probe.readRawAccelerationData()
+    path = cache.captures()[0]
+    pd.testing.assert_frame_equal(cache.decode(path), df)
+    assert cache.load_meta(path)['complete']
+    assert cache.load_meta(path)['serial'] == '0706050403020100'
+
+
+def test_incomplete_download_cached(cache, probe, payload):
+    """
+    Downloads failing the integrity check are still kept
+    """
+    probe.api.port.buffers[SensorReadInfo.ACCELEROMETER.buffer_id] = payload[:-1]
+    assert probe.readRawAccelerationData() is None
+    meta = cache.load_meta(cache.captures()[0])
+    assert not meta['complete']
+    assert meta['bytes'] == len(payload) - 1
+
+
+class TestProbeSettingsCache:
+    @pytest.fixture()
+    def port(self):
+        # Every setting reads 1 unless given
+        responses = {code: (1).to_bytes(n, byteorder='little') for code, n, _ in ProbeSettingsCache.settings.values()}
+        responses.update({0x46: (16000).to_bytes(4, byteorder='little'), 0x47: (50).to_bytes(4, byteorder='little'),
+                          0x52: bytes([16]), 0x4F: (-3).to_bytes(4, byteorder='little', signed=True)})
+        return MockProbePort(responses=responses)
+
+    @pytest.fixture()
+    def probe(self, port):
+        probe = RAD_Probe(ext_api=RAD_API(port))
+        # Identify the probe before counting requests
+        ProbeSettingsCache.key(probe)
+        port.requests.clear()
+        return probe
+
+    @staticmethod
+    def setting_requests(port):
+        return [r[1] for r in port.requests if r[1] in [c for c, _, _ in ProbeSettingsCache.settings.values()]]
+
+    def test_snapshot(self, probe, port):
+        settings = probe.getAllSettings()
+        assert settings['samplingrate'] == 16000
+        assert settings['zpfo'] == 50
+        assert settings['accrange'] == 16
+        assert settings['temp'] == -3
+        assert len(self.setting_requests(port)) == len(ProbeSettingsCache.settings)
+
+        # Served from memory afterwards
+        port.requests.clear()
+        assert probe.getAllSettings() == settings
+        assert probe.getSetting(setting_name='zpfo') == 50
+        assert probe.getProbeHeader()['Baro Temp.'] == -3
+        assert self.setting_requests(port) == []
+
+    def test_set_setting_invalidates(self, probe, port):
+        probe.getAllSettings()
+        port.requests.clear()
+
+        assert probe.setSetting(setting_name='zpfo', value=60)
+        port.responses[0x47] = (60).to_bytes(4, byteorder='little')
+        assert probe.getAllSettings()['zpfo'] == 60
+
+        # Only the setting changed was read again
+        assert self.setting_requests(port) == [0x47, 0x47]
+
+    def test_keyed_by_probe(self, probe, port):
+        cache = probe.settings_cache
+        probe.getAllSettings()
+
+        other = RAD_Probe(ext_api=RAD_API(MockProbePort(responses={0x04: bytes(8), 0x46: bytes(4)})),
+                          settings_cache=cache)
+        assert other.getSetting(setting_name='samplingrate') == 0
+        assert probe.getSetting(setting_name='samplingrate') == 16000
+
+
+class USBProbePort(MockProbePort):
+    """Mock port opened by RAD_Probe.connect on a USB device"""
+    usb_id = '205E3258'
+
+    def openPort(self, com_port=None):
+        pass
+
+
+class TestIdentityCache:
+    @pytest.fixture()
+    def identity_cache(self, tmp_path):
+        return IdentityCache(tmp_path.joinpath('identity.json'))
+
+    @pytest.fixture()
+    def connect(self, monkeypatch, identity_cache):
+        ports = []
+
+        def connect(serial=bytes(range(8)), firmware=bytes([1, 2, 3, 4])):
+            port = USBProbePort(responses={0x04: serial, 0x09: firmware, 0x40: bytes([0])})
+            ports.append(port)
+            monkeypatch.setattr('radicl.probe.RAD_Serial', lambda debug=False: port)
+            probe = RAD_Probe(identity_cache=identity_cache)
+            assert probe.connect()
+            return probe, port
+
+        return connect
+
+    def test_save_restore(self, tmp_path):
+        cache = IdentityCache(tmp_path.joinpath('identity.json'))
+        assert cache.get('A') is None
+        cache.save('A', {'serial': '1'})
+        assert IdentityCache(cache.path).get('A') == {'serial': '1'}
+        cache.forget('A')
+        assert cache.get('A') is None
+
+    def test_known_probe(self, connect, identity_cache):
+        probe, port = connect()
+        assert identity_cache.get('205E3258')['serial'] == '0706050403020100'
+
+        # Reconnecting only confirms the serial number and firmware, together with the state
+        probe, port = connect()
+        assert [r[1] for r in port.requests if r[0] == 0x9F] == [0x04, 0x09, 0x40]
+        assert probe.serial_number == '0706050403020100'
+        assert str(probe.api.full_fw_rev) == 'v1.2.3.4'
+        assert probe.state == ProbeState.IDLE
+
+    def test_different_probe(self, connect, identity_cache):
+        connect()
+        probe, port = connect(serial=bytes(8))
+        assert probe.serial_number == '0000000000000000'
+        assert identity_cache.get('205E3258')['serial'] == '0000000000000000'
+
+    def test_firmware_updated(self, connect, identity_cache):
+        connect()
+        probe, port = connect(firmware=bytes([1, 2, 4, 0]))
+        assert str(probe.api.full_fw_rev) == 'v1.2.4.0'
+        assert identity_cache.get('205E3258')['full_fw_rev'] == '1.2.4.0'
@@ -1,4 +1,7 @@
+import threading
+
 from radicl.com import find_kw_port, get_serial_cnx, RAD_Serial
+from radicl.api import RAD_API
 import pytest
 from unittest.mock import patch
 from types import SimpleNamespace
@@ -98,3 +101,70 @@ class TestRAD_Serial:
 
     def test_numBytesInBuffer(self, rs):
         rs.numBytesInBuffer()
+
+
+class ThreadedSerialPort(MockSerialPort):
+    """
+    Serial port whose reads block up to a timeout like pyserial. Writes
+    are answered with the responses for the command code
+    """
+    def __init__(self, responses=None, **kwargs):
+        super().__init__(**kwargs)
+        self.responses = responses or {}
+        self.rx = bytearray()
+        self.cv = threading.Condition()
+
+    def feed(self, data):
+        with self.cv:
+            self.rx.extend(data)
+            self.cv.notify_all()
+
+    def write(self, data):
+        self.feed(self.responses.get(data[1], b''))
+        return len(data)
+
+    def read(self, n):
+        with self.cv:
+            self.cv.wait_for(lambda: len(self.rx) >= n, timeout=0.01)
+            result = bytes(self.rx[:n])
+            del self.rx[:len(result)]
+        return result
+
+    def inWaiting(self):
+        with self.cv:
+            return len(self.rx)
+
+
+class TestRAD_SerialReader:
+    @pytest.fixture(scope='function')
+    def rs(self):
+        rs = RAD_Serial()
+        rs.serial_port = ThreadedSerialPort(port='mock', responses={0x40: b'\x9f\x40\x02\x00\x01\x02'})
+        rs.startReader()
+        yield rs
+        rs.closePort()
+
+    def test_reader_active(self, rs):
+        assert rs.reader_active
+        rs.stopReader()
+        assert not rs.reader_active
+
+    def test_frames_routed(self, rs):
+        # A push message followed by a response split across reads
+        rs.serial_port.feed(b'\x9f\x40\x03\x00\x01\x03\x9f\x42')
+        rs.serial_port.feed(b'\x04\x00\x00')
+        assert rs.readPushMessage(timeout=1) == b'\x9f\x40\x03\x00\x01\x03'
+        assert rs.readFrame(timeout=1) == b'\x9f\x42\x04\x00\x00'
+
+    def test_read_timeout(self, rs):
+        assert rs.readFrame(timeout=0.01) is None
+
+    def test_api_with_reader(self, rs):
+        api = RAD_API(rs)
+        assert api.getMeasState()['data'] == b'\x02'
+
+    def test_api_wait_for_push(self, rs):
+        api = RAD_API(rs)
+        rs.serial_port.feed(b'\x9f\x40\x03\x00\x01\x03')
+        ret = api.waitForPushMessage(0x40, 1)
+        assert ret['data'] == b'\x03'
@@ -0,0 +1,68 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from radicl.decimate import decimate, minmax_indices
+
+
+def test_minmax_indices_short():
+    """
+    Series already at screen resolution are left as they are
+    """
+    np.testing.assert_array_equal(minmax_indices(np.arange(10), max_points=10), np.arange(10))
+
+
+@pytest.mark.parametrize('n', [100_000, 100_001, 123_457])
+def test_minmax_indices_keeps_peaks(n):
+    """
+    Single sample spikes survive decimation along with the ends of the series
+    """
+    values = np.sin(np.linspace(0, 20, n))
+    values[n // 3] = 50
+    values[2 * n // 3] = -50
+    idx = minmax_indices(values, max_points=1000)
+
+    assert len(idx) <= 1002
+    assert np.all(np.diff(idx) > 0)
+    assert {0, n // 3, 2 * n // 3, n - 1} <= set(idx)
+    assert values[idx].max() == values.max()
+    assert values[idx].min() == values.min()
+
+
+def test_minmax_indices_nans():
+    """
+    NaNs are never picked over a real sample in the same bucket
+    """
+    values = np.full(10_000, np.nan)
+    values[::7] = np.arange(len(values[::7]))
+    idx = minmax_indices(values, max_points=100)
+    assert np.nanmax(values[idx]) == np.nanmax(values)
+    assert np.all(idx < len(values))
+
+
+def test_decimate_dataframe():
+    """
+    The peaks of each column are kept on the same rows
+    """
+    n = 50_000
+    df = pd.DataFrame({'a': np.zeros(n), 'b': np.zeros(n), 'label': ['x'] * n},
+                      index=pd.Index(np.arange(n) / 16000, name='time'))
+    df.loc[df.index[100], 'a'] = 1
+    df.loc[df.index[40_123], 'b'] = -1
+
+    result = decimate(df, max_points=500)
+    assert len(result) < 2 * 500
+    assert list(result.columns) == list(df.columns)
+    assert result['a'].max() == 1
+    assert result['b'].min() == -1
+
+    # Only the columns asked for have their peaks kept
+    assert decimate(df, max_points=500, columns=['a'])['b'].min() == 0
+
+
+def test_decimate_series():
+    s = pd.Series(np.arange(10_000, dtype=float))
+    assert decimate(s, max_points=10_000) is s
+    result = decimate(s, max_points=100)
+    assert isinstance(result, pd.Series)
+    assert result.iloc[0] == 0 and result.iloc[-1] == 9999
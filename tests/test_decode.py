@@ -0,0 +1,65 @@
+import struct
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from radicl.decode import get_sensor_dtype, decode_buffer
+from radicl.info import SensorReadInfo
+from radicl.probe import RAD_Probe
+
+
+@pytest.mark.parametrize('sensor, expected', [
+    (SensorReadInfo.RAWSENSOR, 8),
+    (SensorReadInfo.ACCELEROMETER, 6),
+    (SensorReadInfo.RAW_BAROMETER_PRESSURE, 3),
+    (SensorReadInfo.FILTERED_BAROMETER_DEPTH, 4),
+])
+def test_get_sensor_dtype_itemsize(sensor, expected):
+    assert get_sensor_dtype(sensor).itemsize == expected
+
+
+@pytest.mark.parametrize('sensor, payload, expected', [
+    # Little endian unsigned shorts
+    (SensorReadInfo.RAWSENSOR, struct.pack('<4H', 1, 256, 4095, 65535),
+     {'Sensor1': [1], 'Sensor2': [256], 'Sensor3': [4095], 'Sensor4': [65535]}),
+    # Signed shorts in mG converted to G and scaled by the 2G sensitivity
+    (SensorReadInfo.ACCELEROMETER, struct.pack('<3h', -1000, 0, 2000),
+     {'X-Axis': [-1000 * 0.001 * 0.06], 'Y-Axis': [0.0], 'Z-Axis': [2000 * 0.001 * 0.06]}),
+    # Only the two low bytes of the pressure are used
+    (SensorReadInfo.RAW_BAROMETER_PRESSURE, bytes([1, 2, 3, 4, 5, 6]),
+     {'raw_pressure': [1 + 2 * 256, 4 + 5 * 256]}),
+    # Floats converted to cm
+    (SensorReadInfo.FILTERED_BAROMETER_DEPTH, struct.pack('<2f', 100, -50),
+     {'filtereddepth': [1.0, -0.5]}),
+    # Incomplete samples are ignored
+    (SensorReadInfo.RAWSENSOR, struct.pack('<4H', 1, 2, 3, 4) + b'\x01\x02',
+     {'Sensor1': [1], 'Sensor2': [2], 'Sensor3': [3], 'Sensor4': [4]}),
+])
+def test_decode_buffer(sensor, payload, expected):
+    result = decode_buffer(payload, sensor, accelerometer_range=2)
+    for name, values in expected.items():
+        np.testing.assert_allclose(result[name], values)
+
+
+@pytest.mark.parametrize('data_type', [list, bytes, bytearray, memoryview])
+def test_decode_buffer_input_types(data_type):
+    payload = struct.pack('<4H', 10, 20, 30, 40)
+    result = decode_buffer(data_type(payload), SensorReadInfo.RAWSENSOR)
+    assert [result[c][0] for c in SensorReadInfo.RAWSENSOR.data_names] == [10, 20, 30, 40]
+
+
+def test_unpack_sensor():
+    """
+    Confirm the dataframe returned from the probe keeps its columns and
+    is indexed by time
+    """
+    probe = RAD_Probe()
+    probe._sampling_rate = 16000
+    probe._accelerometer_range = 16
+    payload = struct.pack('<6h', 1000, 0, 0, 0, 1000, 0)
+    df = probe.unpack_sensor(payload, SensorReadInfo.ACCELEROMETER)
+
+    expected = pd.DataFrame({'X-Axis': [0.73, 0.0], 'Y-Axis': [0.0, 0.73], 'Z-Axis': [0.0, 0.0]},
+                            index=pd.Index([0.0, 2 / 100], name='time'))
+    pd.testing.assert_frame_equal(df, expected)
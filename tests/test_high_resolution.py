@@ -1,8 +1,14 @@
-from radicl.high_resolution import build_high_resolution_data
+from radicl.high_resolution import (build_high_resolution_data, decode_archive, download_high_resolution_data,
+                                    HIGH_RESOLUTION_SENSORS)
+from radicl.cache import RawArchive
+from radicl.api import RAD_API
+from radicl.info import SensorReadInfo
+from radicl.probe import RAD_Probe
 import pytest
 from radicl.ui_tools import get_logger
 import numpy as np
-from . import MOCKCLI
+import pandas as pd
+from . import MOCKCLI, MockProbePort
 
 class TestBuildingHighResolution:
     """
@@ -33,3 +39,67 @@ class TestBuildingHighResolution:
     def test_specific_value(self, df, column, index, expected):
         assert df[column].iloc[index] == expected
 
+
+
+def test_download_high_resolution_data():
+    """
+    Buffers decoded while the next downloads build the same profile as
+    decoding them one after another
+    """
+    raw = (np.arange(256 * 4) % 251).astype(np.uint8).tobytes()
+    depth = np.linspace(100, 0, 30).astype('<f4').tobytes()
+    acc = np.arange(60, dtype='<i2').tobytes()
+
+    port = MockProbePort(buffers={0: raw, 4: depth, 1: acc},
+                         responses={0x46: (16000).to_bytes(4, byteorder='little'),
+                                    0x52: bytes([16])})
+    probe = RAD_Probe(ext_api=RAD_API(port))
+    log = get_logger('test_high_res')
+    df = download_high_resolution_data(probe, log)
+
+    expected = build_high_resolution_data(probe.unpack_sensor(raw, SensorReadInfo.RAWSENSOR),
+                                          probe.unpack_sensor(depth, SensorReadInfo.FILTERED_BAROMETER_DEPTH),
+                                          probe.unpack_sensor(acc, SensorReadInfo.ACCELEROMETER), log)
+    pd.testing.assert_frame_equal(df, expected)
+
+
+def test_download_high_resolution_data_failed():
+    port = MockProbePort(responses={0x46: (16000).to_bytes(4, byteorder='little'),
+                                    0x52: bytes([16])})
+    probe = RAD_Probe(ext_api=RAD_API(port))
+    assert download_high_resolution_data(probe, get_logger('test_high_res')) is None
+
+
+def test_archive_decodes_like_download(tmp_path):
+    """
+    Measurements archived as downloaded decode into the same profile
+    """
+    raw = (np.arange(256 * 4) % 251).astype(np.uint8).tobytes()
+    depth = np.linspace(100, 0, 30).astype('<f4').tobytes()
+    acc = np.arange(60, dtype='<i2').tobytes()
+
+    port = MockProbePort(buffers={0: raw, 4: depth, 1: acc},
+                         responses={0x46: (16000).to_bytes(4, byteorder='little'),
+                                    0x52: bytes([16])})
+    probe = RAD_Probe(ext_api=RAD_API(port))
+    log = get_logger('test_high_res')
+    archive = RawArchive(tmp_path)
+
+    path = probe.archive_sensors(archive, HIGH_RESOLUTION_SENSORS, extra_meta={'Latitude': 43.5})
+    assert archive.measurements() == [path]
+
+    df, header = decode_archive(path, log)
+    pd.testing.assert_frame_equal(df, download_high_resolution_data(probe, log))
+    assert header['Latitude'] == 43.5
+    assert 'Serial Num.' in header
+
+
+def test_archive_failed(tmp_path):
+    port = MockProbePort(responses={0x46: (16000).to_bytes(4, byteorder='little'),
+                                    0x52: bytes([16])})
+    probe = RAD_Probe(ext_api=RAD_API(port))
+    archive = RawArchive(tmp_path)
+    assert probe.archive_sensors(archive, HIGH_RESOLUTION_SENSORS) is None
+
+    # Incomplete measurements are not listed
+    assert archive.measurements() == []
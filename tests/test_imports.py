@@ -0,0 +1,15 @@
+import subprocess
+import sys
+
+import pytest
+
+
+@pytest.mark.parametrize('module', ['radicl.cli', 'radicl.high_resolution_cli', 'radicl.plotting', 'radicl.batch'])
+def test_entry_point_imports_are_lazy(module):
+    """
+    Entry points should not pull in the slow libraries until they are used
+    """
+    heavy = ['numpy', 'pandas', 'matplotlib', 'study_lyte']
+    code = f"import sys, {module}; print([m for m in {heavy} if m in sys.modules])"
+    result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == '[]'
@@ -1,4 +1,5 @@
-from radicl.info import AccelerometerRange, ProbeErrors, ProbeState, Firmware, PCA_Name, SensorReadInfo
+from radicl.commands import MeasCMD
+from radicl.info import AccelerometerRange, ProbeError, ProbeErrors, ProbeState, Firmware, PCA_Name, SensorReadInfo
 import pytest
 
 
@@ -20,6 +21,24 @@ class TestProbeErrors:
         assert ProbeErrors.from_code(error_code) == expected
 
 
+class TestProbeError:
+    @pytest.mark.parametrize('cmd, error_code, caller, expected', [
+        (0x40, 2054, 'getProbeMeasState',
+         'getProbeMeasState error: 2054 (FAILED_DATA_READ) requesting MeasCMD.STATE'),
+        (0x40, None, None, 'Probe error: COM requesting MeasCMD.STATE'),
+        (0xEE, 10, 'f', 'f error: 10 (UNKNOWN_ERROR) requesting command 0xee'),
+    ])
+    def test_str(self, cmd, error_code, caller, expected):
+        assert str(ProbeError(cmd, error_code, caller=caller)) == expected
+
+    def test_fields(self):
+        error = ProbeError(0x42, 2050)
+        assert error.command == MeasCMD.START
+        assert error.error == ProbeErrors.PROBE_NOT_READY
+        assert not error.com_error
+        assert ProbeError(0x42).com_error
+
+
 class TestFirmware:
 
     @pytest.fixture(scope='function')
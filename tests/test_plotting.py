@@ -0,0 +1,49 @@
+import pytest
+
+from radicl.plotting import BackgroundRenderer, has_display, save_hi_res
+from radicl.writers import write_profile
+
+from . import synthetic_profile
+
+
+@pytest.fixture()
+def profile(tmp_path):
+    df, meta = synthetic_profile(seconds=1)
+    return write_profile(df, meta, tmp_path.joinpath('profile.npz'))
+
+
+@pytest.mark.parametrize('ext', ['png', 'svg'])
+def test_save_hi_res(profile, tmp_path, ext):
+    output = tmp_path.joinpath(f'profile.{ext}')
+    assert save_hi_res(profile, output) == output
+    assert output.stat().st_size > 0
+
+    # The npz is plotted without leaving a csv copy next to it
+    assert sorted(p.name for p in tmp_path.iterdir()) == sorted(['profile.npz', output.name])
+
+
+def test_background_renderer(profile, tmp_path):
+    output = tmp_path.joinpath('profile.png')
+    with BackgroundRenderer() as renderer:
+        future = renderer.submit(profile, output)
+        missing = renderer.submit(tmp_path.joinpath('missing.csv'), tmp_path.joinpath('missing.png'))
+
+    assert future.result() == str(output)
+    assert output.is_file()
+    # Failures are reported on their own future
+    assert missing.exception() is not None
+    assert renderer.pending == set()
+
+
+@pytest.mark.parametrize('platform, env, expected', [
+    ('Linux-6.1-x86_64', {}, False),
+    ('Linux-6.1-x86_64', {'DISPLAY': ':0'}, True),
+    ('macOS-14.0-arm64', {}, True),
+])
+def test_has_display(monkeypatch, platform, env, expected):
+    monkeypatch.setattr('platform.platform', lambda: platform)
+    monkeypatch.delenv('DISPLAY', raising=False)
+    monkeypatch.delenv('WAYLAND_DISPLAY', raising=False)
+    for k, v in env.items():
+        monkeypatch.setenv(k, v)
+    assert has_display() == expected
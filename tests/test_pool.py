@@ -0,0 +1,97 @@
+import numpy as np
+import pytest
+
+from radicl.info import ProbeState, SensorReadInfo
+from radicl.pool import ProbePool
+
+from . import MockProbePort
+
+
+def probe_port(serial, buffer):
+    return MockProbePort(buffers={SensorReadInfo.RAWSENSOR.buffer_id: buffer},
+                         responses={0x40: bytes([ProbeState.IDLE.value]),
+                                    0x46: (16000).to_bytes(4, byteorder='little'),
+                                    0x04: serial.to_bytes(8, byteorder='little')})
+
+
+@pytest.fixture()
+def buffers():
+    return {f'COM{i}': (np.arange(256 * 2) * (i + 1) % 251).astype(np.uint8).tobytes() for i in range(4)}
+
+
+@pytest.fixture()
+def pool(buffers):
+    ports = {device: probe_port(i + 1, buffer) for i, (device, buffer) in enumerate(buffers.items())}
+    with ProbePool(devices=list(ports.keys()), port_factory=ports.get) as pool:
+        yield pool
+
+
+def test_connect(pool):
+    assert sorted(pool.probes.keys()) == [f'{i:016X}' for i in range(1, 5)]
+
+
+def test_run(pool):
+    results = pool.resetMeasurement()
+    assert list(results.values()) == [1] * 4
+    assert sorted(pool.timing.keys()) == sorted(results.keys())
+    assert pool.timing_stats()['max'] <= pool.wall_time
+
+
+def test_download(pool, buffers):
+    data = pool.download('rawsensor')
+    for i, buffer in enumerate(buffers.values()):
+        df = data[f'{i + 1:016X}']
+        expected = np.frombuffer(buffer, dtype='<u2').reshape(-1, 4)
+        np.testing.assert_array_equal(df.to_numpy(), expected)
+
+
+def test_failed_probe(pool):
+    """
+    A probe raising an error only leaves out its own result
+    """
+    def reset(probe):
+        if probe.serial_number == '0000000000000002':
+            raise IOError("Probe unplugged")
+        return probe.resetMeasurement()
+
+    results = pool.run(reset)
+    assert results['0000000000000002'] is None
+    assert [results[s] for s in sorted(results) if s != '0000000000000002'] == [1] * 3
+    assert list(pool.errors.keys()) == ['0000000000000002']
+    assert sorted(pool.timing.keys()) == sorted(results.keys())
+
+
+def test_download_unknown(pool):
+    with pytest.raises(ValueError):
+        pool.download('nothing')
+
+
+def test_unresponsive_probe(buffers):
+    """
+    Probes that fail to connect are left out of the pool
+    """
+    ports = {'COM0': probe_port(1, buffers['COM0']), 'COM1': MockProbePort()}
+    with ProbePool(devices=list(ports.keys()), port_factory=ports.get) as pool:
+        assert list(pool.probes.keys()) == ['0000000000000001']
+
+
+def test_unavailable_port(buffers):
+    """
+    A port that can not be opened only leaves out its own probe
+    """
+    def open_port(device):
+        if device == 'COM1':
+            raise IOError(f"could not open port {device}")
+        return probe_port(1, buffers[device])
+
+    with ProbePool(devices=['COM0', 'COM1'], port_factory=open_port) as pool:
+        assert list(pool.probes.keys()) == ['0000000000000001']
+
+        # Connecting again closes the probes and replaces the thread pool
+        executor = pool._executor
+        probe = pool.probes['0000000000000001']
+        pool.connect()
+        assert executor._shutdown
+        assert pool._executor is not executor
+        assert probe.api is None
+        assert list(pool.probes.keys()) == ['0000000000000001']
@@ -0,0 +1,262 @@
+import struct
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from . import MockProbePort
+from radicl.api import RAD_API
+from radicl.cache import CaptureCache
+from radicl.commands import MeasCMD
+from radicl.info import ProbeState, SensorReadInfo
+from radicl.probe import RAD_Probe, SEGMENT_SIZE
+from radicl.protocol import evaluate_response
+
+
+class TestProbeDataDownload:
+    @pytest.fixture()
+    def values(self, n_samples, sensor):
+        rng = np.random.default_rng(0)
+        return rng.integers(0, 4096, (n_samples, sensor.expected_values))
+
+    @pytest.fixture()
+    def mock_probe(self, values, sensor):
+        payload = struct.pack(f'<{values.size}H', *values.flatten())
+        port = MockProbePort(buffers={sensor.buffer_id: payload})
+        probe = RAD_Probe(ext_api=RAD_API(port))
+        probe._sampling_rate = 16000
+        probe._accelerometer_range = 16
+        yield probe
+
+    @pytest.mark.parametrize('sensor, n_samples', [
+        (SensorReadInfo.RAWSENSOR, 1024),
+    ])
+    def test_readRawSensorData(self, mock_probe, values, sensor, n_samples):
+        df = mock_probe.readRawSensorData()
+        np.testing.assert_array_equal(df[sensor.data_names].values, values)
+
+    @pytest.mark.parametrize('sensor, n_samples', [
+        # Finishes on a partial segment
+        (SensorReadInfo.ACCELEROMETER, 100),
+    ])
+    def test_readRawAccelerationData(self, mock_probe, values, sensor, n_samples):
+        df = mock_probe.readRawAccelerationData()
+        assert len(df.index) == n_samples
+
+    @pytest.mark.parametrize('sensor, n_samples', [
+        (SensorReadInfo.RAWSENSOR, 1024),
+        # Samples split across segments
+        (SensorReadInfo.ACCELEROMETER, 100),
+    ])
+    def test_iter_segments(self, mock_probe, values, sensor, n_samples):
+        chunks = list(mock_probe.iter_segments(sensor))
+        assert len(chunks) > 1
+        df = mock_probe.unpack_sensor(mock_probe.download_sensor(sensor), sensor)
+        for name in sensor.data_names:
+            np.testing.assert_array_equal(np.concatenate([c[name] for c in chunks]), df[name].values)
+
+    @pytest.mark.parametrize('sensor, n_samples', [
+        (SensorReadInfo.RAWSENSOR, 1024),
+    ])
+    def test_iter_samples(self, mock_probe, values, sensor, n_samples):
+        chunks = list(mock_probe.iter_samples(sensor, chunk_size=100))
+        assert [len(c.index) for c in chunks] == [128] * 8
+        df = pd.concat(chunks)
+        np.testing.assert_array_equal(df[sensor.data_names].values, values)
+        np.testing.assert_allclose(np.diff(df.index), 1 / 16000)
+
+    @pytest.mark.parametrize('sensor, n_samples', [
+        (SensorReadInfo.RAWSENSOR, 1024),
+    ])
+    def test_iter_segments_missed(self, mock_probe, sensor, n_samples):
+        # Leave the last segment short
+        port = mock_probe.api.port
+        port.buffers[sensor.buffer_id] = port.buffers[sensor.buffer_id][:-SEGMENT_SIZE // 2]
+        with pytest.raises(IOError):
+            list(mock_probe.iter_segments(sensor))
+
+
+class NACKPort(MockProbePort):
+    """
+    Mock port that rejects a request for each segment listed, a segment
+    listed more than once is rejected that many times
+    """
+    def __init__(self, nack_segments, **kwargs):
+        super().__init__(**kwargs)
+        self.nack_segments = list(nack_segments)
+
+    def writePort(self, data):
+        data = bytes(data)
+        segment = int.from_bytes(data[6:10], byteorder='little')
+        if data[1] == 0x45 and segment in self.nack_segments:
+            self.nack_segments.remove(segment)
+            self.requests.append(data)
+            self.rx.extend(bytes([0x9F, 0x45, 0x05, 0x00, 0x02]) + (2054).to_bytes(2, byteorder='little'))
+            return len(data)
+        return super().writePort(data)
+
+
+@pytest.mark.parametrize('window, nack_segments', [
+    (1, []),
+    (8, []),
+    (8, [0, 3, 31]),
+    (4, [5, 6]),
+])
+def test_pipelined_download(window, nack_segments):
+    """
+    Ensure the pipelined download reassembles segments in order even when
+    some of them have to be requested again
+    """
+    sensor = SensorReadInfo.RAWSENSOR
+    payload = (np.arange(32 * 256) % 251).astype(np.uint8).tobytes()
+    port = NACKPort(nack_segments, buffers={sensor.buffer_id: payload})
+    probe = RAD_Probe(ext_api=RAD_API(port), pipeline_window=window)
+    probe._sampling_rate = 16000
+    df = probe.readRawSensorData()
+
+    expected = np.frombuffer(payload, dtype='<u2').reshape(-1, 4)
+    np.testing.assert_array_equal(df[sensor.data_names].values, expected)
+
+    # Only the rejected segments were requested twice
+    n_requests = len([r for r in port.requests if r[1] == 0x45])
+    assert n_requests == 32 + len(nack_segments)
+    assert probe.transfer_stats['retries'] == len(nack_segments)
+    assert probe.transfer_stats['bytes'] == len(payload)
+
+
+@pytest.mark.parametrize('window', [1, 8])
+def test_resume_download(window, monkeypatch):
+    """
+    A failed download keeps the segments received so a retry only requests
+    the missing ones
+    """
+    sensor = SensorReadInfo.RAWSENSOR
+    payload = (np.arange(32 * 256) % 251).astype(np.uint8).tobytes()
+
+    # Reject segments 5 and 20 more times than they are retried
+    port = NACKPort([5] * 10 + [20] * 10, buffers={sensor.buffer_id: payload})
+    probe = RAD_Probe(ext_api=RAD_API(port), pipeline_window=window)
+    probe._sampling_rate = 16000
+
+    # Skip the sequential back off delays
+    monkeypatch.setattr(time, 'sleep', lambda seconds: None)
+
+    assert probe.download_sensor(sensor) is None
+    port.requests.clear()
+
+    assert bytes(probe.download_sensor(sensor)) == payload
+    segments = [int.from_bytes(r[6:10], byteorder='little') for r in port.requests if r[1] == 0x45]
+    # The first segment is read again to check the measurement is the same
+    assert segments == [0, 5, 20]
+
+
+def test_resume_download_cached(tmp_path, monkeypatch):
+    """
+    Checkpoints in the capture cache let a new connection resume a download
+    """
+    monkeypatch.setattr(time, 'sleep', lambda seconds: None)
+    sensor = SensorReadInfo.RAWSENSOR
+    payload = (np.arange(32 * 256) % 251).astype(np.uint8).tobytes()
+    cache = CaptureCache(tmp_path)
+
+    port = NACKPort([5] * 10, buffers={sensor.buffer_id: payload})
+    probe = RAD_Probe(ext_api=RAD_API(port), pipeline_window=8, capture_cache=cache)
+    assert probe.download_sensor(sensor) is None
+
+    # Reconnect
+    port = MockProbePort(buffers={sensor.buffer_id: payload})
+    probe = RAD_Probe(ext_api=RAD_API(port), pipeline_window=8, capture_cache=cache)
+    assert bytes(probe.download_sensor(sensor)) == payload
+    segments = [int.from_bytes(r[6:10], byteorder='little') for r in port.requests if r[1] == 0x45]
+    assert segments == [0, 5]
+
+    # Finished downloads leave no checkpoint behind
+    assert list(tmp_path.joinpath('partial').iterdir()) == []
+
+
+def test_resume_other_measurement(tmp_path, monkeypatch):
+    """
+    A checkpoint left by an earlier measurement of the same length is never
+    resumed into a new one
+    """
+    monkeypatch.setattr(time, 'sleep', lambda seconds: None)
+    sensor = SensorReadInfo.RAWSENSOR
+    old = (np.arange(32 * 256) % 251).astype(np.uint8).tobytes()
+    new = (np.arange(32 * 256) % 241).astype(np.uint8).tobytes()
+    cache = CaptureCache(tmp_path)
+
+    port = NACKPort([5] * 10, buffers={sensor.buffer_id: old})
+    probe = RAD_Probe(ext_api=RAD_API(port), pipeline_window=8, capture_cache=cache)
+    assert probe.download_sensor(sensor) is None
+
+    # A new measurement taken without clearing the checkpoint
+    port = MockProbePort(buffers={sensor.buffer_id: new})
+    probe = RAD_Probe(ext_api=RAD_API(port), pipeline_window=8, capture_cache=cache)
+    assert bytes(probe.download_sensor(sensor)) == new
+    segments = [int.from_bytes(r[6:10], byteorder='little') for r in port.requests if r[1] == 0x45]
+    assert sorted(segments) == list(range(32))
+
+
+def test_reset_discards_checkpoints(tmp_path, monkeypatch):
+    monkeypatch.setattr(time, 'sleep', lambda seconds: None)
+    sensor = SensorReadInfo.RAWSENSOR
+    payload = (np.arange(4 * 256) % 251).astype(np.uint8).tobytes()
+    cache = CaptureCache(tmp_path)
+
+    port = NACKPort([1] * 10, buffers={sensor.buffer_id: payload},
+                    responses={0x40: bytes([ProbeState.IDLE.value])})
+    probe = RAD_Probe(ext_api=RAD_API(port), pipeline_window=8, capture_cache=cache)
+    assert probe.download_sensor(sensor) is None
+    assert len(list(tmp_path.joinpath('partial').iterdir())) == 3
+    assert probe.has_checkpoints()
+
+    # A new connection finds the unfinished download in the cache
+    assert RAD_Probe(ext_api=RAD_API(port), capture_cache=cache).has_checkpoints()
+
+    probe.resetMeasurement()
+    assert list(tmp_path.joinpath('partial').iterdir()) == []
+    assert probe._checkpoints == {}
+    assert not probe.has_checkpoints()
+
+
+@pytest.mark.parametrize('nack, expected_code', [(True, 2050), (False, None)])
+def test_manage_error(nack, expected_code):
+    """
+    Failures are recorded with the command and the function that requested it
+    """
+    probe = RAD_Probe(ext_api=RAD_API(MockProbePort()))
+
+    nack_frame = bytes([0x9F, 0x40, 0x05, 0x00, 0x02]) + (2050).to_bytes(2, byteorder='little')
+    ret = evaluate_response(nack_frame if nack else None, 0x40, 1)
+    assert probe.manage_data_return(ret) is None
+
+    error = probe.last_error
+    assert error.command == MeasCMD.STATE
+    assert error.error_code == expected_code
+    assert error.caller == 'test_manage_error'
+
+
+class SilentStatePort(MockProbePort):
+    """Probe that never answers a request for its measurement state"""
+
+    def writePort(self, data):
+        if bytes(data[:2]) == bytes([0x9F, MeasCMD.STATE.cmd]):
+            self.requests.append(bytes(data))
+            return len(data)
+        return super().writePort(data)
+
+
+def test_state_retry_time_limit(monkeypatch):
+    """
+    An unanswered request is retried until RETRY_TIME_LIMIT, not for every attempt
+    """
+    monkeypatch.setattr('radicl.probe.RETRY_TIME_LIMIT', 0.05)
+    port = SilentStatePort()
+    probe = RAD_Probe(ext_api=RAD_API(port, timeout=0.02))
+    port.requests.clear()
+
+    start = time.perf_counter()
+    assert probe.getProbeMeasState() is None
+    assert time.perf_counter() - start < 0.2
+    assert 1 < len(port.requests) < 10
@@ -0,0 +1,133 @@
+import pytest
+
+from radicl.commands import MeasCMD, SettingsCMD
+from radicl.protocol import (ApiResult, Frame, FrameEncoder, MessageType, build_frame, decode_temperature,
+                             evaluate_response, frame_length, request_frame, set_frame, split_frames)
+
+
+@pytest.mark.parametrize('header, expected', [
+    (b'\x9f\x40\x02\x00\x01', 6),
+    (b'\x9f\x45\x06\x00\x00', 261),
+    (b'\x9f\x42\x04\x00\x00', 5),
+])
+def test_frame_length(header, expected):
+    assert frame_length(header) == expected
+
+
+@pytest.mark.parametrize('buffer, expected_frames, expected_remainder', [
+    # Two complete messages
+    (b'\x9f\x40\x02\x00\x01\x03\x9f\x42\x04\x00\x00', [b'\x9f\x40\x02\x00\x01\x03', b'\x9f\x42\x04\x00\x00'], b''),
+    # Incomplete message left in the buffer
+    (b'\x9f\x40\x02\x00\x01\x03\x9f\x40\x02', [b'\x9f\x40\x02\x00\x01\x03'], b'\x9f\x40\x02'),
+    # Garbage before the sync byte is dropped
+    (b'\x00\x01\x9f\x42\x04\x00\x00', [b'\x9f\x42\x04\x00\x00'], b''),
+    # Nothing to sync on
+    (b'\x00\x01', [], b''),
+])
+def test_split_frames(buffer, expected_frames, expected_remainder):
+    buffer = bytearray(buffer)
+    frames = split_frames(buffer)
+    assert frames == expected_frames
+    assert buffer == expected_remainder
+
+
+@pytest.mark.parametrize('response, cmd, n, expected', [
+    # Response with a payload
+    (b'\x9f\x40\x02\x00\x01\x03', 0x40, 1, {'status': 1, 'errorCode': None, 'data': b'\x03'}),
+    # Response to a different command
+    (b'\x9f\x41\x02\x00\x01\x03', 0x40, 1, {'status': 0, 'errorCode': None, 'data': None}),
+    # Truncated response
+    (b'\x9f\x40\x02\x00\x02\x03', 0x40, 2, {'status': 0, 'errorCode': None, 'data': None}),
+    # Long response
+    (b'\x9f\x45\x06\x00\x00' + bytes(range(256)), 0x45, 0,
+     {'status': 1, 'errorCode': None, 'data': bytes(range(256))}),
+    # Push message
+    (b'\x9f\x40\x03\x00\x01\x05', 0x40, 1, {'status': 1, 'errorCode': None, 'data': b'\x05'}),
+    # Push message of the wrong size
+    (b'\x9f\x40\x03\x00\x01\x05', 0x40, 2, {'status': 0, 'errorCode': None, 'data': None}),
+    (b'\x9f\x42\x04\x00\x00', 0x42, 0, {'status': 1, 'errorCode': None, 'data': None}),
+    (b'\x9f\x45\x05\x00\x02\x06\x08', 0x45, 0, {'status': 0, 'errorCode': 2054, 'data': None}),
+    # NACK without an error code
+    (b'\x9f\x45\x05\x00\x00', 0x45, 0, {'status': 0, 'errorCode': 0, 'data': None}),
+    # Temperature responses without a payload return the whole message
+    (b'\x9f\x4f\x00\x00\x00', 0x4f, 0, {'status': 1, 'errorCode': None, 'data': b'\x9f\x4f\x00\x00\x00'}),
+    (b'\x9f\x40', 0x40, 0, {'status': 0, 'errorCode': None, 'data': None}),
+    (None, 0x40, 0, {'status': 0, 'errorCode': None, 'data': None}),
+])
+def test_evaluate_response(response, cmd, n, expected):
+    assert evaluate_response(response, cmd, n) == expected
+
+    # Decoded frames evaluate the same
+    frame = Frame.decode(response)
+    if frame is not None:
+        assert frame.evaluate(cmd, n) == expected
+        assert evaluate_response(frame, cmd, n) == expected
+
+
+def test_frame():
+    frame = Frame.decode(b'\x9f\x45\x06\x01\x00' + bytes(256))
+    assert (frame.cmd, frame.type, frame.extra, frame.length) == (0x45, MessageType.LONG_RESPONSE.value, 1, 0)
+    assert frame.num_payload_bytes == 256
+    assert frame.is_response(0x45)
+    assert not frame.is_push_message(0x45)
+    assert Frame.decode(b'\x9f\x45') is None
+
+
+def test_precompiled_frames():
+    assert request_frame(MeasCMD.STATE.cmd) == b'\x9f\x40\x00\x00\x00'
+    assert set_frame(MeasCMD.START.cmd) == b'\x9f\x42\x01\x00\x00'
+    # Commands not in the enums are still framed
+    assert request_frame(0xEE) == b'\x9f\xee\x00\x00\x00'
+
+
+def test_build_frame():
+    assert build_frame(0x60, MessageType.LONG_REQUEST, [1, 2], extra=3, length=0) == b'\x9f\x60\x07\x03\x00\x01\x02'
+
+
+def test_frame_encoder():
+    encoder = FrameEncoder()
+    frame = encoder.encode(MeasCMD.DATA_SEGMENT.cmd, 'BI', 1, 1234, msg_type=MessageType.REQUEST)
+    assert bytes(frame) == b'\x9f\x45\x00\x00\x05\x01' + (1234).to_bytes(4, byteorder='little')
+
+    # The buffer of a command is reused
+    again = encoder.encode(MeasCMD.DATA_SEGMENT.cmd, 'BI', 2, 5, msg_type=MessageType.REQUEST)
+    assert again is frame
+    assert bytes(frame) == b'\x9f\x45\x00\x00\x05\x02' + (5).to_bytes(4, byteorder='little')
+
+    frame = encoder.encode(SettingsCMD.SAMPLING_RATE.cmd, 'I', 16000)
+    assert bytes(frame) == b'\x9f\x46\x01\x00\x04' + (16000).to_bytes(4, byteorder='little')
+
+
+def test_api_result():
+    response = b'\x9f\x45\x06\x00\x00' + bytes(range(256))
+    ret = evaluate_response(response, 0x45, 0)
+    assert isinstance(ret, ApiResult)
+
+    # Payloads are views of the response rather than copies
+    assert isinstance(ret.data, memoryview)
+    assert ret.data.obj is response
+
+    # Dictionary style access still works
+    assert ret['status'] == ret.status == 1
+    assert ret.get('errorCode', 5) is None
+    assert ret.get('missing', 5) == 5
+    assert 'data' in ret
+    ret['data'] = 5
+    assert ret.data == 5
+    assert dict(ret) == {'status': 1, 'errorCode': None, 'data': 5}
+
+    with pytest.raises(KeyError):
+        ret['missing']
+
+
+@pytest.mark.parametrize('msg_type', [0x00, MessageType.RESPONSE.value])
+@pytest.mark.parametrize('temperature', [-3, 21, -2 ** 31])
+def test_decode_temperature(msg_type, temperature):
+    """
+    Temperatures are signed whether the whole message or only the value comes back
+    """
+    response = bytes([0x9F, MeasCMD.TEMP.cmd, msg_type, 0x00, 0x04]) + \
+        temperature.to_bytes(4, byteorder='little', signed=True)
+    ret = evaluate_response(response, MeasCMD.TEMP.cmd, 4)
+    assert ret.status == 1
+    assert decode_temperature(ret.data) == temperature
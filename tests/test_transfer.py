@@ -0,0 +1,81 @@
+import time
+
+import pytest
+
+from radicl.transfer import RetryController
+
+
+@pytest.fixture()
+def sleeps(monkeypatch):
+    """Record the sleeps requested instead of sleeping"""
+    result = []
+    monkeypatch.setattr(time, 'sleep', result.append)
+    return result
+
+
+def test_clean_transfer_never_waits(sleeps):
+    controller = RetryController()
+    for i in range(50):
+        controller.wait()
+        controller.success(0.002, 256)
+
+    assert sleeps == []
+    stats = controller.stats()
+    assert stats['segments'] == 50
+    assert stats['bytes'] == 50 * 256
+    assert stats['retries'] == 0
+    assert stats['mean_rtt'] == pytest.approx(0.002)
+
+
+def test_failures_back_off(sleeps):
+    controller = RetryController(init_delay=0.004, max_delay=0.05)
+    for i in range(6):
+        controller.wait()
+        controller.failure()
+    controller.wait()
+
+    assert sleeps == [0.004, 0.008, 0.016, 0.032, 0.05, 0.05]
+    assert controller.stats()['retries'] == 7
+
+
+def test_back_off_decays():
+    controller = RetryController(init_delay=0.004, error_window=4)
+    for i in range(4):
+        controller.failure()
+    assert controller.delay == 0.032
+
+    # Errors still make up the recent requests
+    controller.success(0.002, 256)
+    assert controller.delay == 0.032
+
+    for i in range(10):
+        controller.success(0.002, 256)
+    assert controller.delay == 0
+
+
+@pytest.mark.parametrize('rtts, expected', [
+    # Nothing learned yet
+    ([], 1.0),
+    # Fast links are bounded by the minimum
+    ([0.002] * 20, 0.1),
+    # Slow links are bounded by the max
+    ([0.8] * 20, 1.0),
+    ([0.1] * 20, 0.2),
+])
+def test_timeout(rtts, expected):
+    controller = RetryController(timeout=1.0, min_timeout=0.1)
+    for rtt in rtts:
+        controller.success(rtt, 256)
+    assert controller.timeout == pytest.approx(expected, rel=0.05)
+
+
+def test_stats_no_time_elapsed(monkeypatch):
+    """
+    A download finishing within the clock resolution has no throughput
+    """
+    monkeypatch.setattr(time, 'perf_counter', lambda: 1.0)
+    controller = RetryController()
+    controller.success(0.0, 256)
+    stats = controller.stats()
+    assert stats['seconds'] == 0
+    assert stats['throughput'] is None
@@ -1,10 +1,13 @@
 import inspect
+import logging
 import unittest
 
+import coloredlogs
 import pytest
 
 from radicl.probe import RAD_Probe
 from radicl.ui_tools import *
+from radicl.ui_tools import _HANDLERS
 
 
 @unittest.skip('Incomplete test. Needs work')
@@ -32,5 +35,48 @@ def test_get_index_from_ratio(idx, ratio, n_samples, expected):
     assert result == expected
 
 
+def test_get_logger_installs_once():
+    log = get_logger('test_ui_tools', debug=True)
+    handlers = list(log.handlers)
+    assert log.isEnabledFor(logging.DEBUG)
+
+    # Requesting it again only changes the level
+    log = get_logger('test_ui_tools', debug=False)
+    assert log.handlers == handlers
+    assert not log.isEnabledFor(logging.DEBUG)
+    assert handlers[-1].level == logging.INFO
+
+
+
+def test_get_logger_parent_handler():
+    """
+    Colored handlers installed on a parent logger are still found
+    """
+    parent = logging.getLogger('test_ui_tools_parent')
+    coloredlogs.install(logger=parent)
+    try:
+        log = get_logger('test_ui_tools_parent.child', debug=False)
+        log = get_logger('test_ui_tools_parent.child', debug=True)
+        assert log.isEnabledFor(logging.DEBUG)
+
+        # The shared handler is never kept for the child
+        assert 'test_ui_tools_parent.child' not in _HANDLERS
+        assert not log.handlers
+    finally:
+        for handler in list(parent.handlers):
+            parent.removeHandler(handler)
+
+
+def test_get_logger_no_handler(monkeypatch):
+    """
+    Nothing is kept when no terminal handler is installed
+    """
+    monkeypatch.setattr(coloredlogs, 'install', lambda **kwargs: None)
+    get_logger('test_ui_tools_no_handler')
+    log = get_logger('test_ui_tools_no_handler', debug=True)
+    assert 'test_ui_tools_no_handler' not in _HANDLERS
+    assert log.isEnabledFor(logging.DEBUG)
+
+
 if __name__ == '__main__':
     unittest.main()
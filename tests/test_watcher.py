@@ -0,0 +1,116 @@
+import time
+
+import pytest
+
+from . import MockProbePort
+from radicl.api import RAD_API
+from radicl.info import ProbeState
+from radicl.probe import RAD_Probe
+from radicl.protocol import split_frames
+from radicl.watcher import StateWatcher, state_reached
+
+
+class StatePort(MockProbePort):
+    """
+    Mock port answering each state request with the next state listed, the
+    last one is repeated
+    """
+    def __init__(self, states, **kwargs):
+        super().__init__(**kwargs)
+        self.states = list(states)
+
+    def writePort(self, data):
+        if data[1] == 0x40:
+            state = self.states.pop(0) if len(self.states) > 1 else self.states[0]
+            self.responses[0x40] = bytes([state.value])
+        return super().writePort(data)
+
+
+class PushPort(StatePort):
+    """
+    Mock port with a background reader that pushes the states listed
+    """
+    reader_active = True
+
+    def __init__(self, pushes, **kwargs):
+        super().__init__([ProbeState.IDLE], **kwargs)
+        self.pushes = [bytes([0x9F, 0x40, 0x03, 0x00, 0x01, s.value]) for s in pushes]
+
+    def readFrame(self, timeout=None):
+        frames = split_frames(self.rx)
+        return frames[0] if frames else None
+
+    def readPushMessage(self, timeout=None):
+        return self.pushes.pop(0) if self.pushes else None
+
+    def clearResponses(self):
+        self.rx.clear()
+
+
+@pytest.fixture()
+def sleeps(monkeypatch):
+    slept = []
+    monkeypatch.setattr(time, 'sleep', slept.append)
+    return slept
+
+
+@pytest.mark.parametrize('current, state, expected', [
+    (ProbeState.MEASURING, ProbeState.MEASURING, True),
+    # Advanced past the state
+    (ProbeState.DATA_STAGED, ProbeState.MEASURING, True),
+    (ProbeState.IDLE, ProbeState.MEASURING, False),
+    (ProbeState.IDLE, ProbeState.RESET, True),
+    # Unknown states never satisfy a wait
+    (ProbeState.NOT_SET, ProbeState.MEASURING, False),
+    (ProbeState.UNKOWN_STATE, ProbeState.DATA_STAGED, False),
+])
+def test_state_reached(current, state, expected):
+    assert state_reached(current, state) == expected
+
+
+def test_wait_for_polling(sleeps):
+    port = StatePort([ProbeState.IDLE, ProbeState.IDLE, ProbeState.MEASURING])
+    probe = RAD_Probe(ext_api=RAD_API(port))
+    watcher = StateWatcher(probe)
+
+    transitions = []
+    watcher.on_change(lambda old, new: transitions.append((old, new)))
+    measuring = watcher.when(ProbeState.MEASURING)
+    staged = watcher.when(ProbeState.DATA_STAGED)
+
+    assert watcher.wait_for(ProbeState.MEASURING, timeout=10) == (True, 3)
+    assert transitions == [(ProbeState.NOT_SET, ProbeState.IDLE), (ProbeState.IDLE, ProbeState.MEASURING)]
+    assert measuring.result(timeout=0) == ProbeState.MEASURING
+    assert not staged.done()
+
+    # Polls back off while the state is unchanged
+    assert sleeps == pytest.approx([0.02, 0.02, 0.03])
+    assert probe.last_state == ProbeState.IDLE
+
+
+def test_wait_for_timeout():
+    port = StatePort([ProbeState.IDLE])
+    probe = RAD_Probe(ext_api=RAD_API(port))
+    watcher = StateWatcher(probe, max_interval=0.01)
+    result, polls = watcher.wait_for(ProbeState.MEASURING, timeout=0.05)
+    assert not result
+    assert polls > 1
+
+
+def test_wait_for_push(sleeps):
+    port = PushPort([ProbeState.MEASURING])
+    probe = RAD_Probe(ext_api=RAD_API(port))
+    watcher = StateWatcher(probe)
+
+    assert watcher.wait_for(ProbeState.MEASURING, timeout=10) == (True, 1)
+    assert watcher.push_supported
+    # The pushed state did not need a query or a sleep
+    assert [r for r in port.requests if r[1] == 0x40] == []
+    assert sleeps == []
+
+
+def test_wait_for_state(sleeps):
+    port = StatePort([ProbeState.MEASURING, ProbeState.PROCESSING])
+    probe = RAD_Probe(ext_api=RAD_API(port))
+    assert probe.wait_for_state(ProbeState.PROCESSING, retry=10, delay=0.1)
+    assert probe.state == ProbeState.PROCESSING
@@ -0,0 +1,62 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from radicl.writers import (CSVWriter, NPZWriter, get_writer, read_lyte_profile, read_profile, to_csv, write_profile,
+                            writer_for)
+
+from . import synthetic_profile
+
+
+@pytest.fixture()
+def profile():
+    n = 100
+    df = pd.DataFrame({'Sensor1': np.arange(n, dtype=float), 'Sensor2': np.linspace(0, 1, n),
+                       'depth': -np.arange(n) * 0.5, 'Y-Axis': np.ones(n)},
+                      index=pd.Index(np.arange(n) / 16000, name='time'))
+    meta = {'RECORDED': '2024-01-01--12:00:00', 'Serial Num.': 'ABC123', 'ACC. Range': '16'}
+    return df, meta
+
+
+@pytest.mark.parametrize('fmt, expected', [('csv', '.csv'), ('NPZ', '.npz')])
+def test_write_profile(tmp_path, profile, fmt, expected):
+    df, meta = profile
+    filename = write_profile(df, meta, tmp_path.joinpath('profile.csv'), fmt=fmt)
+    assert filename.endswith(expected)
+
+    result, result_meta = read_profile(filename)
+    pd.testing.assert_frame_equal(result, df, check_exact=False)
+    assert result_meta == meta
+
+
+def test_to_csv(tmp_path, profile):
+    df, meta = profile
+    filename = write_profile(df, meta, tmp_path.joinpath('profile.npz'))
+    csv = to_csv(filename)
+    assert csv == str(tmp_path.joinpath('profile.csv'))
+    assert to_csv(csv) == csv
+
+    result, result_meta = read_profile(csv)
+    pd.testing.assert_frame_equal(result, df, check_exact=False)
+    assert result_meta == meta
+
+
+@pytest.mark.parametrize('filename, expected', [('a.npz', NPZWriter), ('a.CSV', CSVWriter), ('a.txt', CSVWriter)])
+def test_writer_for(filename, expected):
+    assert writer_for(filename) is expected
+
+
+def test_get_writer_unknown():
+    with pytest.raises(ValueError):
+        get_writer('xlsx')
+
+
+@pytest.mark.parametrize('fmt', ['csv', 'npz'])
+def test_read_lyte_profile(tmp_path, fmt):
+    df, meta = synthetic_profile(seconds=1)
+    filename = write_profile(df, meta, tmp_path.joinpath('profile'), fmt=fmt)
+    profile = read_lyte_profile(filename)
+
+    assert len(profile.raw.index) == len(df.index)
+    assert str(profile.filename) == filename
+    assert [p.name for p in tmp_path.iterdir()] == [f'profile.{fmt}']